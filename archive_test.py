@@ -0,0 +1,209 @@
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# The archive is exercised in-process against a scratch database; the
+# background archiver is off so each test decides when orders move
+DATABASE_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_DIR}/archive_test.db"
+os.environ["ARCHIVE_INTERVAL_SECONDS"] = "0"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from database import SessionLocal
+from main import app
+from models.order import ArchivedOrder, ArchivedOrderItem, Order
+from seed_data import seed_database
+from services import archive
+
+PRODUCT = {"id": "archive-kit", "name": "Archive Kit", "price": 10.0, "stock_quantity": 100, "category": "Kits"}
+
+class ArchiveTests:
+    def __init__(self, client):
+        self.client = client
+        self.tests_run = 0
+        self.tests_passed = 0
+        self.admin = self.login("admin@gbsite.com", "admin123")
+        self.client.post("/api/products/", json=PRODUCT, headers=self.admin)
+    
+    def log_test(self, name, success, details=""):
+        """Log test results"""
+        self.tests_run += 1
+        if success:
+            self.tests_passed += 1
+            print(f"✅ {name} - PASSED")
+        else:
+            print(f"❌ {name} - FAILED")
+        if details:
+            print(f"   {details}")
+        print()
+    
+    def login(self, email, password):
+        token = self.client.post("/api/auth/login", json={"email": email, "password": password}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+    
+    def register(self, name):
+        response = self.client.post("/api/auth/register", json={
+            "username": name, "email": f"{name}@test.com", "password": "secret123"
+        })
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    def place_order(self, headers, quantity=1):
+        self.client.post("/api/cart/add", json={
+            "product_id": PRODUCT["id"], "product_name": PRODUCT["name"],
+            "product_price": PRODUCT["price"], "quantity": quantity
+        }, headers=headers)
+        response = self.client.post("/api/orders/", headers=headers)
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+    
+    @staticmethod
+    def close_long_ago(order_ids, order_status="delivered"):
+        """Mark orders closed a year ago, so the next archiver run moves them"""
+        db = SessionLocal()
+        try:
+            db.query(Order).filter(Order.id.in_(order_ids)).update(
+                {"status": order_status, "updated_at": datetime.utcnow() - timedelta(days=365)},
+                synchronize_session=False
+            )
+            db.commit()
+            return archive.archive_orders(db)
+        finally:
+            db.close()
+    
+    def listing(self, headers, per_page=100):
+        """Every order id of a listing, following next_cursor page by page"""
+        ids, cursor = [], None
+        while True:
+            query = f"/api/orders/?per_page={per_page}" + (f"&cursor={cursor}" if cursor else "")
+            data = self.client.get(query, headers=headers).json()
+            ids += [order["id"] for order in data["orders"]]
+            cursor = data["next_cursor"]
+            if not cursor:
+                return ids, data["total"]
+    
+    def test_archive_moves_closed_orders(self):
+        """Old delivered/cancelled orders move with their items; open and recent ones stay"""
+        print("🔍 Testing archive_orders...")
+        
+        buyer = self.register("archive-buyer")
+        closed = [self.place_order(buyer), self.place_order(buyer, quantity=2)]
+        still_open = self.place_order(buyer)
+        recent = self.place_order(buyer)
+        moved = self.close_long_ago(closed[:1]) + self.close_long_ago(closed[1:], "cancelled")
+        
+        db = SessionLocal()
+        try:
+            self.client.put(f"/api/orders/{recent}/status", json={"status": "delivered"}, headers=self.admin)
+            moved += archive.archive_orders(db)
+            archived = sorted(db.scalars(select(ArchivedOrder.id)))
+            items = db.query(ArchivedOrderItem).filter(ArchivedOrderItem.order_id.in_(closed)).count()
+            hot = sorted(db.scalars(select(Order.id).where(Order.id.in_(closed + [still_open, recent]))))
+        finally:
+            db.close()
+        
+        success = moved == 2 and archived == closed and items == 2 and hot == [still_open, recent]
+        self.log_test("Archive Moves Closed Orders", success, f"Moved: {moved}, Archived: {archived}, Items: {items}, Hot: {hot}")
+    
+    def test_ids_are_not_reused(self):
+        """Once the newest order is archived and its buyer deleted, new orders still get new ids"""
+        print("🔍 Testing order id continuity...")
+        
+        buyer = self.register("archive-leaver")
+        newest = [self.place_order(buyer), self.place_order(buyer)]
+        self.close_long_ago(newest[:1])
+        user_id = self.client.get("/api/auth/me", headers=buyer).json()["id"]
+        deleted = self.client.delete(f"/api/admin/users/{user_id}", headers=self.admin).status_code
+        
+        next_id = self.place_order(self.register("archive-newcomer"))
+        ids, _ = self.listing(self.admin)
+        
+        success = deleted == 200 and next_id > max(newest) and len(ids) == len(set(ids))
+        self.log_test("Order Ids Are Not Reused", success, f"Deleted: {deleted}, Newest: {newest}, Next id: {next_id}")
+    
+    def test_listings_include_archive(self):
+        """Order listings and detail reach archived orders, page by page and in the totals"""
+        print("🔍 Testing listings over orders and the archive...")
+        
+        buyer = self.register("archive-reader")
+        orders = [self.place_order(buyer) for _ in range(4)]
+        self.close_long_ago(orders[:2])
+        
+        mine, my_total = self.listing(buyer)
+        paged, paged_total = self.listing(buyer, per_page=1)
+        detail = self.client.get(f"/api/orders/{orders[0]}", headers=buyer).status_code
+        everything, admin_total = self.listing(self.admin, per_page=3)
+        
+        success = (
+            mine == orders[::-1] and paged == mine and my_total == paged_total == 4
+            and detail == 200 and set(orders) <= set(everything) and admin_total == len(everything)
+        )
+        details = f"Listing: {mine}, Paged: {paged}, Totals: {my_total}/{paged_total}, Detail: {detail}"
+        self.log_test("Listings Include Archived Orders", success, details)
+    
+    def test_archived_order_cannot_change(self):
+        """Changing the status of an archived order is refused with 409"""
+        print("🔍 Testing the archived order guard...")
+        
+        order_id = self.place_order(self.register("archive-closer"))
+        self.close_long_ago([order_id])
+        response = self.client.put(f"/api/orders/{order_id}/status", json={"status": "pending"}, headers=self.admin)
+        
+        success = response.status_code == 409 and response.json()["detail"] == "Archived orders cannot be changed"
+        self.log_test("Archived Order Cannot Change", success, f"Status: {response.status_code}, Body: {response.text}")
+    
+    def test_stats_count_archived_orders(self):
+        """Order stats count archived orders by status and include them in revenue"""
+        print("🔍 Testing order stats with archived orders...")
+        
+        before = self.client.get("/api/orders/stats/summary", headers=self.admin).json()
+        admin_before = self.client.get("/api/admin/stats", headers=self.admin).json()
+        buyer = self.register("archive-spender")
+        orders = [self.place_order(buyer), self.place_order(buyer, quantity=3)]
+        self.close_long_ago(orders)
+        after = self.client.get("/api/orders/stats/summary", headers=self.admin).json()
+        admin_after = self.client.get("/api/admin/stats", headers=self.admin).json()
+        
+        delivered = after["status_counts"]["delivered"] - before["status_counts"]["delivered"]
+        revenue = round(after["total_revenue"] - before["total_revenue"], 2)
+        admin_orders = admin_after["total_orders"] - admin_before["total_orders"]
+        success = delivered == 2 and revenue == 4 * PRODUCT["price"] and admin_orders == 2
+        self.log_test("Stats Count Archived Orders", success, f"Delivered: +{delivered}, Revenue: +{revenue}, Admin orders: +{admin_orders}")
+
+def main():
+    print("🚀 Starting Archive Tests...")
+    print("=" * 60)
+    
+    seed_database()
+    try:
+        with TestClient(app) as client:
+            tester = ArchiveTests(client)
+            tester.test_archive_moves_closed_orders()
+            tester.test_ids_are_not_reused()
+            tester.test_listings_include_archive()
+            tester.test_archived_order_cannot_change()
+            tester.test_stats_count_archived_orders()
+    finally:
+        shutil.rmtree(DATABASE_DIR, ignore_errors=True)
+    
+    # Print results
+    print("=" * 60)
+    print(f"📊 ARCHIVE TEST RESULTS:")
+    print(f"   Tests Run: {tester.tests_run}")
+    print(f"   Tests Passed: {tester.tests_passed}")
+    print(f"   Tests Failed: {tester.tests_run - tester.tests_passed}")
+    print(f"   Success Rate: {(tester.tests_passed/tester.tests_run)*100:.1f}%")
+    
+    if tester.tests_passed == tester.tests_run:
+        print("🎉 Archived orders stay readable and counted!")
+        return 0
+    else:
+        print("⚠️  Some archive tests failed!")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
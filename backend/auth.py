@@ -4,9 +4,10 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.user import User
-from database import get_db
+from database import get_async_db, get_db
 import os
 
 # Security
@@ -16,6 +17,7 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -51,6 +53,15 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     
     return int(user_id)
 
+def get_optional_user_id(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)) -> Optional[int]:
+    """User id for requests that work anonymously but can use a valid token."""
+    if credentials is None:
+        return None
+    try:
+        return verify_token(credentials)
+    except HTTPException:
+        return None
+
 def get_current_user(db: Session = Depends(get_db), user_id: int = Depends(verify_token)):
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
@@ -66,4 +77,13 @@ def get_current_admin_user(current_user: User = Depends(get_current_user)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_current_user_async(db: AsyncSession = Depends(get_async_db), user_id: int = Depends(verify_token)):
+    user = await db.get(User, user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    return user
\ No newline at end of file
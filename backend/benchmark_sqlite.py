@@ -0,0 +1,246 @@
+"""Mixed read/write benchmark for the SQLite profile in database.py.
+
+Runs the same workload twice against fresh temporary databases: once with the
+engine as it used to be created (driver defaults, default pool) and once with
+configure_sqlite() and engine_options(). Readers browse products and order
+history while writers run checkout-shaped transactions.
+
+Every reader and writer is a separate process with an engine of its own, the
+way several server workers share one database file, so the numbers measure
+SQLite's locking rather than contention for the GIL.
+
+Usage: python benchmark_sqlite.py [--seconds 5] [--readers 16] [--writers 4]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Keep the app's module-level engine away from the real database file
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "gbsite_benchmark_app.db"))
+
+from sqlalchemy import create_engine, insert, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, configure_sqlite, engine_options
+from models.user import User
+from models.product import Product, StockMovement
+from models.order import Order, OrderItem
+
+PRODUCTS = 2000
+USERS = 200
+ORDERS = 5000
+CATEGORIES = ["Arduino", "Sensores", "Motores", "Componentes", "Kits", "Ferramentas"]
+
+def create_benchmark_engine(url, tuned):
+    if tuned:
+        engine = create_engine(url, **engine_options(url))
+        configure_sqlite(engine, "tuned")
+    else:
+        # The engine as database.py created it before the profile existed
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+    return engine
+
+def read_loop(session_factory, deadline):
+    rng = random.Random()
+    latencies, errors = [], 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        db = session_factory()
+        try:
+            choice = rng.random()
+            if choice < 0.5:
+                db.query(Product).filter(
+                    Product.is_active == True,
+                    Product.category == rng.choice(CATEGORIES)
+                ).order_by(Product.price).limit(20).all()
+            elif choice < 0.8:
+                db.query(Product).filter(Product.id == f"product-{rng.randrange(PRODUCTS)}").first()
+            else:
+                db.query(Order).filter(Order.user_id == rng.randint(1, USERS)).order_by(Order.created_at.desc()).limit(10).all()
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            errors += 1
+        finally:
+            db.close()
+    return latencies, errors
+
+def write_loop(session_factory, deadline):
+    rng = random.Random()
+    products = Product.__table__
+    latencies, errors = [], 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        db = session_factory()
+        try:
+            now = datetime.utcnow()
+            user_id = rng.randint(1, USERS)
+            order_id = db.execute(insert(Order.__table__).values(
+                user_id=user_id, total_amount=20.0, status="pending", created_at=now, updated_at=now
+            )).inserted_primary_key[0]
+            # Seeded in order, so product-{i} has key i + 1
+            for product_key in rng.sample(range(1, PRODUCTS + 1), 3):
+                db.execute(
+                    update(products)
+                    .where(products.c.key == product_key, products.c.stock_quantity >= 1)
+                    .values(stock_quantity=products.c.stock_quantity - 1, updated_at=now)
+                )
+                db.execute(insert(OrderItem.__table__).values(
+                    order_id=order_id, product_key=product_key, product_name="x", product_price=10.0, quantity=1
+                ))
+                db.execute(insert(StockMovement.__table__).values(
+                    product_key=product_key, movement_type="out", quantity=1, reason="sale",
+                    reference_id=str(order_id), created_at=now, created_by=user_id
+                ))
+            db.commit()
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            db.rollback()
+            errors += 1
+        finally:
+            db.close()
+    return latencies, errors
+
+def run_worker(role, url, tuned, seconds, ready, start, results):
+    """Process entry point: one reader or writer with its own engine."""
+    engine = create_benchmark_engine(url, tuned)
+    try:
+        session_factory = sessionmaker(bind=engine, autoflush=False)
+        loop = write_loop if role == "writer" else read_loop
+        # Warm the connection up, then start together with every other worker
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        ready.release()
+        start.wait()
+        latencies, errors = loop(session_factory, time.monotonic() + seconds)
+        results.put((role, latencies, errors))
+    finally:
+        engine.dispose()
+
+class SQLiteBenchmark:
+    def __init__(self, tuned, seconds=5.0, readers=16, writers=4):
+        self.tuned = tuned
+        self.seconds = seconds
+        self.readers = readers
+        self.writers = writers
+        self.directory = tempfile.mkdtemp(prefix="gbsite_bench_")
+        self.url = f"sqlite:///{self.directory}/bench.db"
+        self.read_latencies = []
+        self.write_latencies = []
+        self.errors = 0
+
+    def seed(self, engine):
+        Base.metadata.create_all(bind=engine)
+        rng = random.Random(42)
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            conn.execute(insert(User.__table__), [
+                {"username": f"user{i}", "email": f"user{i}@bench.local", "password_hash": "x", "role": "consumer"}
+                for i in range(USERS)
+            ])
+            conn.execute(insert(Product.__table__), [
+                {
+                    "id": f"product-{i}",
+                    "name": f"Product {i}",
+                    "description": "Benchmark product " * 10,
+                    "price": round(rng.uniform(1, 500), 2),
+                    "stock_quantity": 1000000,
+                    "category": CATEGORIES[i % len(CATEGORIES)],
+                    "is_active": True,
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for i in range(PRODUCTS)
+            ])
+            conn.execute(insert(Order.__table__), [
+                {"user_id": rng.randint(1, USERS), "total_amount": 10.0, "status": "pending", "created_at": now, "updated_at": now}
+                for _ in range(ORDERS)
+            ])
+
+    def run(self):
+        engine = create_benchmark_engine(self.url, self.tuned)
+        try:
+            self.seed(engine)
+            with engine.connect() as conn:
+                journal_mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+            engine.dispose()
+
+            context = multiprocessing.get_context("spawn")
+            ready, start, results = context.Semaphore(0), context.Event(), context.Queue()
+            roles = ["reader"] * self.readers + ["writer"] * self.writers
+            workers = [
+                context.Process(target=run_worker, args=(role, self.url, self.tuned, self.seconds, ready, start, results))
+                for role in roles
+            ]
+            for worker in workers:
+                worker.start()
+            for _ in workers:
+                ready.acquire()
+            start.set()
+
+            for _ in workers:
+                role, latencies, errors = results.get()
+                (self.write_latencies if role == "writer" else self.read_latencies).extend(latencies)
+                self.errors += errors
+            for worker in workers:
+                worker.join()
+        finally:
+            engine.dispose()
+            shutil.rmtree(self.directory, ignore_errors=True)
+        return self.report(journal_mode)
+
+    def report(self, journal_mode):
+        def percentile(values, fraction):
+            return sorted(values)[int(len(values) * fraction)] * 1000 if values else 0.0
+
+        return {
+            "profile": "tuned" if self.tuned else "default",
+            "journal_mode": journal_mode,
+            "reads_per_s": len(self.read_latencies) / self.seconds,
+            "writes_per_s": len(self.write_latencies) / self.seconds,
+            "read_p50_ms": statistics.median(self.read_latencies) * 1000 if self.read_latencies else 0.0,
+            "read_p99_ms": percentile(self.read_latencies, 0.99),
+            "read_max_ms": max(self.read_latencies, default=0.0) * 1000,
+            "write_p50_ms": statistics.median(self.write_latencies) * 1000 if self.write_latencies else 0.0,
+            "write_p99_ms": percentile(self.write_latencies, 0.99),
+            "errors": self.errors
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the default and tuned SQLite profiles under mixed load")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"🚀 SQLite benchmark: {args.readers} readers, {args.writers} writers, {args.seconds:.0f}s per profile")
+    print("=" * 60)
+
+    results = [SQLiteBenchmark(tuned, args.seconds, args.readers, args.writers).run() for tuned in (False, True)]
+
+    columns = [
+        ("journal_mode", "journal mode", "{}"),
+        ("reads_per_s", "reads/s", "{:.0f}"),
+        ("writes_per_s", "writes/s", "{:.0f}"),
+        ("read_p50_ms", "read p50 (ms)", "{:.2f}"),
+        ("read_p99_ms", "read p99 (ms)", "{:.2f}"),
+        ("read_max_ms", "read max (ms)", "{:.2f}"),
+        ("write_p50_ms", "write p50 (ms)", "{:.2f}"),
+        ("write_p99_ms", "write p99 (ms)", "{:.2f}"),
+        ("errors", "locked errors", "{}"),
+    ]
+    print(f"{'':<16}" + "".join(f"{result['profile']:>12}" for result in results))
+    for key, label, template in columns:
+        print(f"{label:<16}" + "".join(f"{template.format(result[key]):>12}" for result in results))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
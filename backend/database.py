@@ -1,20 +1,187 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+import asyncio
+import atexit
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./gbsite.db")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
-)
+def to_async_url(url: str) -> str:
+    """The async-driver URL for the same database (aiosqlite, asyncpg)."""
+    scheme, _, rest = url.partition(":")
+    if scheme.split("+")[0] == "sqlite":
+        return "sqlite+aiosqlite:" + rest
+    if scheme.split("+")[0] in ("postgres", "postgresql"):
+        return "postgresql+asyncpg:" + rest
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(SQLALCHEMY_DATABASE_URL))
+
+def read_only_url(url: str) -> str:
+    """A read-only URI for a SQLite file; other URLs are returned unchanged."""
+    scheme, _, path = url.partition(":///")
+    if not scheme.startswith("sqlite") or not path or path.startswith("file:") or "?" in path or ":memory:" in path:
+        return url
+    return f"{scheme}:///file:{path}?mode=ro&uri=true"
+
+# Where read-only sessions connect: a Postgres replica, or by default a
+# read-only connection to the same SQLite file
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", read_only_url(SQLALCHEMY_DATABASE_URL))
+ASYNC_READ_DATABASE_URL = os.getenv("ASYNC_READ_DATABASE_URL", to_async_url(READ_DATABASE_URL))
+
+# SQLite profile, applied to every new connection. Set SQLITE_PROFILE=off to
+# get the driver defaults back (rollback journal, synchronous=FULL, ...).
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+# WAL lets readers run while a write is in progress instead of waiting for it
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+# NORMAL is durable against application crashes; only an OS crash or power
+# loss can roll back the last commits, never corrupt the database
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+# Seconds between PRAGMA optimize runs (0 disables)
+SQLITE_OPTIMIZE_INTERVAL = float(os.getenv("SQLITE_OPTIMIZE_INTERVAL", "3600"))
+
+# Enough pooled connections for the FastAPI threadpool (40 threads by default);
+# the async engine gets a pool of the same size, which is what bounds async routes
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.partition(":")[2].strip("/") == "")
+
+def _connect_aiosqlite(*args, **kwargs):
+    """aiosqlite.connect() with a worker thread that does not keep the process alive.
+
+    SQLAlchemy sets daemon on the connection object, which was the thread itself
+    before aiosqlite 0.22; since then pooled connections that were never closed
+    would block interpreter exit.
+    """
+    import aiosqlite
+    
+    connection = aiosqlite.connect(*args, **kwargs)
+    getattr(connection, "_thread", connection).daemon = True
+    return connection
+
+def engine_options(url: str) -> dict:
+    """create_engine() arguments for `url`: thread-safe SQLite and a sized pool."""
+    if not url.startswith("sqlite"):
+        return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+    
+    options = {"connect_args": {"check_same_thread": False}}
+    if "+aiosqlite" in url.split(":")[0]:
+        options["connect_args"]["async_creator_fn"] = _connect_aiosqlite
+    if _is_memory_sqlite(url):
+        # Every connection to :memory: is a separate database, so share one
+        options["poolclass"] = StaticPool
+    else:
+        if "async_creator_fn" in options["connect_args"]:
+            # aiosqlite would open a new connection (and thread) per checkout
+            options["poolclass"] = AsyncAdaptedQueuePool
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+def configure_sqlite(engine, profile: str = SQLITE_PROFILE):
+    """Apply the SQLite profile to every connection `engine` opens."""
+    if engine.dialect.name != "sqlite" or profile == "off":
+        return
+    
+    # Read-only connections cannot change the journal mode or write statistics
+    read_only = "mode=ro" in str(engine.url)
+    pragmas = [
+        f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA temp_store = {SQLITE_TEMP_STORE}",
+    ]
+    if not _is_memory_sqlite(str(engine.url)):
+        pragmas.append(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        if not read_only:
+            pragmas.append(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+    
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+    
+    if SQLITE_OPTIMIZE_INTERVAL > 0 and not read_only:
+        last_run = [time.monotonic()]
+        lock = threading.Lock()
+        
+        # Piggyback on connection checkout: whichever request comes first after
+        # the interval refreshes the planner statistics, no extra thread needed
+        @event.listens_for(engine, "checkout")
+        def _optimize(dbapi_connection, connection_record, connection_proxy):
+            if time.monotonic() - last_run[0] < SQLITE_OPTIMIZE_INTERVAL or not lock.acquire(blocking=False):
+                return
+            try:
+                last_run[0] = time.monotonic()
+                cursor = dbapi_connection.cursor()
+                try:
+                    cursor.execute("PRAGMA optimize")
+                finally:
+                    cursor.close()
+            finally:
+                lock.release()
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+configure_sqlite(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async twin of the engine above, for async def routes: waiting on the database
+# does not tie up a threadpool thread. With an in-memory SQLite URL the two
+# engines see separate databases, so use a file for anything but unit checks.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+configure_sqlite(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def _read_engines():
+    if READ_DATABASE_URL == SQLALCHEMY_DATABASE_URL:
+        return engine, async_engine
+    
+    read_engine = create_engine(READ_DATABASE_URL, **engine_options(READ_DATABASE_URL))
+    configure_sqlite(read_engine)
+    async_read_engine = create_async_engine(ASYNC_READ_DATABASE_URL, **engine_options(ASYNC_READ_DATABASE_URL))
+    configure_sqlite(async_read_engine.sync_engine)
+    return read_engine, async_read_engine
+
+# Sessions for read-only work (catalog browsing, order history, reports). They
+# have their own pools, so read traffic never queues behind connections that
+# are busy writing; writes always go through the engines above.
+read_engine, async_read_engine = _read_engines()
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+async def dispose_async_engines():
+    """Close the pooled async connections, and with them aiosqlite's worker threads."""
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
+# The app's shutdown handler disposes the engines too, but scripts and tests
+# that import the app without running it never get there
+@atexit.register
+def _dispose_async_engines_at_exit():
+    asyncio.run(dispose_async_engines())
+
 Base = declarative_base()
 
 def get_db():
@@ -22,4 +189,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
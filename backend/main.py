@@ -4,16 +4,21 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 import uvicorn
 from typing import List, Optional
+import os
 
-from database import get_db, engine
+from database import get_db, engine, dispose_async_engines
 from models import user, product, order
-from routers import auth, users, products, cart, orders, admin
+from routers import auth, users, products, cart, orders, admin, flash_sale
 from auth import get_current_user
+from read_routing import ReadYourWritesMiddleware
+from services import archive, edge_cache, product_search, reservations
+import migrations
+# Subscribes to catalog_events, so product writes republish the static catalog
+from services import catalog_publisher
 
-# Create tables
-user.Base.metadata.create_all(bind=engine)
-product.Base.metadata.create_all(bind=engine)
-order.Base.metadata.create_all(bind=engine)
+# Bring the schema up to date (python -m migrations status lists what is applied)
+migrations.upgrade(engine)
+product_search.ensure_search_index(engine)
 
 app = FastAPI(
     title="GBSite API",
@@ -30,6 +35,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Send a user's reads to the primary for a moment after they wrote
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Local stand-in for the edge cache, also used as the purge backend
+if os.getenv("EDGE_CACHE") == "local":
+    local_edge_cache = edge_cache.LocalEdgeCache()
+    edge_cache.set_purger(local_edge_cache)
+    app.add_middleware(edge_cache.LocalEdgeProxy, cache=local_edge_cache)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
@@ -37,6 +51,30 @@ app.include_router(products.router, prefix="/api/products", tags=["products"])
 app.include_router(cart.router, prefix="/api/cart", tags=["cart"])
 app.include_router(orders.router, prefix="/api/orders", tags=["orders"])
 app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+app.include_router(flash_sale.router, prefix="/api/flash-sale", tags=["flash-sale"])
+
+# Release expired cart holds in the background
+@app.on_event("startup")
+def start_reservation_sweeper():
+    reservations.reservation_sweeper.start()
+
+@app.on_event("shutdown")
+def stop_reservation_sweeper():
+    reservations.reservation_sweeper.stop()
+
+# Moves closed orders and old stock movements out of the hot tables
+@app.on_event("startup")
+def start_archiver():
+    archive.archiver.start()
+
+@app.on_event("shutdown")
+def stop_archiver():
+    archive.archiver.stop()
+
+# aiosqlite runs each connection on its own thread
+@app.on_event("shutdown")
+async def close_async_engine():
+    await dispose_async_engines()
 
 @app.get("/api/health")
 async def health_check():
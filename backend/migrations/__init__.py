@@ -0,0 +1,82 @@
+import importlib
+import logging
+import pkgutil
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional, Set
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, insert, select
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+# Migrations live in migrations/versions as NNNN_name.py modules. Each one has a
+# docstring describing it and an upgrade(conn) function that runs inside the
+# transaction that also records it as applied.
+_versions = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    description: str
+    upgrade: Callable[[Connection], None]
+
+def discover() -> List[Migration]:
+    """Every migration in migrations/versions, in version order."""
+    from migrations import versions
+    
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        prefix, _, name = module_info.name.partition("_")
+        if not prefix.isdigit():
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        description = (module.__doc__ or name).strip().splitlines()[0]
+        migrations.append(Migration(int(prefix), name, description, module.upgrade))
+    
+    migrations.sort(key=lambda migration: migration.version)
+    duplicates = {m.version for m in migrations if sum(o.version == m.version for o in migrations) > 1}
+    if duplicates:
+        raise RuntimeError(f"Duplicate migration versions: {sorted(duplicates)}")
+    return migrations
+
+def applied_versions(engine: Engine) -> Set[int]:
+    if not inspect(engine).has_table(_versions.name):
+        return set()
+    with engine.connect() as conn:
+        return set(conn.execute(select(_versions.c.version)).scalars())
+
+def pending(engine: Engine) -> List[Migration]:
+    applied = applied_versions(engine)
+    return [migration for migration in discover() if migration.version not in applied]
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    """Apply pending migrations up to `target` (default: all), one transaction each.
+
+    Returns the migrations that were applied.
+    """
+    _versions.create(engine, checkfirst=True)
+    
+    applied = []
+    for migration in pending(engine):
+        if target is not None and migration.version > target:
+            break
+        with engine.begin() as conn:
+            if conn.dialect.name == "sqlite":
+                # pysqlite only opens a transaction before INSERT/UPDATE/DELETE, so
+                # without this the DDL of a failed migration would stay applied
+                conn.exec_driver_sql("BEGIN")
+            migration.upgrade(conn)
+            conn.execute(insert(_versions).values(
+                version=migration.version,
+                name=migration.name,
+                applied_at=datetime.utcnow()
+            ))
+        logger.info("Applied migration %04d %s", migration.version, migration.name)
+        applied.append(migration)
+    return applied
\ No newline at end of file
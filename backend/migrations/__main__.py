@@ -0,0 +1,93 @@
+"""Schema migrations for the database in DATABASE_URL.
+
+Usage (from backend/):
+    python -m migrations status           list applied and pending migrations
+    python -m migrations upgrade [--to N] apply pending migrations
+    python -m migrations check            EXPLAIN the hot router queries on a freshly
+                                          migrated database and fail on full table scans
+    python -m migrations check --current  the same, against DATABASE_URL
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+
+from sqlalchemy import create_engine
+
+import migrations
+from database import configure_sqlite, engine, engine_options
+
+def status(args) -> int:
+    applied = migrations.applied_versions(engine)
+    print(f"📦 {engine.url.render_as_string(hide_password=True)}")
+    for migration in migrations.discover():
+        mark = "✅" if migration.version in applied else "⏳"
+        print(f"{mark} {migration.version:04d} {migration.name}: {migration.description}")
+    return 0
+
+def upgrade(args) -> int:
+    applied = migrations.upgrade(engine, target=args.to)
+    for migration in applied:
+        print(f"✅ Applied {migration.version:04d} {migration.name}")
+    if not applied:
+        print("✅ Database is up to date")
+    return 0
+
+def check(args) -> int:
+    from migrations import query_plans
+    
+    directory = None
+    if args.current:
+        target = engine
+        if migrations.pending(target):
+            print("⚠️  Pending migrations, run `python -m migrations upgrade` first")
+            return 1
+    else:
+        directory = tempfile.mkdtemp(prefix="gbsite_migrations_")
+        url = f"sqlite:///{directory}/check.db"
+        target = create_engine(url, **engine_options(url))
+        configure_sqlite(target)
+        migrations.upgrade(target)
+    
+    if target.dialect.name != "sqlite":
+        print("⚠️  The query plan check only supports SQLite")
+        return 1
+    
+    try:
+        results = query_plans.explain(target)
+    finally:
+        if directory:
+            target.dispose()
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    failed = 0
+    for result in results:
+        if result.full_scans:
+            failed += 1
+            print(f"❌ {result.name}")
+        else:
+            print(f"✅ {result.name}")
+        if result.full_scans or args.verbose:
+            for detail in result.plan:
+                print(f"   {detail}")
+    
+    print("=" * 60)
+    print(f"📊 {len(results) - failed}/{len(results)} queries use an index")
+    return 1 if failed else 0
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m migrations", description="Schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="list applied and pending migrations").set_defaults(run=status)
+    upgrade_parser = commands.add_parser("upgrade", help="apply pending migrations")
+    upgrade_parser.add_argument("--to", type=int, default=None, help="stop after this version")
+    upgrade_parser.set_defaults(run=upgrade)
+    check_parser = commands.add_parser("check", help="fail when a hot query does a full table scan")
+    check_parser.add_argument("--current", action="store_true", help="check DATABASE_URL instead of a fresh database")
+    check_parser.add_argument("--verbose", action="store_true", help="print every plan")
+    check_parser.set_defaults(run=check)
+    args = parser.parse_args()
+    return args.run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
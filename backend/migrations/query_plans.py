@@ -0,0 +1,91 @@
+"""EXPLAIN QUERY PLAN check for the queries the routers run on hot paths.
+
+Each entry mirrors a filtered or sorted query issued by a router or by the
+services behind them. The check fails when SQLite plans a full table scan for
+any of them, i.e. when an index they rely on is missing or unusable.
+Unfiltered admin listings that read a table in rowid order are left out.
+"""
+from datetime import datetime
+from typing import List, NamedTuple
+
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.engine import Engine
+
+from models.user import CartItem, User
+from models.order import ArchivedOrder, Order, OrderItem
+from models.product import ArchivedStockMovement, Product, StockMovement, StockReservation
+from pagination import after_position
+
+NOW = datetime(2000, 1, 1)
+
+def _queries() -> list:
+    return [
+        ("auth: user by email", select(User).where(User.email == "x")),
+        ("admin: users page after a cursor", select(User).where(
+            after_position([User.id], [1])
+        ).order_by(User.id).limit(11)),
+        ("cart: items of a user", select(CartItem).where(CartItem.user_id == 1)),
+        ("cart: line for a product", select(CartItem).where(CartItem.user_id == 1, CartItem.product_key == 1)),
+        ("cart: clear", delete(CartItem).where(CartItem.user_id == 1)),
+        ("reservations: hold of a cart line", select(StockReservation).where(
+            StockReservation.user_id == 1, StockReservation.product_key == 1
+        )),
+        ("reservations: holds taken at checkout", delete(StockReservation).where(StockReservation.user_id == 1)),
+        ("reservations: expired holds", select(StockReservation.id).where(StockReservation.expires_at < NOW).limit(500)),
+        ("orders: history of a user", select(Order).where(Order.user_id == 1).order_by(
+            Order.created_at.desc(), Order.id.desc()
+        ).limit(11)),
+        ("orders: history page after a cursor", select(Order).where(
+            Order.user_id == 1, after_position([Order.created_at, Order.id], ["2000-01-01 00:00:00", 1], descending=True)
+        ).order_by(Order.created_at.desc(), Order.id.desc()).limit(11)),
+        ("orders: history by status", select(Order).where(Order.user_id == 1, Order.status == "paid").order_by(
+            Order.created_at.desc(), Order.id.desc()
+        ).limit(11)),
+        ("orders: all orders, newest first", select(Order).order_by(Order.created_at.desc(), Order.id.desc()).limit(11)),
+        ("orders: count by status", select(func.count()).select_from(Order).where(Order.status == "pending")),
+        ("orders: revenue", select(func.sum(Order.total_amount)).where(Order.status.in_(["paid", "shipped"]))),
+        ("orders: items of an order", select(OrderItem).where(OrderItem.order_id == 1)),
+        ("archive: horizon", select(func.max(ArchivedOrder.created_at))),
+        ("archive: history of a user", select(ArchivedOrder).where(ArchivedOrder.user_id == 1).order_by(
+            ArchivedOrder.created_at.desc(), ArchivedOrder.id.desc()
+        ).limit(11)),
+        ("archive: horizon of a user", select(func.max(ArchivedOrder.created_at)).where(ArchivedOrder.user_id == 1)),
+        ("stock: movements of a product", select(StockMovement).where(StockMovement.product_key == 1)),
+        ("archive: archived movements of a product", select(
+            select(ArchivedStockMovement.id).where(ArchivedStockMovement.product_key == 1).exists()
+        )),
+        ("products: by id", select(Product).where(Product.id == "x")),
+        ("products: slug of a key", select(Product.id).where(Product.key.in_([1, 2]))),
+        ("products: batch lookup", select(Product).where(Product.id.in_(["x", "y"]))),
+        ("products: category by price", select(Product).where(
+            Product.is_active == True, Product.category == "x"
+        ).order_by(Product.price, Product.id).limit(21)),
+        ("products: active by price", select(Product).where(Product.is_active == True).order_by(
+            Product.price, Product.id
+        ).limit(21)),
+        ("products: change feed", select(Product).where(
+            tuple_(Product.change_seq, Product.id) > tuple_(1, "x")
+        ).order_by(Product.change_seq, Product.id).limit(100)),
+        ("products: next change sequence", select(func.max(Product.change_seq))),
+    ]
+
+class PlanResult(NamedTuple):
+    name: str
+    plan: List[str]
+    full_scans: List[str]
+
+def explain(engine: Engine) -> List[PlanResult]:
+    """Plan every catalogued query on `engine` (SQLite only)."""
+    results = []
+    with engine.connect() as conn:
+        for name, statement in _queries():
+            compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+            # Plans do not depend on the bound values
+            params = tuple(None for _ in compiled.positiontup or ())
+            plan = [row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + compiled.string, params)]
+            full_scans = [
+                detail for detail in plan
+                if detail.startswith("SCAN ") and " USING " not in detail and "CONSTANT ROW" not in detail
+            ]
+            results.append(PlanResult(name, plan, full_scans))
+    return results
\ No newline at end of file
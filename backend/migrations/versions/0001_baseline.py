@@ -0,0 +1,107 @@
+"""Baseline: the schema create_all() built before migrations existed.
+
+The tables are a frozen copy of the models at that point, so this migration
+keeps producing the same schema however the models change later. On databases
+that already have the tables it only adds what older builds lacked: indexes
+create_all() never adds to existing tables, and products.reserved_quantity.
+"""
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text, func, inspect, text
+)
+
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("username", String(80), unique=True, index=True, nullable=False),
+    Column("email", String(120), unique=True, index=True, nullable=False),
+    Column("password_hash", String(128), nullable=False),
+    Column("role", String(20), nullable=False),
+    Column("avatar_url", String(500)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now())
+)
+
+Table(
+    "cart_items", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("product_id", String(50), nullable=False),
+    Column("product_name", String(200), nullable=False),
+    Column("product_price", Float, nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("added_at", DateTime(timezone=True), server_default=func.now())
+)
+
+Table(
+    "products", metadata,
+    Column("id", String(50), primary_key=True, index=True),
+    Column("name", String(200), nullable=False, index=True),
+    Column("description", Text),
+    Column("price", Float, nullable=False, index=True),
+    Column("stock_quantity", Integer, nullable=False),
+    Column("reserved_quantity", Integer, nullable=False, server_default="0"),
+    Column("category", String(100), index=True),
+    Column("image_url", String(500)),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+    Index("ix_products_updated_at_id", "updated_at", "id")
+)
+
+Table(
+    "stock_movements", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("product_id", String(50), ForeignKey("products.id"), nullable=False),
+    Column("movement_type", String(20), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("reason", String(200)),
+    Column("reference_id", String(50)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("created_by", Integer, ForeignKey("users.id"))
+)
+
+Table(
+    "stock_reservations", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("product_id", String(50), ForeignKey("products.id"), nullable=False),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("expires_at", DateTime(timezone=True), nullable=False, index=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Index("ix_stock_reservations_user_product", "user_id", "product_id", unique=True)
+)
+
+Table(
+    "orders", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("total_amount", Float, nullable=False),
+    Column("status", String(50), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now())
+)
+
+Table(
+    "order_items", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("order_id", Integer, ForeignKey("orders.id"), nullable=False),
+    Column("product_id", String(50), nullable=False),
+    Column("product_name", String(200), nullable=False),
+    Column("product_price", Float, nullable=False),
+    Column("quantity", Integer, nullable=False)
+)
+
+def upgrade(conn):
+    existing = set(inspect(conn).get_table_names())
+    metadata.create_all(conn)
+    
+    if "products" in existing:
+        columns = {column["name"] for column in inspect(conn).get_columns("products")}
+        if "reserved_quantity" not in columns:
+            conn.execute(text("ALTER TABLE products ADD COLUMN reserved_quantity INTEGER NOT NULL DEFAULT 0"))
+    
+    for table in metadata.sorted_tables:
+        if table.name in existing:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
\ No newline at end of file
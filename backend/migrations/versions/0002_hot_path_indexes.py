@@ -0,0 +1,20 @@
+"""Indexes for the foreign keys and filter columns the routers query by."""
+from sqlalchemy import text
+
+INDEXES = [
+    # Cart lookups and the cart cleared at checkout
+    "CREATE INDEX IF NOT EXISTS ix_cart_items_user_id ON cart_items (user_id)",
+    # A user's order history, newest first; also serves plain user_id lookups
+    "CREATE INDEX IF NOT EXISTS ix_orders_user_id_created_at ON orders (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_orders_status ON orders (status)",
+    # The admin order list, newest first
+    "CREATE INDEX IF NOT EXISTS ix_orders_created_at ON orders (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_order_items_order_id ON order_items (order_id)",
+    "CREATE INDEX IF NOT EXISTS ix_stock_movements_product_id ON stock_movements (product_id)",
+    # Catalogue browsing: active products of a category, by price
+    "CREATE INDEX IF NOT EXISTS ix_products_active_category_price ON products (is_active, category, price)",
+]
+
+def upgrade(conn):
+    for statement in INDEXES:
+        conn.execute(text(statement))
\ No newline at end of file
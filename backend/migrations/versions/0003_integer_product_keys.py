@@ -0,0 +1,159 @@
+"""Integer product keys and small-integer status codes.
+
+products gets an INTEGER PRIMARY KEY (`key`, its old rowid, so the search
+index stays valid) and keeps the slug in `id` under a unique index. Cart items,
+order items, stock movements and reservations reference products.key instead
+of repeating the slug, and orders.status / stock_movements.movement_type are
+stored as codes (see models/codes.py).
+
+SQLite cannot change a primary key in place, so the tables are rebuilt: renamed
+aside, recreated, copied over and dropped. Rows that named a product missing
+from the catalog keep their history through an inactive placeholder product.
+A status outside the known list fails the copy instead of being guessed.
+"""
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, SmallInteger, String, Table, Text, func,
+    inspect, text
+)
+from sqlalchemy.schema import CreateTable
+
+# Frozen copies of models/codes.py at this point
+ORDER_STATUSES = ("pending", "paid", "processing", "shipped", "delivered", "cancelled")
+MOVEMENT_TYPES = ("in", "out", "adjustment")
+
+metadata = MetaData()
+
+Table("users", metadata, Column("id", Integer, primary_key=True))
+
+Table(
+    "products", metadata,
+    Column("key", Integer, primary_key=True),
+    Column("id", String(50), nullable=False, unique=True, index=True),
+    Column("name", String(200), nullable=False, index=True),
+    Column("description", Text),
+    Column("price", Float, nullable=False, index=True),
+    Column("stock_quantity", Integer, nullable=False),
+    Column("reserved_quantity", Integer, nullable=False, server_default="0"),
+    Column("category", String(100), index=True),
+    Column("image_url", String(500)),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+    Index("ix_products_updated_at_id", "updated_at", "id"),
+    Index("ix_products_active_category_price", "is_active", "category", "price")
+)
+
+Table(
+    "cart_items", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False, index=True),
+    Column("product_key", Integer, ForeignKey("products.key"), nullable=False),
+    Column("product_name", String(200), nullable=False),
+    Column("product_price", Float, nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("added_at", DateTime(timezone=True), server_default=func.now())
+)
+
+Table(
+    "orders", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("total_amount", Float, nullable=False),
+    Column("status", SmallInteger, nullable=False, index=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now(), index=True),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+    Index("ix_orders_user_id_created_at", "user_id", "created_at")
+)
+
+Table(
+    "order_items", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("order_id", Integer, ForeignKey("orders.id"), nullable=False, index=True),
+    Column("product_key", Integer, ForeignKey("products.key"), nullable=False),
+    Column("product_name", String(200), nullable=False),
+    Column("product_price", Float, nullable=False),
+    Column("quantity", Integer, nullable=False)
+)
+
+Table(
+    "stock_movements", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("product_key", Integer, ForeignKey("products.key"), nullable=False, index=True),
+    Column("movement_type", SmallInteger, nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("reason", String(200)),
+    Column("reference_id", String(50)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("created_by", Integer, ForeignKey("users.id"))
+)
+
+Table(
+    "stock_reservations", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("product_key", Integer, ForeignKey("products.key"), nullable=False),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("expires_at", DateTime(timezone=True), nullable=False, index=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Index("ix_stock_reservations_user_product", "user_id", "product_key", unique=True)
+)
+
+REBUILT = ["products", "cart_items", "orders", "order_items", "stock_movements", "stock_reservations"]
+
+def _code(column: str, values) -> str:
+    whens = " ".join(f"WHEN '{value}' THEN {code}" for code, value in enumerate(values))
+    return f"CASE {column} {whens} END"
+
+COPY = [
+    "INSERT INTO products (key, id, name, description, price, stock_quantity, reserved_quantity, "
+    "category, image_url, is_active, created_at, updated_at) "
+    "SELECT rowid, id, name, description, price, stock_quantity, reserved_quantity, "
+    "category, image_url, is_active, created_at, updated_at FROM products_old",
+    # Placeholders for slugs that were referenced but never (or no longer) in the catalog
+    # Named and priced after an order or cart line when there is one, else the slug
+    "INSERT INTO products (id, name, price, stock_quantity, reserved_quantity, is_active) "
+    "SELECT product_id, coalesce(max(product_name), product_id), coalesce(max(product_price), 0), 0, 0, 0 FROM ("
+    "SELECT product_id, product_name, product_price FROM order_items_old "
+    "UNION ALL SELECT product_id, product_name, product_price FROM cart_items_old "
+    "UNION ALL SELECT product_id, NULL, NULL FROM stock_movements_old "
+    "UNION ALL SELECT product_id, NULL, NULL FROM stock_reservations_old"
+    ") WHERE product_id NOT IN (SELECT id FROM products_old) GROUP BY product_id",
+    "INSERT INTO cart_items (id, user_id, product_key, product_name, product_price, quantity, added_at) "
+    "SELECT c.id, c.user_id, p.key, c.product_name, c.product_price, c.quantity, c.added_at "
+    "FROM cart_items_old c JOIN products p ON p.id = c.product_id",
+    "INSERT INTO orders (id, user_id, total_amount, status, created_at, updated_at) "
+    f"SELECT id, user_id, total_amount, {_code('status', ORDER_STATUSES)}, created_at, updated_at FROM orders_old",
+    "INSERT INTO order_items (id, order_id, product_key, product_name, product_price, quantity) "
+    "SELECT i.id, i.order_id, p.key, i.product_name, i.product_price, i.quantity "
+    "FROM order_items_old i JOIN products p ON p.id = i.product_id",
+    "INSERT INTO stock_movements (id, product_key, movement_type, quantity, reason, reference_id, created_at, created_by) "
+    f"SELECT m.id, p.key, {_code('m.movement_type', MOVEMENT_TYPES)}, m.quantity, m.reason, m.reference_id, "
+    "m.created_at, m.created_by FROM stock_movements_old m JOIN products p ON p.id = m.product_id",
+    "INSERT INTO stock_reservations (id, product_key, user_id, quantity, expires_at, created_at) "
+    "SELECT r.id, p.key, r.user_id, r.quantity, r.expires_at, r.created_at "
+    "FROM stock_reservations_old r JOIN products p ON p.id = r.product_id",
+]
+
+def upgrade(conn):
+    if conn.dialect.name != "sqlite":
+        raise RuntimeError("Migration 0003 rebuilds tables the SQLite way; convert other databases by hand")
+    
+    inspector = inspect(conn)
+    for name in REBUILT:
+        # Index names are global in SQLite and the new tables reuse them
+        for index in inspector.get_indexes(name):
+            conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+        conn.execute(text(f"ALTER TABLE {name} RENAME TO {name}_old"))
+    
+    tables = [metadata.tables[name] for name in REBUILT]
+    for table in tables:
+        conn.execute(CreateTable(table))
+    for statement in COPY:
+        conn.execute(text(statement))
+    # Indexes are cheaper to build once over the copied rows than row by row
+    for table in tables:
+        for index in table.indexes:
+            index.create(conn)
+    
+    for name in reversed(REBUILT):
+        conn.execute(text(f"DROP TABLE {name}_old"))
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""Archive tables for closed orders and old stock movements."""
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, SmallInteger, String, Table
+
+metadata = MetaData()
+
+Table("users", metadata, Column("id", Integer, primary_key=True))
+Table("products", metadata, Column("key", Integer, primary_key=True))
+
+Table(
+    "orders_archive", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("total_amount", Float, nullable=False),
+    Column("status", SmallInteger, nullable=False),
+    Column("created_at", DateTime(timezone=True), index=True),
+    Column("updated_at", DateTime(timezone=True)),
+    Index("ix_orders_archive_user_id_created_at", "user_id", "created_at")
+)
+
+Table(
+    "order_items_archive", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("order_id", Integer, ForeignKey("orders_archive.id"), nullable=False, index=True),
+    Column("product_key", Integer, ForeignKey("products.key"), nullable=False),
+    Column("product_name", String(200), nullable=False),
+    Column("product_price", Float, nullable=False),
+    Column("quantity", Integer, nullable=False)
+)
+
+Table(
+    "order_archive_totals", metadata,
+    Column("status", SmallInteger, primary_key=True, autoincrement=False),
+    Column("order_count", Integer, nullable=False),
+    Column("total_amount", Float, nullable=False)
+)
+
+Table(
+    "stock_movements_archive", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("product_key", Integer, ForeignKey("products.key"), nullable=False),
+    Column("movement_type", SmallInteger, nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("reason", String(200)),
+    Column("reference_id", String(50)),
+    Column("created_at", DateTime(timezone=True)),
+    Column("created_by", Integer, ForeignKey("users.id"))
+)
+
+def upgrade(conn):
+    metadata.create_all(
+        conn,
+        tables=[metadata.tables[name] for name in (
+            "orders_archive", "order_items_archive", "order_archive_totals", "stock_movements_archive"
+        )]
+    )
\ No newline at end of file
@@ -0,0 +1,20 @@
+"""Change sequence on products for the change feed.
+
+The feed used to page by updated_at, which is set before the commit, so a
+change could commit behind a cursor a client had already moved past.
+change_seq is assigned inside the write (see models/product.py) and existing
+rows are numbered in their old (updated_at, id) feed order.
+"""
+from sqlalchemy import text
+
+STATEMENTS = [
+    "ALTER TABLE products ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0",
+    "UPDATE products SET change_seq = ranked.seq FROM ("
+    "SELECT key, row_number() OVER (ORDER BY updated_at, id) AS seq FROM products"
+    ") AS ranked WHERE ranked.key = products.key",
+    "CREATE INDEX ix_products_change_seq_id ON products (change_seq, id)",
+]
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
\ No newline at end of file
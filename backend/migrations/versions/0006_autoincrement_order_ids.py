@@ -0,0 +1,93 @@
+"""AUTOINCREMENT ids for orders, order items and stock movements.
+
+Archived rows keep their ids, but a plain INTEGER PRIMARY KEY hands out
+max(id) + 1 again once the newest row is gone (archived or deleted with its
+user), so the same id could exist in the table and in its archive.
+AUTOINCREMENT remembers the highest id ever used in sqlite_sequence; that
+counter starts above every id in either table.
+
+SQLite cannot add AUTOINCREMENT to an existing table, so the tables are
+rebuilt the same way as in 0003.
+"""
+from sqlalchemy import (
+    Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, SmallInteger, String, Table, func, inspect, text
+)
+from sqlalchemy.schema import CreateTable
+
+metadata = MetaData()
+
+Table("users", metadata, Column("id", Integer, primary_key=True))
+Table("products", metadata, Column("key", Integer, primary_key=True))
+
+Table(
+    "orders", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("total_amount", Float, nullable=False),
+    Column("status", SmallInteger, nullable=False, index=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now(), index=True),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+    Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+    sqlite_autoincrement=True
+)
+
+Table(
+    "order_items", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("order_id", Integer, ForeignKey("orders.id"), nullable=False, index=True),
+    Column("product_key", Integer, ForeignKey("products.key"), nullable=False),
+    Column("product_name", String(200), nullable=False),
+    Column("product_price", Float, nullable=False),
+    Column("quantity", Integer, nullable=False),
+    sqlite_autoincrement=True
+)
+
+Table(
+    "stock_movements", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("product_key", Integer, ForeignKey("products.key"), nullable=False, index=True),
+    Column("movement_type", SmallInteger, nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("reason", String(200)),
+    Column("reference_id", String(50)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("created_by", Integer, ForeignKey("users.id")),
+    sqlite_autoincrement=True
+)
+
+# Table -> its archive, whose ids the counter also has to clear
+REBUILT = {
+    "orders": "orders_archive",
+    "order_items": "order_items_archive",
+    "stock_movements": "stock_movements_archive",
+}
+
+def upgrade(conn):
+    if conn.dialect.name != "sqlite":
+        raise RuntimeError("Migration 0006 rebuilds tables the SQLite way; convert other databases by hand")
+    
+    inspector = inspect(conn)
+    for name in REBUILT:
+        for index in inspector.get_indexes(name):
+            conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+        conn.execute(text(f"ALTER TABLE {name} RENAME TO {name}_old"))
+    
+    tables = [metadata.tables[name] for name in REBUILT]
+    for table in tables:
+        conn.execute(CreateTable(table))
+        columns = ", ".join(column.name for column in table.columns)
+        conn.execute(text(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {table.name}_old"))
+    for table in tables:
+        for index in table.indexes:
+            index.create(conn)
+    
+    for name, archive in REBUILT.items():
+        # The copy already set the counter to the table's own max(id)
+        conn.execute(text(f"DELETE FROM sqlite_sequence WHERE name = '{name}'"))
+        conn.execute(text(
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT '{name}', coalesce(max(id), 0) FROM "
+            f"(SELECT id FROM {name}_old UNION ALL SELECT id FROM {archive})"
+        ))
+    
+    for name in reversed(list(REBUILT)):
+        conn.execute(text(f"DROP TABLE {name}_old"))
@@ -0,0 +1,12 @@
+"""Index on archived stock movements by product.
+
+The stock movement history of a product reads the archive too, and first
+checks whether the product has any archived movements at all.
+"""
+from sqlalchemy import text
+
+def upgrade(conn):
+    conn.execute(text(
+        "CREATE INDEX ix_stock_movements_archive_product_key_created_at "
+        "ON stock_movements_archive (product_key, created_at)"
+    ))
@@ -0,0 +1,35 @@
+from typing import Sequence
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+# Stored as the position in the tuple: only ever append new values
+ORDER_STATUSES = ("pending", "paid", "processing", "shipped", "delivered", "cancelled")
+MOVEMENT_TYPES = ("in", "out", "adjustment")
+
+class Code(TypeDecorator):
+    """A string column stored as a small integer code.
+
+    Python code and the API keep using the strings; only the stored value is
+    the index of the string in `values`. Unknown strings raise ValueError
+    instead of being written.
+    """
+    
+    impl = SmallInteger
+    cache_ok = True
+    
+    def __init__(self, values: Sequence[str]):
+        super().__init__()
+        self.values = tuple(values)
+        self._codes = {value: code for code, value in enumerate(self.values)}
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return self._codes[value]
+        except KeyError:
+            raise ValueError(f"{value!r} is not one of: {', '.join(self.values)}") from None
+    
+    def process_result_value(self, value, dialect):
+        return None if value is None else self.values[value]
\ No newline at end of file
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
+from models.codes import Code, ORDER_STATUSES
+from models.product import product_slug
 
 class Order(Base):
     __tablename__ = "orders"
@@ -9,23 +11,68 @@ class Order(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     total_amount = Column(Float, nullable=False)
-    status = Column(String(50), nullable=False, default="pending")  # pending, paid, processing, shipped, delivered, cancelled
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    status = Column(Code(ORDER_STATUSES), nullable=False, default="pending", index=True)  # pending, paid, processing, shipped, delivered, cancelled
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="orders")
     order_items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Order history of a user, newest first
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        # Ids are never reused, so an archived order's id stays unique (migration 0006)
+        {"sqlite_autoincrement": True},
+    )
 
 class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    product_id = Column(String(50), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    product_key = Column(Integer, ForeignKey("products.key"), nullable=False)
+    product_id = product_slug(product_key)
     product_name = Column(String(200), nullable=False)
     product_price = Column(Float, nullable=False)
     quantity = Column(Integer, nullable=False)
     
     # Relationships
-    order = relationship("Order", back_populates="order_items")
\ No newline at end of file
+    order = relationship("Order", back_populates="order_items")
+    
+    __table_args__ = ({"sqlite_autoincrement": True},)
+
+# Closed orders moved out of the tables above by services/archive.py. Same
+# columns and ids; only what archived reads filter on is indexed.
+class ArchivedOrder(Base):
+    __tablename__ = "orders_archive"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    total_amount = Column(Float, nullable=False)
+    status = Column(Code(ORDER_STATUSES), nullable=False)
+    created_at = Column(DateTime(timezone=True), index=True)
+    updated_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        Index("ix_orders_archive_user_id_created_at", "user_id", "created_at"),
+    )
+
+class ArchivedOrderItem(Base):
+    __tablename__ = "order_items_archive"
+    
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders_archive.id"), nullable=False, index=True)
+    product_key = Column(Integer, ForeignKey("products.key"), nullable=False)
+    product_id = product_slug(product_key)
+    product_name = Column(String(200), nullable=False)
+    product_price = Column(Float, nullable=False)
+    quantity = Column(Integer, nullable=False)
+
+# Count and amount of the archived orders per status, so stats never scan the archive
+class ArchivedOrderTotal(Base):
+    __tablename__ = "order_archive_totals"
+    
+    status = Column(Code(ORDER_STATUSES), primary_key=True, autoincrement=False)
+    order_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0)
\ No newline at end of file
@@ -1,31 +1,62 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Index, select, text
+from sqlalchemy.orm import column_property, relationship
 from sqlalchemy.sql import func
 from database import Base
+from datetime import datetime
+from models.codes import Code, MOVEMENT_TYPES
+
+# Evaluated inside the INSERT/UPDATE itself, i.e. while the write lock is held:
+# SQLite has a single writer, so values grow in commit order
+NEXT_CHANGE_SEQ = text("(SELECT coalesce(max(change_seq), 0) + 1 FROM products)")
 
 class Product(Base):
     __tablename__ = "products"
     
-    id = Column(String(50), primary_key=True, index=True)
-    name = Column(String(200), nullable=False)
+    # Integer surrogate key that rows in other tables point at; `id` is the
+    # public slug the API uses and never changes either
+    key = Column(Integer, primary_key=True)
+    id = Column(String(50), nullable=False, unique=True, index=True)
+    name = Column(String(200), nullable=False, index=True)
     description = Column(Text)
-    price = Column(Float, nullable=False)
+    price = Column(Float, nullable=False, index=True)
     stock_quantity = Column(Integer, nullable=False, default=0)
-    category = Column(String(100))
+    # Sum of StockReservation.quantity for this product, kept in step by services/reservations.py
+    reserved_quantity = Column(Integer, nullable=False, default=0, server_default="0")
+    category = Column(String(100), index=True)
     image_url = Column(String(500))
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Position in the change feed, renewed by every write. updated_at is taken
+    # before the commit, so it cannot tell which changes a reader has already seen
+    change_seq = Column(Integer, nullable=False, default=NEXT_CHANGE_SEQ, onupdate=NEXT_CHANGE_SEQ)
     
     # Relationships
     stock_movements = relationship("StockMovement", back_populates="product")
+    
+    __table_args__ = (
+        Index("ix_products_updated_at_id", "updated_at", "id"),
+        Index("ix_products_change_seq_id", "change_seq", "id"),
+        # Catalogue browsing: active products of a category, by price
+        Index("ix_products_active_category_price", "is_active", "category", "price"),
+    )
+    
+    @property
+    def available_quantity(self) -> int:
+        """Stock that is neither sold nor held in someone's cart."""
+        return max((self.stock_quantity or 0) - (self.reserved_quantity or 0), 0)
+
+def product_slug(product_key):
+    """Read-only attribute with the slug of the product a `product_key` column points at."""
+    return column_property(select(Product.id).where(Product.key == product_key).correlate_except(Product).scalar_subquery())
 
 class StockMovement(Base):
     __tablename__ = "stock_movements"
     
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(String(50), ForeignKey("products.id"), nullable=False)
-    movement_type = Column(String(20), nullable=False)  # 'in', 'out', 'adjustment'
+    product_key = Column(Integer, ForeignKey("products.key"), nullable=False, index=True)
+    product_id = product_slug(product_key)
+    movement_type = Column(Code(MOVEMENT_TYPES), nullable=False)  # 'in', 'out', 'adjustment'
     quantity = Column(Integer, nullable=False)
     reason = Column(String(200))  # 'sale', 'restock', 'adjustment', 'return'
     reference_id = Column(String(50))  # Order ID or other reference
@@ -33,4 +64,41 @@ class StockMovement(Base):
     created_by = Column(Integer, ForeignKey("users.id"))
     
     # Relationships
-    product = relationship("Product", back_populates="stock_movements")
\ No newline at end of file
+    product = relationship("Product", back_populates="stock_movements")
+    
+    __table_args__ = ({"sqlite_autoincrement": True},)
+
+class StockReservation(Base):
+    __tablename__ = "stock_reservations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    product_key = Column(Integer, ForeignKey("products.key"), nullable=False)
+    product_id = product_slug(product_key)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # One hold per cart line
+        Index("ix_stock_reservations_user_product", "user_id", "product_key", unique=True),
+    )
+
+# Old stock movements, moved out of stock_movements by services/archive.py
+class ArchivedStockMovement(Base):
+    __tablename__ = "stock_movements_archive"
+    
+    id = Column(Integer, primary_key=True)
+    product_key = Column(Integer, ForeignKey("products.key"), nullable=False)
+    product_id = product_slug(product_key)
+    movement_type = Column(Code(MOVEMENT_TYPES), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    reason = Column(String(200))
+    reference_id = Column(String(50))
+    created_at = Column(DateTime(timezone=True))
+    created_by = Column(Integer, ForeignKey("users.id"))
+    
+    __table_args__ = (
+        # Movement history of a product, and whether it has any archived
+        Index("ix_stock_movements_archive_product_key_created_at", "product_key", "created_at"),
+    )
@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
+from models.product import product_slug
 
 class User(Base):
     __tablename__ = "users"
@@ -22,8 +23,9 @@ class CartItem(Base):
     __tablename__ = "cart_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    product_id = Column(String(50), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    product_key = Column(Integer, ForeignKey("products.key"), nullable=False)
+    product_id = product_slug(product_key)
     product_name = Column(String(200), nullable=False)
     product_price = Column(Float, nullable=False)
     quantity = Column(Integer, nullable=False, default=1)
@@ -0,0 +1,136 @@
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, String, func, literal, select, tuple_, type_coerce
+
+def encode_cursor(row_id: Any, keys: Sequence[Any] = ()) -> str:
+    """Cursor pointing just past a row: its id, plus its other sort-key values if any."""
+    payload = {"k": list(keys), "id": row_id} if keys else {"id": row_id}
+    # Drivers that hand back datetimes (not SQLite) get them as text
+    data = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+def _decode(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        payload = None
+    if not isinstance(payload, dict) or "id" not in payload:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return payload
+
+def decode_cursor(cursor: str) -> Any:
+    return _decode(cursor)["id"]
+
+def decode_position(cursor: str, key_count: int) -> list:
+    """The sort-key values a cursor carries, id last, for a listing keyed on key_count columns."""
+    payload = _decode(cursor)
+    keys = payload.get("k", [])
+    if not isinstance(keys, list) or len(keys) != key_count - 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return keys + [payload["id"]]
+
+def _stored(column):
+    # Timestamps are carried and compared as the text SQLite stores. Read into a
+    # datetime and bound again they would gain a ".000000" that CURRENT_TIMESTAMP
+    # values do not have, which moves the page boundary.
+    return type_coerce(column, String) if isinstance(column.type, DateTime) else column
+
+def after_position(key_columns: list, position: list, descending: bool = False):
+    """Row-value condition for the rows that sort after `position` (a decoded cursor)."""
+    key = tuple_(*[_stored(column) for column in key_columns])
+    reference = tuple_(*[literal(value) for value in position])
+    return key < reference if descending else key > reference
+
+def _cursor_columns(key_columns: list) -> list:
+    # Labelled so they do not clash with the entity's own columns of that name
+    return [_stored(column).label(f"cursor_key_{i}") for i, column in enumerate(key_columns[:-1])]
+
+def _page(rows: list, per_page: int, id_column, with_keys: bool) -> Tuple[List[Any], Optional[str]]:
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        if with_keys:
+            next_cursor = encode_cursor(getattr(last[0], id_column.key), tuple(last[1:]))
+        else:
+            next_cursor = encode_cursor(getattr(last, id_column.key))
+    return ([row[0] for row in rows] if with_keys else rows), next_cursor
+
+def paginate(
+    query,
+    key_columns: list,
+    id_column,
+    page: int = 1,
+    per_page: int = 20,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    include_total: bool = True
+) -> Tuple[List[Any], Optional[int], Optional[str]]:
+    """Page through `query` ordered by `key_columns` (which must end with the primary key).
+
+    With a cursor the page starts right after the key values the cursor carries,
+    using a row-value comparison, so every page costs the same as the first one
+    and still works after the row the cursor came from was deleted. Without a
+    cursor the classic offset paging is used. `next_cursor` is returned whenever
+    there are more rows, so clients can switch to keyset mode after the first
+    page. Returns (items, total, next_cursor); total is None when include_total
+    is False, which skips the COUNT query.
+    """
+    total = query.count() if include_total else None
+    
+    if cursor:
+        query = query.filter(after_position(key_columns, decode_position(cursor, len(key_columns)), descending))
+    
+    order = [column.desc() if descending else column.asc() for column in key_columns]
+    query = query.order_by(*order)
+    
+    if not cursor:
+        query = query.offset((page - 1) * per_page)
+    
+    # The last row's key values go into next_cursor as stored
+    stored_keys = _cursor_columns(key_columns)
+    if stored_keys:
+        query = query.add_columns(*stored_keys)
+    
+    rows, next_cursor = _page(query.limit(per_page + 1).all(), per_page, id_column, bool(stored_keys))
+    return rows, total, next_cursor
+
+async def paginate_async(
+    db,
+    statement,
+    key_columns: list,
+    id_column,
+    page: int = 1,
+    per_page: int = 20,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    include_total: bool = True
+) -> Tuple[List[Any], Optional[int], Optional[str]]:
+    """paginate() for a select() statement run on an AsyncSession."""
+    total = None
+    if include_total:
+        total = (await db.execute(select(func.count()).select_from(statement.order_by(None).subquery()))).scalar()
+    
+    if cursor:
+        statement = statement.where(after_position(key_columns, decode_position(cursor, len(key_columns)), descending))
+    
+    order = [column.desc() if descending else column.asc() for column in key_columns]
+    statement = statement.order_by(*order)
+    
+    if not cursor:
+        statement = statement.offset((page - 1) * per_page)
+    
+    stored_keys = _cursor_columns(key_columns)
+    result = await db.execute(statement.add_columns(*stored_keys).limit(per_page + 1))
+    rows, next_cursor = _page(result.all() if stored_keys else result.scalars().all(), per_page, id_column, bool(stored_keys))
+    return rows, total, next_cursor
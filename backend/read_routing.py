@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from fastapi import Depends
+from fastapi.security import HTTPAuthorizationCredentials
+
+from auth import get_optional_user_id
+from database import AsyncReadSessionLocal, AsyncSessionLocal, ReadSessionLocal, SessionLocal
+
+# How long a user's reads stay on the primary after they changed something,
+# long enough to cover replica lag so they always see their own writes
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+class RecentWriters:
+    """Users who wrote recently, by user id; state is per process."""
+    
+    def __init__(self, window: float = READ_YOUR_WRITES_SECONDS):
+        self.window = window
+        self._until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+    
+    def mark(self, user_id: int):
+        now = time.monotonic()
+        with self._lock:
+            self._until[user_id] = now + self.window
+            if len(self._until) > 10000:
+                self._until = {uid: until for uid, until in self._until.items() if until > now}
+    
+    def is_recent(self, user_id: Optional[int]) -> bool:
+        until = self._until.get(user_id) if user_id is not None else None
+        return until is not None and until > time.monotonic()
+
+recent_writers = RecentWriters()
+
+def get_read_db(user_id: Optional[int] = Depends(get_optional_user_id)):
+    """Session for read-only handlers: the read pool, or the primary right after the user wrote."""
+    db = SessionLocal() if recent_writers.is_recent(user_id) else ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(user_id: Optional[int] = Depends(get_optional_user_id)):
+    factory = AsyncSessionLocal if recent_writers.is_recent(user_id) else AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware that marks the caller as a recent writer after a successful mutation.
+
+    Any authenticated request other than GET/HEAD/OPTIONS that answers with a
+    status below 400 counts as a write. The mark is set before the response is
+    sent, so the client's next request already reads from the primary.
+    """
+    
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+    
+    def __init__(self, app, writers: RecentWriters = recent_writers):
+        self.app = app
+        self.writers = writers
+    
+    async def __call__(self, scope, receive, send):
+        user_id = None
+        if scope["type"] == "http" and scope["method"] not in self.SAFE_METHODS:
+            user_id = self._user_id(scope)
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+        
+        async def watch(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                self.writers.mark(user_id)
+            await send(message)
+        
+        await self.app(scope, receive, watch)
+    
+    @staticmethod
+    def _user_id(scope) -> Optional[int]:
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    return get_optional_user_id(HTTPAuthorizationCredentials(scheme=scheme, credentials=token))
+        return None
\ No newline at end of file
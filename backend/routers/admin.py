@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 import math
 
 from database import get_db
@@ -9,6 +9,12 @@ from models.user import User, CartItem
 from models.order import Order
 from schemas.user import UserResponse
 from auth import get_current_admin_user
+from pagination import paginate
+from read_routing import get_read_db
+from services import archive
+from services.response_cache import catalog_cache
+from services.flash_sale import flash_sale
+from services.write_queue import run_write, write_queue_stats
 
 router = APIRouter()
 
@@ -16,17 +22,25 @@ router = APIRouter()
 def get_all_users(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = Query(True),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    total = db.query(User).count()
-    users = db.query(User).offset((page - 1) * per_page).limit(per_page).all()
+    # Ids grow with created_at, so keying on the primary key alone gives the same
+    # order and lets every cursor page start with a rowid seek
+    users, total, next_cursor = paginate(
+        db.query(User), [User.id], User.id,
+        page=page, per_page=per_page, cursor=cursor,
+        include_total=include_total
+    )
     
     return {
         "users": [UserResponse.from_orm(user) for user in users],
         "total": total,
-        "pages": math.ceil(total / per_page),
-        "current_page": page
+        "pages": math.ceil(total / per_page) if total is not None else None,
+        "current_page": page,
+        "next_cursor": next_cursor
     }
 
 @router.get("/users/{user_id}")
@@ -43,8 +57,9 @@ def get_user_details(
             detail="User not found"
         )
     
-    # Get user's orders
-    orders = db.query(Order).filter(Order.user_id == user_id).all()
+    # Get user's orders, archived ones included
+    all_orders = archive.all_orders()
+    orders = db.query(all_orders).filter(all_orders.user_id == user_id).all()
     
     return {
         "user": UserResponse.from_orm(user),
@@ -100,15 +115,18 @@ def delete_user(
             detail="Cannot delete your own account"
         )
     
-    # Delete user's cart items first
-    db.query(CartItem).filter(CartItem.user_id == user_id).delete()
+    def delete(db: Session):
+        # Delete user's cart items first
+        db.query(CartItem).filter(CartItem.user_id == user_id).delete()
+        
+        # Delete user's orders
+        db.query(Order).filter(Order.user_id == user_id).delete()
+        archive.delete_user_orders(db, user_id)
+        
+        # Delete user
+        db.query(User).filter(User.id == user_id).delete()
     
-    # Delete user's orders
-    db.query(Order).filter(Order.user_id == user_id).delete()
-    
-    # Delete user
-    db.delete(user)
-    db.commit()
+    run_write(db, delete)
     
     return {"message": "User deleted successfully"}
 
@@ -169,19 +187,41 @@ def update_user(
 
 @router.get("/stats")
 def get_admin_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
+    revenue_statuses = ["paid", "processing", "shipped", "delivered"]
+    archived = archive.archived_totals(db)
+    
     total_users = db.query(User).count()
-    total_orders = db.query(Order).count()
+    total_orders = db.query(Order).count() + sum(count for count, _ in archived.values())
     pending_orders = db.query(Order).filter(Order.status == "pending").count()
-    total_revenue = db.query(Order).filter(Order.status.in_(["paid", "processing", "shipped", "delivered"])).with_entities(
+    total_revenue = db.query(Order).filter(Order.status.in_(revenue_statuses)).with_entities(
         func.sum(Order.total_amount)
     ).scalar() or 0
+    total_revenue += sum(amount for status_name, (_, amount) in archived.items() if status_name in revenue_statuses)
     
     return {
         "total_users": total_users,
         "total_orders": total_orders,
         "pending_orders": pending_orders,
         "total_revenue": float(total_revenue)
-    }
\ No newline at end of file
+    }
+
+@router.get("/cache/stats")
+def get_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    return {"catalog": catalog_cache.stats(), "write_queue": write_queue_stats()}
+
+@router.get("/flash-sale/stats")
+def get_flash_sale_stats(current_user: User = Depends(get_current_admin_user)):
+    return {"queues": flash_sale.stats()}
+
+@router.put("/flash-sale/{product_id}")
+def enable_flash_sale(product_id: str, current_user: User = Depends(get_current_admin_user)):
+    flash_sale.enable(product_id)
+    return {"message": f"Waiting room enabled for {product_id}"}
+
+@router.delete("/flash-sale/{product_id}")
+def disable_flash_sale(product_id: str, current_user: User = Depends(get_current_admin_user)):
+    flash_sale.disable(product_id)
+    return {"message": f"Waiting room disabled for {product_id}"}
@@ -1,19 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import get_async_db
 from models.user import User, CartItem
 from schemas.user import CartItemCreate, CartItemUpdate, CartItemResponse, CartResponse
-from auth import get_current_user
+from auth import get_current_user_async
+from services import catalog_events, reservations
+from services.flash_sale import flash_sale, Ticket
+from services.product_keys import product_keys
+from services.write_queue import run_write_async
 
 router = APIRouter()
 
+def _admitted_ticket(ticket_id: Optional[str], user_id: int, product_id: str, quantity: int) -> Optional[Ticket]:
+    """For products with a waiting room, the buyer's admitted ticket; 429 until their turn."""
+    if not flash_sale.is_hot(product_id):
+        return None
+    
+    ticket = flash_sale.check_admitted(ticket_id, user_id, product_id, quantity)
+    if ticket is None:
+        waiting = flash_sale.poll(ticket_id, user_id) if ticket_id else None
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"This product is in high demand, take a ticket at /api/flash-sale/{product_id}/tickets and wait for your turn",
+            headers={"Retry-After": str(flash_sale.retry_after(waiting) if waiting else 1)}
+        )
+    return ticket
+
 @router.get("/", response_model=CartResponse)
-def get_cart(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def get_cart(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
+    cart_items = (await db.execute(select(CartItem).where(CartItem.user_id == current_user.id))).scalars().all()
     
     total_amount = sum(item.product_price * item.quantity for item in cart_items)
     
@@ -24,43 +46,75 @@ def get_cart(
     )
 
 @router.post("/add")
-def add_to_cart(
+async def add_to_cart(
     item: CartItemCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    queue_ticket: Optional[str] = Header(None, alias="X-Queue-Ticket"),
+    current_user: User = Depends(get_current_user_async)
 ):
-    # Check if item already exists in cart
-    existing_item = db.query(CartItem).filter(
-        CartItem.user_id == current_user.id,
-        CartItem.product_id == item.product_id
-    ).first()
-    
-    if existing_item:
-        # Update quantity
-        existing_item.quantity += item.quantity
-    else:
-        # Create new cart item
-        cart_item = CartItem(
-            user_id=current_user.id,
-            **item.dict()
+    if item.quantity <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Quantity must be greater than 0"
         )
-        db.add(cart_item)
     
-    db.commit()
+    ticket = _admitted_ticket(queue_ticket, current_user.id, item.product_id, item.quantity)
+    user_id = current_user.id
+    
+    def add(db: Session):
+        product_key = product_keys.key(db, item.product_id)
+        if product_key is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        
+        # Hold the units for this cart; checkout then only confirms the hold
+        if not reservations.reserve(db, user_id, item.product_id, item.quantity):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient stock for {item.product_name}"
+            )
+        
+        # Check if item already exists in cart
+        existing_item = db.query(CartItem).filter(
+            CartItem.user_id == user_id,
+            CartItem.product_key == product_key
+        ).first()
+        
+        if existing_item:
+            # Update quantity
+            existing_item.quantity += item.quantity
+        else:
+            # Create new cart item
+            cart_item = CartItem(
+                user_id=user_id,
+                product_key=product_key,
+                **item.dict(exclude={"product_id"})
+            )
+            db.add(cart_item)
+    
+    await run_write_async(add)
+    
+    await catalog_events.availability_changed_async([item.product_id])
+    
+    # After the change event, so the waiting room already counts the new hold
+    if ticket:
+        flash_sale.complete(ticket)
     
     return {"message": "Item added to cart successfully"}
 
 @router.put("/update/{item_id}")
-def update_cart_item(
+async def update_cart_item(
     item_id: int,
     item_update: CartItemUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    queue_ticket: Optional[str] = Header(None, alias="X-Queue-Ticket"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    cart_item = db.query(CartItem).filter(
+    cart_item = (await db.execute(select(CartItem).where(
         CartItem.id == item_id,
         CartItem.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not cart_item:
         raise HTTPException(
@@ -74,21 +128,57 @@ def update_cart_item(
             detail="Quantity must be greater than 0"
         )
     
-    cart_item.quantity = item_update.quantity
-    db.commit()
+    # Admission is judged on the quantity read here; the write below works from
+    # the quantity the line has when it runs
+    expected_change = item_update.quantity - cart_item.quantity
+    ticket = _admitted_ticket(queue_ticket, current_user.id, cart_item.product_id, expected_change) if expected_change > 0 else None
+    user_id, product_id, product_name = current_user.id, cart_item.product_id, cart_item.product_name
+    
+    def update(db: Session):
+        quantity = db.query(CartItem.quantity).filter(CartItem.id == item_id, CartItem.user_id == user_id).scalar()
+        if quantity is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cart item not found"
+            )
+        
+        change = item_update.quantity - quantity
+        if change > (ticket.quantity if ticket else 0) and flash_sale.is_hot(product_id):
+            # Another request lowered the line meanwhile, past what the ticket admits
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Cart item changed while updating, please try again"
+            )
+        if change > 0 and not reservations.reserve(db, user_id, product_id, change):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient stock for {product_name}"
+            )
+        if change < 0:
+            reservations.release(db, user_id, product_id, -change)
+        
+        db.query(CartItem).filter(CartItem.id == item_id).update({"quantity": item_update.quantity})
+        return change
+    
+    change = await run_write_async(update)
+    
+    if change:
+        await catalog_events.availability_changed_async([product_id])
+    if ticket:
+        flash_sale.complete(ticket)
     
     return {"message": "Cart item updated successfully"}
 
 @router.delete("/remove/{item_id}")
-def remove_from_cart(
+async def remove_from_cart(
     item_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    cart_item = db.query(CartItem).filter(
+    cart_item = (await db.execute(select(CartItem).where(
         CartItem.id == item_id,
         CartItem.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not cart_item:
         raise HTTPException(
@@ -96,17 +186,32 @@ def remove_from_cart(
             detail="Cart item not found"
         )
     
-    db.delete(cart_item)
-    db.commit()
+    user_id, product_id = current_user.id, cart_item.product_id
+    
+    def remove(db: Session):
+        released = reservations.release(db, user_id, product_id)
+        db.query(CartItem).filter(CartItem.id == item_id).delete()
+        return released
+    
+    released = await run_write_async(remove)
+    
+    await catalog_events.availability_changed_async(released)
     
     return {"message": "Item removed from cart successfully"}
 
 @router.delete("/clear")
-def clear_cart(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def clear_cart(
+    current_user: User = Depends(get_current_user_async)
 ):
-    db.query(CartItem).filter(CartItem.user_id == current_user.id).delete()
-    db.commit()
+    user_id = current_user.id
+    
+    def clear(db: Session):
+        released = reservations.release(db, user_id)
+        db.query(CartItem).filter(CartItem.user_id == user_id).delete()
+        return released
+    
+    released = await run_write_async(clear)
+    
+    await catalog_events.availability_changed_async(released)
     
     return {"message": "Cart cleared successfully"}
\ No newline at end of file
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Response
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models.user import User
+from schemas.flash_sale import QueueJoinRequest, QueueTicketResponse
+from auth import get_current_user
+from services.flash_sale import flash_sale, Ticket, SOLD_OUT, WAITING
+
+router = APIRouter()
+
+def _ticket_response(ticket: Ticket, response: Response) -> QueueTicketResponse:
+    retry_after = None
+    if ticket.status == WAITING:
+        retry_after = flash_sale.retry_after(ticket)
+        response.headers["Retry-After"] = str(retry_after)
+    
+    return QueueTicketResponse(
+        ticket=ticket.id if ticket.status != SOLD_OUT else None,
+        product_id=ticket.product_id,
+        quantity=ticket.quantity,
+        status=ticket.status,
+        position=flash_sale.position(ticket),
+        retry_after=retry_after
+    )
+
+@router.post("/{product_id}/tickets", response_model=QueueTicketResponse)
+def join_queue(
+    product_id: str,
+    join: QueueJoinRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not flash_sale.is_hot(product_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No waiting room for this product"
+        )
+    
+    ticket = flash_sale.join(db, current_user.id, product_id, join.quantity)
+    return _ticket_response(ticket, response)
+
+@router.get("/tickets/{ticket_id}", response_model=QueueTicketResponse)
+def get_ticket(
+    ticket_id: str,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    ticket = flash_sale.poll(ticket_id, current_user.id)
+    if not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found or expired"
+        )
+    
+    return _ticket_response(ticket, response)
\ No newline at end of file
@@ -1,114 +1,207 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, insert, select, update
 from typing import Optional
+from datetime import datetime
 import math
 
 from database import get_db
 from models.user import User, CartItem
-from models.order import Order, OrderItem
-from models.product import Product, StockMovement
+from models.codes import ORDER_STATUSES
+from models.order import ArchivedOrder, Order, OrderItem
+from models.product import Product, StockMovement, StockReservation
 from schemas.order import OrderResponse, OrdersResponse, OrderUpdate, OrderWithUserResponse
-from auth import get_current_user, get_current_admin_user
+from auth import get_current_admin_user, get_current_user_async
+from pagination import decode_position, paginate_async
+from read_routing import get_async_read_db, get_read_db
+from conditional import is_not_modified, make_etag, not_modified, validator_headers
+from services import archive, catalog_events, reservations
+from services.inventory import give_stock
+from services.write_queue import run_write, run_write_async
 
 router = APIRouter()
 
 @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-def create_order(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def create_order(
+    current_user: User = Depends(get_current_user_async)
 ):
-    # Get user's cart items
-    cart_items = db.query(CartItem).filter(CartItem.user_id == current_user.id).all()
-    
-    if not cart_items:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cart is empty"
-        )
-    
-    # Calculate total amount
-    total_amount = sum(item.product_price * item.quantity for item in cart_items)
+    user_id = current_user.id
     
-    # Create order
-    order = Order(
-        user_id=current_user.id,
-        total_amount=total_amount,
-        status="pending"
-    )
-    
-    db.add(order)
-    db.flush()  # Get order ID
-    
-    # Create order items and update stock
-    for cart_item in cart_items:
-        # Check stock availability
-        product = db.query(Product).filter(Product.id == cart_item.product_id).first()
-        if product and product.stock_quantity < cart_item.quantity:
-            db.rollback()
+    def checkout(db: Session):
+        # Get user's cart items
+        cart_items = db.query(CartItem).filter(CartItem.user_id == user_id).all()
+        
+        if not cart_items:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient stock for {cart_item.product_name}"
+                detail="Cart is empty"
             )
         
-        # Create order item
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=cart_item.product_id,
-            product_name=cart_item.product_name,
-            product_price=cart_item.product_price,
-            quantity=cart_item.quantity
+        # Quantity per product, so a product listed twice is checked once for the total
+        quantities = {}
+        for cart_item in cart_items:
+            quantities[cart_item.product_id] = quantities.get(cart_item.product_id, 0) + cart_item.quantity
+        
+        # Load every product in the cart with one query: what is left for this
+        # buyer is the unreserved stock plus their own hold
+        available = Product.stock_quantity - Product.reserved_quantity + func.coalesce(StockReservation.quantity, 0)
+        products = {
+            product_id: stock for product_id, stock in db.query(Product.id, available).outerjoin(
+                StockReservation,
+                and_(StockReservation.product_key == Product.key, StockReservation.user_id == user_id)
+            ).filter(Product.id.in_(list(quantities))).all()
+        }
+        
+        for cart_item in cart_items:
+            if cart_item.product_id in products and products[cart_item.product_id] < quantities[cart_item.product_id]:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Insufficient stock for {cart_item.product_name}"
+                )
+        
+        # Calculate total amount
+        total_amount = sum(item.product_price * item.quantity for item in cart_items)
+        
+        # Create order
+        now = datetime.utcnow()
+        order = Order(
+            user_id=user_id,
+            total_amount=total_amount,
+            status="pending",
+            created_at=now,
+            updated_at=now
         )
-        db.add(order_item)
         
-        # Update stock if product exists
-        if product:
-            product.stock_quantity -= cart_item.quantity
-            
-            # Record stock movement
-            stock_movement = StockMovement(
-                product_id=product.id,
-                movement_type="out",
-                quantity=cart_item.quantity,
-                reason="sale",
-                reference_id=str(order.id),
-                created_by=current_user.id
+        db.add(order)
+        db.flush()  # Get order ID
+        
+        # Turn the cart holds into a sale. Held units only need bookkeeping; units
+        # whose hold expired go through the same guarded decrement, so a concurrent
+        # checkout that got there first is detected instead of driving stock negative.
+        sold = {product_id: quantities[product_id] for product_id in products}
+        changed_product_ids = reservations.convert(db, user_id, sold, now)
+        if changed_product_ids is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stock changed during checkout, please review your cart"
             )
-            db.add(stock_movement)
+        
+        # Create order items and stock movements with one executemany each
+        db.execute(insert(OrderItem.__table__), [
+            {
+                "order_id": order.id,
+                "product_key": cart_item.product_key,
+                "product_name": cart_item.product_name,
+                "product_price": cart_item.product_price,
+                "quantity": cart_item.quantity
+            }
+            for cart_item in cart_items
+        ])
+        
+        movements = [
+            {
+                "product_key": cart_item.product_key,
+                "movement_type": "out",
+                "quantity": cart_item.quantity,
+                "reason": "sale",
+                "reference_id": str(order.id),
+                "created_at": now,
+                "created_by": user_id
+            }
+            for cart_item in cart_items if cart_item.product_id in products
+        ]
+        if movements:
+            db.execute(insert(StockMovement.__table__), movements)
+        
+        # Clear cart
+        db.query(CartItem).filter(CartItem.user_id == user_id).delete()
+        
+        # Build the response before committing: every field is already known, so no
+        # refresh round-trip is needed afterwards
+        return OrderResponse.from_orm(order), changed_product_ids
     
-    # Clear cart
-    db.query(CartItem).filter(CartItem.user_id == current_user.id).delete()
+    response, changed_product_ids = await run_write_async(checkout)
     
-    db.commit()
-    db.refresh(order)
+    await catalog_events.availability_changed_async(changed_product_ids)
     
-    return OrderResponse.from_orm(order)
+    return response
+
+def _cursor_created_at(cursor: str) -> datetime:
+    """created_at of the row a listing cursor points past (datetime.max when unreadable)."""
+    try:
+        return datetime.fromisoformat(decode_position(cursor, 2)[0])
+    except (TypeError, ValueError):
+        return datetime.max
 
 @router.get("/", response_model=OrdersResponse)
-def get_orders(
+async def get_orders(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
     status_filter: Optional[str] = Query(None, alias="status"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    include_total: bool = Query(True),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    # Admin can see all orders, regular users only their own
-    if current_user.role == "admin":
-        query = db.query(Order)
-    else:
-        query = db.query(Order).filter(Order.user_id == current_user.id)
+    if status_filter and status_filter not in ORDER_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid status. Must be one of: {', '.join(ORDER_STATUSES)}"
+        )
     
-    if status_filter:
-        query = query.filter(Order.status == status_filter)
+    def conditions(entity):
+        # Admin can see all orders, regular users only their own
+        where = []
+        if current_user.role != "admin":
+            where.append(entity.user_id == current_user.id)
+        if status_filter:
+            where.append(entity.status == status_filter)
+        return where
     
-    total = query.count()
-    orders = query.order_by(Order.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
+    async def page_of(entity, with_total):
+        return await paginate_async(
+            db, select(entity).where(*conditions(entity)), [entity.created_at, entity.id], entity.id,
+            page=page, per_page=per_page, cursor=cursor,
+            descending=True, include_total=with_total
+        )
+    
+    # Every archived order this listing can see was created at or before the
+    # horizon, so a page that ends after it is the same with the archive. Only
+    # pages that reach back that far (or start from a cursor already there)
+    # read orders UNION the archive; with nothing archived it is never read
+    horizon = await archive.horizon_async(db, None if current_user.role == "admin" else current_user.id)
+    from_archive = horizon is not None and cursor is not None and _cursor_created_at(cursor) <= horizon
+    if not from_archive:
+        orders, total, next_cursor = await page_of(Order, include_total)
+        from_archive = horizon is not None and (next_cursor is None or orders[-1].created_at <= horizon)
+    
+    if from_archive:
+        orders, total, next_cursor = await page_of(archive.all_orders(), include_total)
+    elif horizon is not None and total is not None:
+        if current_user.role == "admin":
+            # Not filtered by user, so the running totals hold the archived count
+            total += await archive.archived_count_async(db, status_filter)
+        else:
+            total += (await db.execute(
+                select(func.count()).select_from(ArchivedOrder).where(*conditions(ArchivedOrder))
+            )).scalar()
+    
+    # Include user data for admin view, loading the page's buyers in one query
+    users = {}
+    if current_user.role == "admin" and orders:
+        users = {
+            order_user.id: order_user
+            for order_user in (await db.execute(
+                select(User).where(User.id.in_({order.user_id for order in orders}))
+            )).scalars()
+        }
     
-    # Include user data for admin view
     orders_data = []
     for order in orders:
         order_dict = OrderResponse.from_orm(order).dict()
         if current_user.role == "admin":
-            order_user = db.query(User).filter(User.id == order.user_id).first()
+            order_user = users.get(order.user_id)
             if order_user:
                 order_dict["user"] = {
                     "id": order_user.id,
@@ -120,17 +213,20 @@ def get_orders(
     return OrdersResponse(
         orders=orders_data,
         total=total,
-        pages=math.ceil(total / per_page),
-        current_page=page
+        pages=math.ceil(total / per_page) if total is not None else None,
+        current_page=page,
+        next_cursor=next_cursor
     )
 
 @router.get("/{order_id}", response_model=OrderWithUserResponse)
-def get_order(
+async def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = await db.get(Order, order_id) or await db.get(ArchivedOrder, order_id)
     
     if not order:
         raise HTTPException(
@@ -145,18 +241,29 @@ def get_order(
             detail="Access denied"
         )
     
-    order_dict = OrderResponse.from_orm(order).dict()
-    
     # Include user data for admin view
+    user_data = None
     if current_user.role == "admin":
-        order_user = db.query(User).filter(User.id == order.user_id).first()
+        order_user = await db.get(User, order.user_id)
         if order_user:
-            order_dict["user"] = {
+            user_data = {
                 "id": order_user.id,
                 "username": order_user.username,
                 "email": order_user.email
             }
     
+    # Order items never change after checkout, so the order row and the embedded
+    # user fully determine the representation
+    etag = make_etag(order.id, order.status, order.total_amount, order.updated_at, user_data)
+    if is_not_modified(request, etag, order.updated_at):
+        return not_modified(etag, order.updated_at)
+    
+    response.headers.update(validator_headers(etag, order.updated_at))
+    
+    order_dict = OrderResponse.from_orm(order).dict()
+    if user_data:
+        order_dict["user"] = user_data
+    
     return order_dict
 
 @router.put("/{order_id}/status")
@@ -166,50 +273,75 @@ def update_order_status(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    order = db.query(Order).filter(Order.id == order_id).first()
-    
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Order not found"
-        )
-    
-    if not order_update.status:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Status is required"
-        )
+    admin_id = current_user.id
     
-    valid_statuses = ["pending", "paid", "processing", "shipped", "delivered", "cancelled"]
-    if order_update.status not in valid_statuses:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}"
-        )
-    
-    old_status = order.status
-    order.status = order_update.status
-    
-    # If order is cancelled, restore stock
-    if order_update.status == "cancelled" and old_status != "cancelled":
-        for item in order.order_items:
-            product = db.query(Product).filter(Product.id == item.product_id).first()
-            if product:
-                product.stock_quantity += item.quantity
-                
-                # Record stock movement
-                stock_movement = StockMovement(
-                    product_id=product.id,
-                    movement_type="in",
-                    quantity=item.quantity,
-                    reason="return",
-                    reference_id=str(order.id),
-                    created_by=current_user.id
+    def change_status(db: Session):
+        order = db.query(Order).filter(Order.id == order_id).first()
+        
+        if not order:
+            if db.get(ArchivedOrder, order_id):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Archived orders cannot be changed"
                 )
-                db.add(stock_movement)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Order not found"
+            )
+        
+        if not order_update.status:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Status is required"
+            )
+        
+        if order_update.status not in ORDER_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid status. Must be one of: {', '.join(ORDER_STATUSES)}"
+            )
+        
+        if order_update.status != "cancelled" or order.status == "cancelled":
+            order.status = order_update.status
+            return {}
+        
+        # Flip the status with a guarded UPDATE so two concurrent cancels cannot
+        # both put the stock back
+        claimed = db.execute(
+            update(Order.__table__)
+            .where(Order.__table__.c.id == order.id, Order.__table__.c.status != "cancelled")
+            .values(status="cancelled", updated_at=datetime.utcnow())
+        ).rowcount
+        if not claimed:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Order was already cancelled"
+            )
+        
+        # Restore stock
+        returned = {}
+        for item in order.order_items:
+            returned[item.product_id] = returned.get(item.product_id, 0) + item.quantity
+        give_stock(db, returned)
+        
+        for item in order.order_items:
+            # Record stock movement
+            stock_movement = StockMovement(
+                product_key=item.product_key,
+                movement_type="in",
+                quantity=item.quantity,
+                reason="return",
+                reference_id=str(order.id),
+                created_by=admin_id
+            )
+            db.add(stock_movement)
+        return returned
     
-    db.commit()
-    db.refresh(order)
+    returned = run_write(db, change_status)
+    order = db.query(Order).filter(Order.id == order_id).first()
+    
+    if returned:
+        catalog_events.availability_changed(db, list(returned))
     
     return {
         "message": "Order status updated successfully",
@@ -218,25 +350,27 @@ def update_order_status(
 
 @router.get("/stats/summary")
 def get_order_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
+    # Archived orders are closed for good, so their running totals are exact
+    archived = archive.archived_totals(db)
+    
     # Order counts by status
     status_counts = {}
-    statuses = ["pending", "paid", "processing", "shipped", "delivered", "cancelled"]
-    
-    for status_name in statuses:
+    for status_name in ORDER_STATUSES:
         count = db.query(Order).filter(Order.status == status_name).count()
-        status_counts[status_name] = count
+        status_counts[status_name] = count + archived.get(status_name, (0, 0))[0]
     
     # Revenue statistics
     paid_statuses = ["paid", "processing", "shipped", "delivered"]
     total_revenue = db.query(Order).filter(Order.status.in_(paid_statuses)).with_entities(
-        db.func.sum(Order.total_amount)
+        func.sum(Order.total_amount)
     ).scalar() or 0
+    total_revenue += sum(amount for status_name, (_, amount) in archived.items() if status_name in paid_statuses)
     
     pending_revenue = db.query(Order).filter(Order.status == "pending").with_entities(
-        db.func.sum(Order.total_amount)
+        func.sum(Order.total_amount)
     ).scalar() or 0
     
     # Recent orders
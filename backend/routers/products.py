@@ -1,52 +1,478 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Optional
+from sqlalchemy import Integer, and_, case, cast, func, or_, select, tuple_
+from typing import List, NamedTuple, Optional
+from datetime import datetime
 import math
 
-from database import get_db
+from database import ReadSessionLocal, get_async_db, get_db
 from models.user import User
-from models.product import Product, StockMovement
-from schemas.product import ProductResponse, ProductsResponse, ProductCreate, ProductUpdate, StockUpdateRequest
-from auth import get_current_user, get_current_admin_user
+from models.product import Product, StockMovement, StockReservation
+from schemas.product import ProductResponse, ProductsResponse, ProductCreate, ProductUpdate, StockUpdateRequest, ProductFacets, PriceBucket, ProductBatchRequest, ProductBatchResponse, ProductLookup, AvailabilityLine, AvailabilityResult, AvailabilityResponse, StockMovementResponse, StockMovementsResponse
+from auth import get_current_user, get_current_admin_user, get_optional_user_id
+from pagination import decode_cursor, encode_cursor, paginate
+from read_routing import get_read_db
+from conditional import is_not_modified, make_etag, validator_headers
+from services import archive, catalog_events, product_search
+from services.fuzzy_search import trigram_index
+from services.suggest import suggest_index
+from services.catalog_snapshot import catalog_snapshot
+from services.product_keys import product_keys
+from services.response_cache import catalog_cache, category_tag, product_tag, CATALOG_TAG, STOCK_TAG, CATALOG_CACHE_NOT_FOUND_TTL
+from services.edge_cache import public_cache_headers, EDGE_CACHE_NOT_FOUND_S_MAXAGE
+from services.inventory import adjust_stock
+from services.write_queue import run_write
 
 router = APIRouter()
 
-@router.get("/", response_model=ProductsResponse)
-def get_products(
-    page: int = Query(1, ge=1),
-    per_page: int = Query(20, ge=1, le=100),
+# Cached marker for product IDs that recently returned 404
+NOT_FOUND = object()
+
+def _filter_products(
+    query,
+    active_only: bool = True,
     category: Optional[str] = None,
-    active_only: bool = Query(True),
-    db: Session = Depends(get_db)
+    q: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: bool = False
 ):
-    query = db.query(Product)
-    
     if active_only:
         query = query.filter(Product.is_active == True)
     
     if category:
         query = query.filter(Product.category == category)
     
-    total = query.count()
-    products = query.offset((page - 1) * per_page).limit(per_page).all()
+    if q:
+        condition = product_search.match_condition(query.session.get_bind(), q)
+        if not active_only:
+            # Inactive products are not in the search index; admins still find them by substring
+            pattern = f"%{q.strip()}%"
+            condition = or_(condition, and_(
+                Product.is_active.isnot(True),
+                or_(Product.name.ilike(pattern), Product.description.ilike(pattern))
+            ))
+        query = query.filter(condition)
+    
+    if min_price is not None:
+        query = query.filter(Product.price >= min_price)
+    
+    if max_price is not None:
+        query = query.filter(Product.price <= max_price)
+    
+    if in_stock:
+        query = query.filter(Product.stock_quantity - Product.reserved_quantity > 0)
+    
+    return query
+
+def _compute_facets(db: Session, category: Optional[str], bucket_size: float, **filters) -> ProductFacets:
+    """Category, price-bucket and stock counts for the current filter in one grouped query.
+
+    The category filter is left out of the query so the category facet still lists
+    the alternatives; the other facets only count rows of the selected category.
+    """
+    bucket = cast(Product.price / bucket_size, Integer)
+    in_stock_flag = case((Product.stock_quantity - Product.reserved_quantity > 0, 1), else_=0)
+    query = db.query(
+        Product.category,
+        bucket,
+        in_stock_flag,
+        func.count(Product.id),
+        func.min(Product.price),
+        func.max(Product.price)
+    )
+    rows = _filter_products(query, **filters).group_by(Product.category, bucket, in_stock_flag).all()
+    
+    categories = {}
+    buckets = {}
+    in_stock_count = out_of_stock_count = 0
+    price_min = price_max = None
+    for row_category, row_bucket, row_in_stock, count, row_min, row_max in rows:
+        if row_category:
+            categories[row_category] = categories.get(row_category, 0) + count
+        if category and row_category != category:
+            continue
+        
+        buckets[row_bucket] = buckets.get(row_bucket, 0) + count
+        if row_in_stock:
+            in_stock_count += count
+        else:
+            out_of_stock_count += count
+        price_min = row_min if price_min is None else min(price_min, row_min)
+        price_max = row_max if price_max is None else max(price_max, row_max)
+    
+    return ProductFacets(
+        categories=dict(sorted(categories.items())),
+        price_buckets=[
+            PriceBucket(min=index * bucket_size, max=(index + 1) * bucket_size, count=buckets[index])
+            for index in sorted(buckets)
+        ],
+        price_min=price_min,
+        price_max=price_max,
+        in_stock=in_stock_count,
+        out_of_stock=out_of_stock_count
+    )
+
+def _list_products(
+    page: int,
+    per_page: int,
+    category: Optional[str],
+    active_only: bool,
+    q: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    sort: Optional[str],
+    in_stock: bool,
+    cursor: Optional[str],
+    include_total: bool,
+    facets: bool,
+    price_bucket_size: float,
+    db: Session
+) -> ProductsResponse:
+    filters = dict(q=q, min_price=min_price, max_price=max_price, in_stock=in_stock)
+    
+    # Public browsing is answered from the in-memory catalog snapshot; a text
+    # query is looked up in the search index and narrows it by product id
+    if active_only:
+        snapshot_filters = dict(
+            min_price=min_price, max_price=max_price, in_stock=in_stock,
+            product_ids=product_search.matching_product_ids(db, q) if q else None
+        )
+        listing = catalog_snapshot.list_products(
+            page, per_page, sort=sort, cursor=cursor,
+            include_total=include_total, category=category, **snapshot_filters
+        )
+        if listing is not None:
+            products, total, next_cursor = listing
+            return ProductsResponse(
+                products=products,
+                total=total,
+                pages=math.ceil(total / per_page) if total is not None else None,
+                current_page=page,
+                next_cursor=next_cursor,
+                facets=catalog_snapshot.facets(category, price_bucket_size, **snapshot_filters) if facets else None
+            )
+    
+    query = _filter_products(db.query(Product), active_only=active_only, category=category, **filters)
+    
+    # Every sort ends with the primary key so pages (and cursors) are stable
+    sort_keys = {
+        "price": ([Product.price, Product.id], False),
+        "price_desc": ([Product.price, Product.id], True),
+        "name": ([Product.name, Product.id], False),
+        "newest": ([Product.created_at, Product.id], True),
+    }
+    key_columns, descending = sort_keys.get(sort, ([Product.id], False))
+    
+    products, total, next_cursor = paginate(
+        query, key_columns, Product.id,
+        page=page, per_page=per_page, cursor=cursor,
+        descending=descending, include_total=include_total
+    )
     
     return ProductsResponse(
         products=[ProductResponse.from_orm(p) for p in products],
         total=total,
-        pages=math.ceil(total / per_page),
-        current_page=page
+        pages=math.ceil(total / per_page) if total is not None else None,
+        current_page=page,
+        next_cursor=next_cursor,
+        facets=_compute_facets(db, category, price_bucket_size, active_only=active_only, **filters) if facets else None
     )
 
-@router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: str, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+class _CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime]
+    headers: dict
+
+def _in_read_session(function, **kwargs):
+    """Run a synchronous builder with a read session of its own (for run_in_threadpool).
+    
+    Cached responses are shared by every caller, so there is no user whose
+    writes they would need to reflect.
+    """
+    db = ReadSessionLocal()
+    try:
+        return function(db=db, **kwargs)
+    finally:
+        db.close()
+
+async def _cached_json(request: Request, key, tags: List[str], build, not_found_detail: Optional[str] = None) -> Response:
+    """Serve a response through the catalog cache as pre-serialized JSON.
+    
+    build() is a coroutine returning (payload, last_modified, result_tags);
+    it is only awaited on a cache miss, so hits never leave the event loop. The body is
+    serialized and hashed into a strong ETag once per cache fill, so revalidations
+    answered with 304 skip both the query and the serialization. `tags`, plus the
+    tags only known from the result, drive the in-process invalidation and, as
+    Surrogate-Key, the edge purges.
+    When not_found_detail is given, a 404 raised by build() is cached briefly too.
+    """
+    generation = catalog_cache.generation
+    cached = catalog_cache.get(key)
+    if cached is None:
+        try:
+            payload, last_modified, result_tags = await build()
+        except HTTPException as exc:
+            if not_found_detail is None or exc.status_code != status.HTTP_404_NOT_FOUND:
+                raise
+            catalog_cache.set(key, NOT_FOUND, tags, generation, ttl=CATALOG_CACHE_NOT_FOUND_TTL)
+            cached = NOT_FOUND
+        else:
+            body = JSONResponse(content=jsonable_encoder(payload)).body
+            etag = make_etag(body)
+            headers = {
+                **validator_headers(etag, last_modified),
+                **public_cache_headers(tags + result_tags)
+            }
+            cached = _CachedBody(body, etag, last_modified, headers)
+            catalog_cache.set(key, cached, tags + result_tags, generation)
+    
+    if cached is NOT_FOUND:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
+            detail=not_found_detail,
+            headers=public_cache_headers(tags, s_maxage=EDGE_CACHE_NOT_FOUND_S_MAXAGE)
         )
-    return ProductResponse.from_orm(product)
+    
+    if is_not_modified(request, cached.etag, cached.last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cached.headers)
+    return Response(content=cached.body, media_type="application/json", headers=cached.headers)
+
+@router.get("/", response_model=ProductsResponse)
+async def get_products(
+    request: Request,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    category: Optional[str] = None,
+    active_only: bool = Query(True),
+    q: Optional[str] = Query(None, min_length=1, max_length=100),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sort: Optional[str] = Query(None, pattern="^(price|price_desc|name|newest)$"),
+    in_stock: bool = Query(False),
+    cursor: Optional[str] = None,
+    include_total: bool = Query(True),
+    facets: bool = Query(False),
+    price_bucket_size: float = Query(50, gt=0)
+):
+    params = dict(
+        page=page, per_page=per_page, category=category, active_only=active_only,
+        q=q.strip() if q else q, min_price=min_price, max_price=max_price, sort=sort,
+        in_stock=in_stock, cursor=cursor, include_total=include_total,
+        facets=facets, price_bucket_size=price_bucket_size
+    )
+    key = ("products",) + tuple(sorted(params.items()))
+    tags = [CATALOG_TAG] + ([category_tag(category)] if category else [])
+    if in_stock or facets:
+        tags.append(STOCK_TAG)
+    
+    async def build():
+        listing = await run_in_threadpool(_in_read_session, _list_products, **params)
+        # Availability changes of a listed product drop the page, not the whole catalog
+        return listing, catalog_snapshot.last_modified(), [product_tag(p.id) for p in listing.products]
+    
+    return await _cached_json(request, key, tags, build)
+
+@router.get("/search")
+def search_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    ranked = product_search.search_product_ids(db, q, limit=per_page, offset=(page - 1) * per_page)
+    matched_by = "fulltext"
+    
+    # Nothing matched word for word: fall back to typo-tolerant trigram matching
+    if not ranked and page == 1:
+        ranked = trigram_index.search(db, q, limit=per_page)
+        matched_by = "fuzzy"
+    
+    products_by_id = {}
+    if ranked:
+        products = db.query(Product).filter(Product.id.in_([product_id for product_id, _ in ranked])).all()
+        products_by_id = {p.id: p for p in products}
+    
+    # Keep the relevance order returned by the index
+    results = [ProductResponse.from_orm(products_by_id[product_id]) for product_id, _ in ranked if product_id in products_by_id]
+    
+    return {
+        "products": results,
+        "query": q,
+        "matched_by": matched_by,
+        "current_page": page,
+        "count": len(results)
+    }
+
+@router.get("/suggest")
+def suggest_products(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20)
+):
+    # Served from the in-memory trie: no database session per keystroke
+    return {
+        "prefix": prefix,
+        "suggestions": suggest_index.suggest(prefix, limit=limit)
+    }
+
+@router.get("/changes")
+def get_product_changes(
+    since: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """Products created, updated or deactivated after the `since` cursor.
+    
+    Ordered by change sequence, which follows commit order, so a change that
+    commits after a page was read always sorts after that page's cursor.
+    Deactivated products come back as tombstones. Without `since` the feed
+    starts from the beginning, which doubles as a full sync; keep following
+    `next_cursor` until `has_more` is false.
+    """
+    query = db.query(Product)
+    
+    if since:
+        position = decode_cursor(since)
+        if not isinstance(position, list) or len(position) != 2 or not isinstance(position[0], int):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query = query.filter(tuple_(Product.change_seq, Product.id) > tuple_(position[0], position[1]))
+    
+    rows = query.order_by(Product.change_seq.asc(), Product.id.asc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    changes = []
+    for product in rows:
+        if product.is_active:
+            changes.append({"type": "upsert", "id": product.id, "updated_at": product.updated_at, "product": ProductResponse.from_orm(product)})
+        else:
+            changes.append({"type": "tombstone", "id": product.id, "updated_at": product.updated_at, "product": None})
+    
+    next_cursor = encode_cursor([rows[-1].change_seq, rows[-1].id]) if rows else since
+    
+    return {
+        "changes": changes,
+        "next_cursor": next_cursor,
+        "has_more": has_more
+    }
+
+MAX_BATCH_IDS = 100
+
+def _lookup_products(db: Session, ids: List[str]) -> ProductBatchResponse:
+    # Keep the caller's order, drop blanks and duplicates
+    ids = list(dict.fromkeys(product_id.strip() for product_id in ids if product_id.strip()))
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_IDS} product IDs per request"
+        )
+    
+    products = {}
+    if ids:
+        products = {p.id: p for p in db.query(Product).filter(Product.id.in_(ids)).all()}
+    
+    results = [
+        ProductLookup(id=product_id, found=True, product=ProductResponse.from_orm(products[product_id]))
+        if product_id in products else ProductLookup(id=product_id, found=False)
+        for product_id in ids
+    ]
+    
+    return ProductBatchResponse(
+        results=results,
+        found=len(products),
+        not_found=[product_id for product_id in ids if product_id not in products]
+    )
+
+@router.get("/batch", response_model=ProductBatchResponse)
+def get_products_batch(
+    ids: str = Query(..., description="Comma-separated product IDs"),
+    db: Session = Depends(get_read_db)
+):
+    return _lookup_products(db, ids.split(","))
+
+@router.post("/batch", response_model=ProductBatchResponse)
+def post_products_batch(batch: ProductBatchRequest, db: Session = Depends(get_read_db)):
+    return _lookup_products(db, batch.ids)
+
+@router.post("/availability", response_model=AvailabilityResponse)
+def check_availability(
+    lines: List[AvailabilityLine],
+    db: Session = Depends(get_db),
+    user_id: Optional[int] = Depends(get_optional_user_id)
+):
+    """Check a whole cart against unreserved stock.
+    
+    Lines for the same product draw from the same stock in order, so a product
+    listed twice is only sellable while the combined quantity is in stock. With a
+    token, the caller's own cart holds count as available to them.
+    """
+    if len(lines) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_IDS} lines per request"
+        )
+    
+    product_ids = list(dict.fromkeys(line.product_id for line in lines))
+    rows = []
+    if product_ids:
+        rows = db.query(
+            Product.id, Product.stock_quantity - Product.reserved_quantity, Product.is_active
+        ).filter(Product.id.in_(product_ids)).all()
+    stock = {product_id: quantity for product_id, quantity, is_active in rows if is_active}
+    inactive = {product_id for product_id, _, is_active in rows if not is_active}
+    
+    if user_id is not None and stock:
+        holds = db.query(Product.id, StockReservation.quantity).join(
+            StockReservation, StockReservation.product_key == Product.key
+        ).filter(
+            StockReservation.user_id == user_id,
+            Product.id.in_(list(stock))
+        ).all()
+        for product_id, quantity in holds:
+            stock[product_id] += quantity
+    
+    results = []
+    for line in lines:
+        remaining = stock.get(line.product_id)
+        if remaining is None:
+            reason = "inactive" if line.product_id in inactive else "not_found"
+            results.append(AvailabilityResult(product_id=line.product_id, requested=line.quantity, max_quantity=0, sellable=False, reason=reason))
+            continue
+        
+        remaining = max(remaining, 0)
+        sellable = remaining >= line.quantity
+        results.append(AvailabilityResult(
+            product_id=line.product_id,
+            requested=line.quantity,
+            max_quantity=remaining,
+            sellable=sellable,
+            reason=None if sellable else "insufficient_stock"
+        ))
+        if sellable:
+            stock[line.product_id] = remaining - line.quantity
+    
+    return AvailabilityResponse(lines=results, all_available=all(result.sellable for result in results))
+
+@router.get("/{product_id}", response_model=ProductResponse)
+async def get_product(product_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def build():
+        product = (await db.execute(select(Product).where(Product.id == product_id))).scalars().first()
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        return ProductResponse.from_orm(product), product.updated_at, [category_tag(product.category)] if product.category else []
+    
+    return await _cached_json(request, ("product", product_id), [product_tag(product_id)], build, not_found_detail="Product not found")
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 def create_product(
@@ -54,32 +480,36 @@ def create_product(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    # Check if product ID already exists
-    existing_product = db.query(Product).filter(Product.id == product.id).first()
-    if existing_product:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Product ID already exists"
-        )
+    user_id = current_user.id
     
-    db_product = Product(**product.dict())
-    db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    def create(db: Session):
+        # Check if product ID already exists
+        existing_product = db.query(Product).filter(Product.id == product.id).first()
+        if existing_product:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Product ID already exists"
+            )
+        
+        db_product = Product(**product.dict())
+        db.add(db_product)
+        product_search.index_product(db, db_product.id)
+        
+        # Record initial stock movement if stock > 0
+        if product.stock_quantity > 0:
+            stock_movement = StockMovement(
+                product_key=db_product.key,
+                movement_type="in",
+                quantity=product.stock_quantity,
+                reason="initial_stock",
+                created_by=user_id
+            )
+            db.add(stock_movement)
     
-    # Record initial stock movement if stock > 0
-    if product.stock_quantity > 0:
-        stock_movement = StockMovement(
-            product_id=db_product.id,
-            movement_type="in",
-            quantity=product.stock_quantity,
-            reason="initial_stock",
-            created_by=current_user.id
-        )
-        db.add(stock_movement)
-        db.commit()
+    run_write(db, create)
+    catalog_events.products_changed(db, [product.id])
     
-    return ProductResponse.from_orm(db_product)
+    return ProductResponse.from_orm(db.query(Product).filter(Product.id == product.id).first())
 
 @router.put("/{product_id}", response_model=ProductResponse)
 def update_product(
@@ -88,21 +518,24 @@ def update_product(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
-        )
-    
-    update_data = product_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(product, field, value)
+    def update(db: Session):
+        product = db.query(Product).filter(Product.id == product_id).first()
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        
+        update_data = product_update.dict(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(product, field, value)
+        
+        product_search.index_product(db, product.id)
     
-    db.commit()
-    db.refresh(product)
+    run_write(db, update)
+    catalog_events.products_changed(db, [product_id])
     
-    return ProductResponse.from_orm(product)
+    return ProductResponse.from_orm(db.query(Product).filter(Product.id == product_id).first())
 
 @router.put("/{product_id}/stock")
 def update_product_stock(
@@ -111,65 +544,109 @@ def update_product_stock(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
-        )
+    user_id = current_user.id
     
-    old_stock = product.stock_quantity
-    product.stock_quantity += stock_update.quantity
-    
-    if product.stock_quantity < 0:
-        product.stock_quantity = 0
+    def adjust(db: Session):
+        row = db.query(Product.key, Product.stock_quantity).filter(Product.id == product_id).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        product_key, old_stock = row
+        
+        # Applied inside the UPDATE, so a checkout running at the same time is not overwritten
+        new_stock = adjust_stock(db, product_id, stock_update.quantity)
+        
+        # Record stock movement
+        movement_type = "in" if stock_update.quantity > 0 else "out"
+        stock_movement = StockMovement(
+            product_key=product_key,
+            movement_type=movement_type,
+            quantity=abs(stock_update.quantity),
+            reason=stock_update.reason,
+            created_by=user_id
+        )
+        
+        db.add(stock_movement)
+        return old_stock, new_stock
     
-    # Record stock movement
-    movement_type = "in" if stock_update.quantity > 0 else "out"
-    stock_movement = StockMovement(
-        product_id=product.id,
-        movement_type=movement_type,
-        quantity=abs(stock_update.quantity),
-        reason=stock_update.reason,
-        created_by=current_user.id
-    )
+    old_stock, new_stock = run_write(db, adjust)
     
-    db.add(stock_movement)
-    db.commit()
-    db.refresh(product)
+    catalog_events.products_changed(db, [product_id])
     
     return {
         "message": "Stock updated successfully",
         "old_stock": old_stock,
-        "new_stock": product.stock_quantity,
+        "new_stock": new_stock,
         "change": stock_update.quantity
     }
 
-@router.get("/categories/list")
-def get_categories(db: Session = Depends(get_db)):
-    categories = db.query(Product.category).filter(
-        Product.category.isnot(None),
-        Product.category != "",
-        Product.is_active == True
-    ).distinct().all()
+@router.get("/{product_id}/stock/movements", response_model=StockMovementsResponse)
+def get_stock_movements(
+    product_id: str,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    product_key = product_keys.key(db, product_id)
+    if product_key is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
     
-    category_list = [cat[0] for cat in categories if cat[0]]
+    # Newest first; the archive is only read for products that have movements there
+    entity = archive.all_stock_movements() if archive.has_archived_movements(db, product_key) else StockMovement
+    movements, total, next_cursor = paginate(
+        db.query(entity).filter(entity.product_key == product_key),
+        [entity.created_at, entity.id], entity.id,
+        page=page, per_page=per_page, cursor=cursor, descending=True
+    )
     
-    return {"categories": sorted(category_list)}
+    usernames = dict(
+        db.query(User.id, User.username).filter(User.id.in_({movement.created_by for movement in movements})).all()
+    )
+    return StockMovementsResponse(
+        movements=[
+            StockMovementResponse(
+                **StockMovementResponse.from_orm(movement).dict(exclude={"created_by_user"}),
+                created_by_user=usernames.get(movement.created_by)
+            )
+            for movement in movements
+        ],
+        total=total,
+        pages=math.ceil(total / per_page),
+        current_page=page,
+        next_cursor=next_cursor
+    )
+
+@router.get("/categories/list")
+async def get_categories(request: Request):
+    async def build():
+        # The first call may load the snapshot from the database
+        categories = await run_in_threadpool(catalog_snapshot.categories)
+        return {"categories": categories}, catalog_snapshot.last_modified(), []
+    
+    return await _cached_json(request, ("categories",), [CATALOG_TAG], build)
 
 @router.get("/low-stock/list")
 def get_low_stock_products(
     threshold: int = Query(10, ge=0),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
+    # Read from the table, not the snapshot: admins restock from this list and
+    # need the stock other workers have just written
     products = db.query(Product).filter(
-        Product.stock_quantity <= threshold,
-        Product.is_active == True
-    ).order_by(Product.stock_quantity.asc()).all()
+        Product.is_active == True,
+        Product.stock_quantity <= threshold
+    ).order_by(Product.stock_quantity.asc(), Product.id.asc()).all()
     
     return {
         "products": [ProductResponse.from_orm(p) for p in products],
         "threshold": threshold,
         "count": len(products)
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class QueueJoinRequest(BaseModel):
+    quantity: int = Field(1, gt=0)
+
+class QueueTicketResponse(BaseModel):
+    ticket: Optional[str] = None
+    product_id: str
+    quantity: int
+    status: str  # waiting, admitted or sold_out
+    position: int = 0
+    retry_after: Optional[int] = None
\ No newline at end of file
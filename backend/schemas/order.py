@@ -36,9 +36,10 @@ class OrderResponse(OrderBase):
 
 class OrdersResponse(BaseModel):
     orders: List[OrderResponse]
-    total: int
-    pages: int
+    total: Optional[int] = None
+    pages: Optional[int] = None
     current_page: int
+    next_cursor: Optional[str] = None
 
 class OrderWithUserResponse(OrderResponse):
     user: Optional[dict] = None
\ No newline at end of file
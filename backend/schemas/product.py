@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Dict, Optional, List
 from datetime import datetime
 
 class ProductBase(BaseModel):
@@ -25,6 +25,8 @@ class ProductUpdate(BaseModel):
 class ProductResponse(ProductBase):
     id: str
     stock_quantity: int
+    # Stock not held in any cart
+    available_quantity: int
     is_active: bool
     created_at: datetime
     updated_at: datetime
@@ -32,11 +34,54 @@ class ProductResponse(ProductBase):
     class Config:
         from_attributes = True
 
+class PriceBucket(BaseModel):
+    min: float
+    max: float
+    count: int
+
+class ProductFacets(BaseModel):
+    categories: Dict[str, int]
+    price_buckets: List[PriceBucket]
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    in_stock: int
+    out_of_stock: int
+
 class ProductsResponse(BaseModel):
     products: List[ProductResponse]
-    total: int
-    pages: int
+    total: Optional[int] = None
+    pages: Optional[int] = None
     current_page: int
+    next_cursor: Optional[str] = None
+    facets: Optional[ProductFacets] = None
+
+class ProductBatchRequest(BaseModel):
+    ids: List[str]
+
+class ProductLookup(BaseModel):
+    id: str
+    found: bool
+    product: Optional[ProductResponse] = None
+
+class ProductBatchResponse(BaseModel):
+    results: List[ProductLookup]
+    found: int
+    not_found: List[str]
+
+class AvailabilityLine(BaseModel):
+    product_id: str
+    quantity: int = Field(..., gt=0)
+
+class AvailabilityResult(BaseModel):
+    product_id: str
+    requested: int
+    max_quantity: int
+    sellable: bool
+    reason: Optional[str] = None  # not_found, inactive, insufficient_stock
+
+class AvailabilityResponse(BaseModel):
+    lines: List[AvailabilityResult]
+    all_available: bool
 
 class StockUpdateRequest(BaseModel):
     quantity: int  # Positive for increase, negative for decrease
@@ -51,6 +96,14 @@ class StockMovementResponse(BaseModel):
     reference_id: Optional[str]
     created_at: datetime
     created_by: Optional[int]
+    created_by_user: Optional[str] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class StockMovementsResponse(BaseModel):
+    movements: List[StockMovementResponse]
+    total: Optional[int] = None
+    pages: Optional[int] = None
+    current_page: int
+    next_cursor: Optional[str] = None
\ No newline at end of file
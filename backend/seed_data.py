@@ -3,6 +3,9 @@ from database import SessionLocal
 from models.user import User
 from models.product import Product, StockMovement
 from auth import get_password_hash
+from services import catalog_events, product_search
+# Subscribes to catalog_events, so seeded products are published as static JSON
+from services import catalog_publisher
 
 def seed_database():
     db = SessionLocal()
@@ -72,17 +75,21 @@ def seed_database():
             }
         ]
         
+        created_ids = []
         for product_data in sample_products:
             existing_product = db.query(Product).filter(Product.id == product_data["id"]).first()
             
             if not existing_product:
                 product = Product(**product_data)
                 db.add(product)
+                db.flush()  # Get product key
+                product_search.index_product(db, product.id)
+                created_ids.append(product.id)
                 
                 # Add initial stock movement
                 if admin and product_data["stock_quantity"] > 0:
                     stock_movement = StockMovement(
-                        product_id=product.id,
+                        product_key=product.key,
                         movement_type="in",
                         quantity=product_data["stock_quantity"],
                         reason="initial_stock",
@@ -95,6 +102,7 @@ def seed_database():
                 print(f"ℹ️ Product already exists: {product_data['name']}")
         
         db.commit()
+        catalog_events.products_changed(db, created_ids)
         print("🎉 Database seeding completed!")
         
     except Exception as e:
@@ -0,0 +1,197 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+from database import SessionLocal
+from models.order import ArchivedOrder, ArchivedOrderItem, ArchivedOrderTotal, Order, OrderItem
+from models.product import ArchivedStockMovement, StockMovement
+from services.write_queue import run_write
+
+logger = logging.getLogger(__name__)
+
+# Delivered or cancelled orders, and stock movements, older than this move to the archive
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+# Seconds between archival runs (0 disables the background job)
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+ARCHIVE_BATCH = int(os.getenv("ARCHIVE_BATCH", "500"))
+
+CLOSED_STATUSES = ("delivered", "cancelled")
+
+_orders, _order_items, _movements = Order.__table__, OrderItem.__table__, StockMovement.__table__
+
+def _copy(source, target, *where):
+    """INSERT INTO target (...) SELECT ... FROM source WHERE ..., column for column."""
+    columns = [column.name for column in source.columns]
+    return insert(target).from_select(columns, select(*[source.c[name] for name in columns]).where(*where))
+
+def _union(model, table, archive_table, name: str):
+    """`model` mapped over table UNION ALL archive_table."""
+    return aliased(model, union_all(
+        select(table),
+        select(*[archive_table.c[column.name] for column in table.columns])
+    ).subquery(name))
+
+# Built on first use: aliasing configures the mappers, which needs every model
+# (User included) to be imported by then
+@lru_cache(maxsize=None)
+def all_orders():
+    """Order over orders UNION ALL orders_archive, for reads that reach archived orders."""
+    return _union(Order, _orders, ArchivedOrder.__table__, "all_orders")
+
+@lru_cache(maxsize=None)
+def all_stock_movements():
+    """StockMovement over stock_movements UNION ALL stock_movements_archive."""
+    return _union(StockMovement, _movements, ArchivedStockMovement.__table__, "all_stock_movements")
+
+def archive_orders(db: Session, now: Optional[datetime] = None, batch_size: int = ARCHIVE_BATCH) -> int:
+    """Move closed orders and their items to the archive, one write-queue unit per batch.
+
+    An order qualifies once it has been delivered or cancelled (updated_at) for
+    ARCHIVE_AFTER_DAYS. Returns the number of orders moved.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=ARCHIVE_AFTER_DAYS)
+    
+    def move_batch(db: Session) -> int:
+        batch = select(_orders.c.id).where(
+            _orders.c.status.in_(CLOSED_STATUSES),
+            _orders.c.updated_at < cutoff
+        ).limit(batch_size)
+        order_ids = db.execute(
+            _copy(_orders, ArchivedOrder.__table__, _orders.c.id.in_(batch)).returning(ArchivedOrder.id)
+        ).scalars().all()
+        if order_ids:
+            _add_totals(db, order_ids)
+            db.execute(_copy(_order_items, ArchivedOrderItem.__table__, _order_items.c.order_id.in_(order_ids)))
+            db.execute(delete(_order_items).where(_order_items.c.order_id.in_(order_ids)))
+            db.execute(delete(_orders).where(_orders.c.id.in_(order_ids)))
+        return len(order_ids)
+    
+    return _in_batches(db, move_batch, batch_size)
+
+def archive_stock_movements(db: Session, now: Optional[datetime] = None, batch_size: int = ARCHIVE_BATCH) -> int:
+    """Move stock movements older than ARCHIVE_AFTER_DAYS to the archive, one write-queue unit per batch."""
+    cutoff = (now or datetime.utcnow()) - timedelta(days=ARCHIVE_AFTER_DAYS)
+    
+    def move_batch(db: Session) -> int:
+        batch = select(_movements.c.id).where(
+            _movements.c.created_at < cutoff
+        ).limit(batch_size)
+        movement_ids = db.execute(
+            _copy(_movements, ArchivedStockMovement.__table__, _movements.c.id.in_(batch)).returning(ArchivedStockMovement.id)
+        ).scalars().all()
+        if movement_ids:
+            db.execute(delete(_movements).where(_movements.c.id.in_(movement_ids)))
+        return len(movement_ids)
+    
+    return _in_batches(db, move_batch, batch_size)
+
+def _in_batches(db: Session, move_batch, batch_size: int) -> int:
+    # Each batch is its own unit, so request writes queue between batches
+    # instead of waiting for the whole backlog to move
+    moved = 0
+    while True:
+        count = run_write(db, move_batch)
+        moved += count
+        if count < batch_size:
+            return moved
+
+def _add_totals(db: Session, order_ids: List[int], sign: int = 1):
+    """Fold archived orders into order_archive_totals (or take them out with sign=-1)."""
+    rows = db.execute(
+        select(ArchivedOrder.status, func.count(), func.sum(ArchivedOrder.total_amount))
+        .where(ArchivedOrder.id.in_(order_ids))
+        .group_by(ArchivedOrder.status)
+    ).all()
+    for order_status, count, amount in rows:
+        updated = db.execute(
+            update(ArchivedOrderTotal)
+            .where(ArchivedOrderTotal.status == order_status)
+            .values(
+                order_count=ArchivedOrderTotal.order_count + sign * count,
+                total_amount=ArchivedOrderTotal.total_amount + sign * (amount or 0)
+            )
+        ).rowcount
+        if not updated:
+            db.add(ArchivedOrderTotal(status=order_status, order_count=sign * count, total_amount=sign * (amount or 0)))
+    db.flush()
+
+def archived_totals(db: Session) -> Dict[str, Tuple[int, float]]:
+    """(order count, total amount) of the archived orders, per status."""
+    return {row.status: (row.order_count, row.total_amount) for row in db.query(ArchivedOrderTotal).all()}
+
+async def archived_count_async(db: AsyncSession, order_status: Optional[str] = None) -> int:
+    """Number of archived orders (of one status), read from order_archive_totals."""
+    statement = select(func.coalesce(func.sum(ArchivedOrderTotal.order_count), 0))
+    if order_status:
+        statement = statement.where(ArchivedOrderTotal.status == order_status)
+    return (await db.execute(statement)).scalar()
+
+async def horizon_async(db: AsyncSession, user_id: Optional[int] = None) -> Optional[datetime]:
+    """created_at of the newest archived order (of a user); every order created later is still in `orders`.
+
+    None means there is nothing archived to read.
+    """
+    statement = select(func.max(ArchivedOrder.created_at))
+    if user_id is not None:
+        statement = statement.where(ArchivedOrder.user_id == user_id)
+    return (await db.execute(statement)).scalar()
+
+def has_archived_movements(db: Session, product_key: int) -> bool:
+    return db.query(
+        select(ArchivedStockMovement.id).where(ArchivedStockMovement.product_key == product_key).exists()
+    ).scalar()
+
+def delete_user_orders(db: Session, user_id: int):
+    """Delete a user's archived orders and items, keeping the totals in step. The caller commits."""
+    order_ids = db.execute(select(ArchivedOrder.id).where(ArchivedOrder.user_id == user_id)).scalars().all()
+    if not order_ids:
+        return
+    _add_totals(db, order_ids, sign=-1)
+    db.execute(delete(ArchivedOrderItem).where(ArchivedOrderItem.order_id.in_(order_ids)))
+    db.execute(delete(ArchivedOrder).where(ArchivedOrder.id.in_(order_ids)))
+
+class Archiver:
+    """Background thread that moves closed orders and old stock movements to the archive."""
+    
+    def __init__(self, interval: float = ARCHIVE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        if self.interval > 0 and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="archiver", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def run_once(self):
+        db = SessionLocal()
+        try:
+            orders = archive_orders(db)
+            movements = archive_stock_movements(db)
+            if orders or movements:
+                logger.info("Archived %d orders and %d stock movements", orders, movements)
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to archive orders and stock movements")
+        finally:
+            db.close()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+archiver = Archiver()
\ No newline at end of file
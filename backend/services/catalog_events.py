@@ -0,0 +1,80 @@
+import logging
+from typing import Callable, Iterable, List, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Listeners are called as listener(db, product_ids) after a product write has been
+# committed, so anything derived from the products table can refresh itself.
+ProductListener = Callable[[Session, List[str]], None]
+
+_listeners: List[Tuple[int, ProductListener]] = []
+# Listeners for writes that only moved stock or reservations (cart holds, checkout),
+# which leave names, prices, categories and search text alone
+_availability_listeners: List[Tuple[int, ProductListener]] = []
+
+def _add(listeners: List[Tuple[int, ProductListener]], listener: ProductListener, priority: int):
+    if all(registered != listener for _, registered in listeners):
+        listeners.append((priority, listener))
+        listeners.sort(key=lambda entry: entry[0])
+    return listener
+
+def subscribe(listener: ProductListener, priority: int = 0):
+    """Register a listener; lower priorities run first.
+
+    Caches of derived data should use a high priority so they are invalidated only
+    after the indexes and snapshots they may be filled from have been refreshed.
+    """
+    return _add(_listeners, listener, priority)
+
+def subscribe_availability(listener: ProductListener, priority: int = 0):
+    """Register a listener for availability changes, ordered like subscribe()."""
+    return _add(_availability_listeners, listener, priority)
+
+def _dispatch(listeners: List[Tuple[int, ProductListener]], db: Session, product_ids: Iterable[str]):
+    product_ids = list(dict.fromkeys(product_ids))
+    if not product_ids:
+        return
+    
+    # The write is already committed: a failing listener leaves its derived data
+    # stale until the next change, but must not fail the request that made the write
+    for _, listener in list(listeners):
+        try:
+            listener(db, product_ids)
+        except Exception:
+            db.rollback()
+            logger.exception("Catalog listener %r failed for products %s", listener, product_ids)
+
+def products_changed(db: Session, product_ids: Iterable[str]):
+    _dispatch(_listeners, db, product_ids)
+
+def availability_changed(db: Session, product_ids: Iterable[str]):
+    """Stock or reservations of these products changed, and nothing else about them."""
+    _dispatch(_availability_listeners, db, product_ids)
+
+async def products_changed_async(product_ids: Iterable[str]):
+    """products_changed() for async routes.
+
+    Listeners are synchronous and may query, so they run in the threadpool with
+    a session of their own.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    if product_ids:
+        await run_in_threadpool(_notify, _listeners, product_ids)
+
+async def availability_changed_async(product_ids: Iterable[str]):
+    """availability_changed() for async routes."""
+    product_ids = list(dict.fromkeys(product_ids))
+    if product_ids:
+        await run_in_threadpool(_notify, _availability_listeners, product_ids)
+
+def _notify(listeners: List[Tuple[int, ProductListener]], product_ids: List[str]):
+    db = SessionLocal()
+    try:
+        _dispatch(listeners, db, product_ids)
+    finally:
+        db.close()
\ No newline at end of file
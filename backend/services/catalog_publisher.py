@@ -0,0 +1,151 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from services import catalog_events
+from services.catalog_snapshot import catalog_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Publishing is enabled by pointing CATALOG_PUBLISH_DIR at a directory served as
+# static assets (e.g. frontend/public/catalog, copied into frontend/dist on build)
+CATALOG_PUBLISH_DIR = os.getenv("CATALOG_PUBLISH_DIR")
+CATALOG_PUBLISH_DELAY = float(os.getenv("CATALOG_PUBLISH_DELAY", "2"))
+# Upper bound on how long a pending change waits while further changes keep arriving
+CATALOG_PUBLISH_MAX_WAIT = float(os.getenv("CATALOG_PUBLISH_MAX_WAIT", "10"))
+CATALOG_PUBLISH_KEEP = int(os.getenv("CATALOG_PUBLISH_KEEP", "3"))
+DEFAULT_PUBLISH_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "public", "catalog")
+
+MANIFEST_NAME = "catalog.json"
+
+def render_catalog() -> bytes:
+    """Active products and categories in the shape of the listing endpoints."""
+    products = catalog_snapshot.products()
+    payload = {
+        "products": jsonable_encoder(products),
+        "categories": catalog_snapshot.categories(),
+        "total": len(products),
+    }
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode()
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(data)
+    os.replace(tmp_path, path)
+
+def publish_catalog(directory: str) -> dict:
+    """Write catalog.<version>.json (+ .gz) and point catalog.json at it.
+
+    The version is a content hash, so the data files can be served with an
+    immutable cache policy; only the small manifest needs revalidation. Unchanged
+    content is not rewritten. Returns the manifest.
+    """
+    os.makedirs(directory, exist_ok=True)
+    body = render_catalog()
+    version = hashlib.sha256(body).hexdigest()[:16]
+    name = f"catalog.{version}.json"
+    path = os.path.join(directory, name)
+    
+    if not os.path.exists(path):
+        _write_atomic(f"{path}.gz", gzip.compress(body, compresslevel=9, mtime=0))
+        _write_atomic(path, body)
+    
+    manifest = {
+        "version": version,
+        "url": name,
+        "gzip_url": f"{name}.gz",
+        "bytes": len(body),
+        "published_at": datetime.now(timezone.utc).isoformat(),
+    }
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    previous = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "rb") as handle:
+            previous = json.loads(handle.read() or b"null")
+    if not previous or previous.get("version") != version:
+        _write_atomic(manifest_path, json.dumps(manifest, indent=2).encode())
+    else:
+        manifest = previous
+    
+    _prune(directory, keep=CATALOG_PUBLISH_KEEP, current=name)
+    return manifest
+
+def _prune(directory: str, keep: int, current: str):
+    # Older versions stay around briefly for clients that fetched the old manifest
+    versions = [
+        entry for entry in os.scandir(directory)
+        if entry.name.startswith("catalog.") and entry.name.endswith(".json") and entry.name != MANIFEST_NAME
+    ]
+    versions.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in versions[keep:]:
+        if entry.name == current:
+            continue
+        for suffix in ("", ".gz"):
+            try:
+                os.remove(entry.path + suffix)
+            except FileNotFoundError:
+                pass
+
+class CatalogPublisher:
+    """Republishes the static catalog shortly after products change.
+
+    Bursts of writes (e.g. a run of checkouts) are coalesced into a single publish
+    CATALOG_PUBLISH_DELAY seconds after the last change, but no later than
+    CATALOG_PUBLISH_MAX_WAIT seconds after the first unpublished one, so a steady
+    stream of writes cannot hold the static catalog back forever.
+    """
+    
+    def __init__(
+        self,
+        directory: Optional[str],
+        delay: float = CATALOG_PUBLISH_DELAY,
+        max_wait: float = CATALOG_PUBLISH_MAX_WAIT
+    ):
+        self.directory = directory
+        self.delay = delay
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._pending_since: Optional[float] = None
+    
+    def schedule(self, db: Session = None, product_ids: List[str] = None):
+        if not self.directory:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+            if self._pending_since is None:
+                self._pending_since = now
+            deadline = self._pending_since + self.max_wait
+            self._timer = threading.Timer(max(0.0, min(self.delay, deadline - now)), self._publish)
+            self._timer.start()
+    
+    def _publish(self):
+        with self._lock:
+            self._timer = None
+            self._pending_since = None
+        try:
+            manifest = publish_catalog(self.directory)
+            logger.info("Published catalog version %s", manifest["version"])
+        except Exception:
+            logger.exception("Failed to publish static catalog")
+
+catalog_publisher = CatalogPublisher(CATALOG_PUBLISH_DIR)
+catalog_events.subscribe(catalog_publisher.schedule, priority=300)
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else (CATALOG_PUBLISH_DIR or DEFAULT_PUBLISH_DIR)
+    manifest = publish_catalog(os.path.abspath(target))
+    print(f"✅ Published catalog {manifest['version']} ({manifest['bytes']} bytes) to {os.path.abspath(target)}")
@@ -0,0 +1,378 @@
+import copy
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from database import ReadSessionLocal
+from models.product import Product
+from pagination import decode_cursor, encode_cursor
+from schemas.product import PriceBucket, ProductFacets, ProductResponse
+from services import catalog_events
+
+# Seconds between checks that the snapshot still matches the products table, which
+# catches writes made by other workers (0 disables the check)
+CATALOG_SNAPSHOT_CHECK_SECONDS = float(os.getenv("CATALOG_SNAPSHOT_CHECK_SECONDS", "5"))
+
+# Same orderings as the SQL listing: key columns always end with the id
+SORT_KEYS = {
+    None: (lambda p: (p.id,), False),
+    "price": (lambda p: (p.price, p.id), False),
+    "price_desc": (lambda p: (p.price, p.id), True),
+    "name": (lambda p: (p.name, p.id), False),
+    "newest": (lambda p: (p.created_at, p.id), True),
+}
+
+class _Columns:
+    """Immutable column store for one version of the active catalog.
+    
+    Rows keep the prebuilt ProductResponse, so serving a page never hydrates ORM
+    objects. Every sort order is precomputed for the whole catalog and per
+    category, along with per-category counts, so a page walks its sort order
+    only up to the rows it shows; the other filters are checked on the way.
+    """
+    
+    def __init__(self, products: List[ProductResponse], last_modified: Optional[datetime] = None):
+        # Latest updated_at across all products, including inactive ones
+        self.last_modified = last_modified
+        self.rows = sorted(products, key=lambda p: p.id)
+        self.position = {p.id: i for i, p in enumerate(self.rows)}
+        self.price = array("d", (p.price for p in self.rows))
+        # Available (unreserved) stock, which is what in_stock filters on
+        self.stock = array("q", (p.available_quantity for p in self.rows))
+        
+        self.categories = sorted({p.category for p in self.rows if p.category})
+        codes = {name: code for code, name in enumerate(self.categories)}
+        self.category_code = array("i", (codes.get(p.category, -1) for p in self.rows))
+        self.category_codes = codes
+        
+        # Row indices ordered by price, for range filters via bisect, overall and per category
+        self.by_price = sorted(range(len(self.rows)), key=lambda i: (self.price[i], i))
+        self.sorted_prices = array("d", (self.price[i] for i in self.by_price))
+        self.members = self._split(self.by_price)
+        self.member_prices = [array("d", (self.price[i] for i in rows)) for rows in self.members]
+        
+        # Rows with available stock, overall and per category; with_stock keeps them current
+        self.in_stock_total = sum(1 for stock in self.stock if stock > 0)
+        self.in_stock_counts = array("q", [0]) * len(self.categories)
+        for i, stock in enumerate(self.stock):
+            if stock > 0 and self.category_code[i] >= 0:
+                self.in_stock_counts[self.category_code[i]] += 1
+        
+        self.orders: Dict[Optional[str], List[int]] = {}
+        self.category_orders: Dict[Optional[str], List[List[int]]] = {}
+        self.ranks: Dict[Optional[str], array] = {}
+        for sort, (key, descending) in SORT_KEYS.items():
+            order = sorted(range(len(self.rows)), key=lambda i: key(self.rows[i]), reverse=descending)
+            rank = array("i", [0]) * len(order)
+            for position, i in enumerate(order):
+                rank[i] = position
+            self.orders[sort] = order
+            self.category_orders[sort] = self._split(order)
+            self.ranks[sort] = rank
+    
+    def _split(self, order: List[int]) -> List[List[int]]:
+        """`order` cut into one list per category code, keeping the order within each."""
+        lists: List[List[int]] = [[] for _ in self.categories]
+        for i in order:
+            if self.category_code[i] >= 0:
+                lists[self.category_code[i]].append(i)
+        return lists
+    
+    def with_stock(self, changes: Dict[str, Tuple[int, int, datetime]]) -> "_Columns":
+        """Copy with new (stock, available, updated_at) for some rows.
+        
+        No sort order depends on stock, so everything but the affected rows, the
+        stock column and the in-stock counts is shared with this version.
+        """
+        columns = copy.copy(self)
+        columns.rows = list(self.rows)
+        columns.stock = array("q", self.stock)
+        columns.in_stock_counts = array("q", self.in_stock_counts)
+        for product_id, (stock_quantity, available_quantity, updated_at) in changes.items():
+            i = self.position.get(product_id)
+            if i is not None:
+                columns.rows[i] = self.rows[i].copy(update={
+                    "stock_quantity": stock_quantity,
+                    "available_quantity": available_quantity,
+                    "updated_at": updated_at
+                })
+                change = (available_quantity > 0) - (columns.stock[i] > 0)
+                columns.in_stock_total += change
+                if self.category_code[i] >= 0:
+                    columns.in_stock_counts[self.category_code[i]] += change
+                columns.stock[i] = available_quantity
+            if updated_at and (columns.last_modified is None or updated_at > columns.last_modified):
+                columns.last_modified = updated_at
+        return columns
+    
+    def rows_of(self, product_ids: Iterable[str]) -> List[int]:
+        """Row indices of those products that are in this version."""
+        return [self.position[product_id] for product_id in product_ids if product_id in self.position]
+    
+    def candidates(
+        self,
+        sort: Optional[str] = None,
+        category: Optional[str] = None,
+        rows: Optional[List[int]] = None
+    ) -> List[int]:
+        """Rows of the category (all rows without one) in `sort` order, out of `rows` when given."""
+        code = self.category_codes.get(category, -1) if category else None
+        if rows is not None:
+            return sorted(
+                (i for i in rows if code is None or self.category_code[i] == code),
+                key=self.ranks[sort].__getitem__
+            )
+        if code is None:
+            return self.orders[sort]
+        return self.category_orders[sort][code] if code >= 0 else []
+    
+    def matcher(
+        self,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = False
+    ) -> Optional[Callable[[int], bool]]:
+        """Row test for the price and stock filters, like _filter_products; None when there are none."""
+        checks = []
+        if min_price is not None:
+            checks.append(lambda i: self.price[i] >= min_price)
+        if max_price is not None:
+            checks.append(lambda i: self.price[i] <= max_price)
+        if in_stock:
+            checks.append(lambda i: self.stock[i] > 0)
+        if not checks:
+            return None
+        return lambda i: all(check(i) for check in checks)
+    
+    def count(
+        self,
+        category: Optional[str] = None,
+        rows: Optional[List[int]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = False
+    ) -> int:
+        """Number of rows (out of `rows` when given) passing the filters, from the precomputed counts where possible."""
+        code = self.category_codes.get(category, -1) if category else None
+        if code == -1:
+            return 0
+        if rows is not None:
+            matches = self.matcher(min_price=min_price, max_price=max_price, in_stock=in_stock)
+            return sum(
+                1 for i in rows
+                if (code is None or self.category_code[i] == code) and (matches is None or matches(i))
+            )
+        
+        prices = self.member_prices[code] if code is not None else self.sorted_prices
+        lo = bisect_left(prices, min_price) if min_price is not None else 0
+        hi = bisect_right(prices, max_price) if max_price is not None else len(prices)
+        if not in_stock:
+            return max(hi - lo, 0)
+        if min_price is None and max_price is None:
+            return self.in_stock_counts[code] if code is not None else self.in_stock_total
+        
+        # Only the rows in the price range are left to check
+        in_range = (self.members[code] if code is not None else self.by_price)[lo:hi]
+        return sum(1 for i in in_range if self.stock[i] > 0)
+
+class CatalogSnapshot:
+    """Read-optimized, in-process copy of the active catalog.
+    
+    Loaded once from the products table and patched through catalog_events after
+    every committed product write, so public browse reads (listing, categories,
+    facets) are answered without touching the database. Readers grab
+    the current _Columns reference; writers build a new one and swap it in.
+    
+    Writes made by other processes never reach refresh(), so every
+    CATALOG_SNAPSHOT_CHECK_SECONDS a read compares the table's highest
+    change_seq with the one seen at load time and reloads on a mismatch.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._columns: Optional[_Columns] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+    
+    def _current(self) -> _Columns:
+        columns = self._columns
+        now = time.monotonic()
+        due = CATALOG_SNAPSHOT_CHECK_SECONDS > 0 and now - self._checked_at >= CATALOG_SNAPSHOT_CHECK_SECONDS
+        if columns is None or due:
+            self._checked_at = now
+            db = ReadSessionLocal()
+            try:
+                if columns is None or self._read_version(db) != self._version:
+                    self.load(db)
+            finally:
+                db.close()
+            columns = self._columns
+        return columns
+    
+    @staticmethod
+    def _read_version(db: Session) -> Optional[int]:
+        # Every product write takes a new change_seq (models/product.py), so the
+        # highest one moves on any change; a single seek on ix_products_change_seq_id
+        return db.execute(select(func.max(Product.change_seq))).scalar()
+    
+    def load(self, db: Session):
+        # Read before the rows: a write landing in between makes the next check reload again
+        version = self._read_version(db)
+        last_modified = db.execute(select(func.max(Product.updated_at))).scalar()
+        products = db.query(Product).filter(Product.is_active == True).all()
+        columns = _Columns([ProductResponse.from_orm(p) for p in products], last_modified)
+        with self._lock:
+            self._columns = columns
+            self._version = version
+    
+    def refresh(self, db: Session, product_ids: List[str]):
+        with self._lock:
+            if self._columns is None:
+                return
+            rows = {p.id: p for p in self._columns.rows}
+            last_modified = self._columns.last_modified
+            for product_id in product_ids:
+                rows.pop(product_id, None)
+            for product in db.query(Product).filter(Product.id.in_(product_ids)).all():
+                if product.is_active:
+                    rows[product.id] = ProductResponse.from_orm(product)
+                if product.updated_at and (last_modified is None or product.updated_at > last_modified):
+                    last_modified = product.updated_at
+            self._columns = _Columns(list(rows.values()), last_modified)
+    
+    def refresh_availability(self, db: Session, product_ids: List[str]):
+        """Patch only the stock figures, for writes that changed nothing else."""
+        with self._lock:
+            if self._columns is None:
+                return
+            rows = db.query(Product.id, Product.stock_quantity, Product.reserved_quantity, Product.updated_at).filter(
+                Product.id.in_(product_ids)
+            ).all()
+            self._columns = self._columns.with_stock({
+                product_id: (stock_quantity, max(stock_quantity - (reserved_quantity or 0), 0), updated_at)
+                for product_id, stock_quantity, reserved_quantity, updated_at in rows
+            })
+    
+    def list_products(
+        self,
+        page: int,
+        per_page: int,
+        sort: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        category: Optional[str] = None,
+        product_ids: Optional[Iterable[str]] = None,
+        **filters
+    ) -> Optional[Tuple[List[ProductResponse], Optional[int], Optional[str]]]:
+        """Same contract as pagination.paginate over the active catalog.
+        
+        `product_ids` limits the listing to those products (the matches of a text
+        search). Returns None when the cursor points at a product that is no
+        longer in the snapshot, so the caller can fall back to SQL, which seeks
+        on the key values the cursor carries.
+        """
+        columns = self._current()
+        rows = columns.rows_of(product_ids) if product_ids is not None else None
+        order = columns.candidates(sort, category, rows)
+        matches = columns.matcher(**filters)
+        rank = columns.ranks[sort]
+        
+        start = 0
+        if cursor:
+            reference = columns.position.get(decode_cursor(cursor))
+            if reference is None:
+                return None
+            start = bisect_right(order, rank[reference], key=rank.__getitem__)
+        
+        # Walk the sort order only as far as this page (and one row past it) reaches
+        wanted = per_page + 1 + (0 if cursor else (page - 1) * per_page)
+        walk = (order[position] for position in range(start, len(order)))
+        matched = list(islice(walk if matches is None else filter(matches, walk), wanted))
+        if not cursor:
+            matched = matched[(page - 1) * per_page:]
+        page_rows = matched[:per_page + 1]
+        
+        next_cursor = None
+        if len(page_rows) > per_page:
+            page_rows = page_rows[:per_page]
+            # Same key values as the SQL listing puts in its cursors. A naive datetime
+            # prints like the CURRENT_TIMESTAMP text products.created_at holds.
+            key, _ = SORT_KEYS[sort]
+            last = columns.rows[page_rows[-1]]
+            next_cursor = encode_cursor(last.id, [str(value) if isinstance(value, datetime) else value for value in key(last)[:-1]])
+        
+        total = columns.count(category, rows, **filters) if include_total else None
+        return [columns.rows[i] for i in page_rows], total, next_cursor
+    
+    def facets(
+        self,
+        category: Optional[str],
+        bucket_size: float,
+        product_ids: Optional[Iterable[str]] = None,
+        **filters
+    ) -> ProductFacets:
+        """In-memory twin of the grouped facet query in routers/products.py."""
+        columns = self._current()
+        rows = columns.rows_of(product_ids) if product_ids is not None else None
+        matches = columns.matcher(**filters)
+        
+        # Category counts ignore the category filter; unfiltered they are the list sizes
+        if rows is None and matches is None:
+            categories = {name: len(members) for name, members in zip(columns.categories, columns.members) if members}
+        else:
+            counts: Dict[int, int] = {}
+            for i in (rows if rows is not None else columns.by_price):
+                code = columns.category_code[i]
+                if code >= 0 and (matches is None or matches(i)):
+                    counts[code] = counts.get(code, 0) + 1
+            categories = {columns.categories[code]: count for code, count in counts.items()}
+        
+        # The other facets only count rows of the selected category
+        buckets: Dict[int, int] = {}
+        in_stock_count = out_of_stock_count = 0
+        price_min = price_max = None
+        for i in columns.candidates(None, category, rows):
+            if matches is not None and not matches(i):
+                continue
+            price = columns.price[i]
+            bucket = int(price / bucket_size)
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+            if columns.stock[i] > 0:
+                in_stock_count += 1
+            else:
+                out_of_stock_count += 1
+            price_min = price if price_min is None else min(price_min, price)
+            price_max = price if price_max is None else max(price_max, price)
+        
+        return ProductFacets(
+            categories=dict(sorted(categories.items())),
+            price_buckets=[
+                PriceBucket(min=index * bucket_size, max=(index + 1) * bucket_size, count=buckets[index])
+                for index in sorted(buckets)
+            ],
+            price_min=price_min,
+            price_max=price_max,
+            in_stock=in_stock_count,
+            out_of_stock=out_of_stock_count
+        )
+    
+    def last_modified(self) -> Optional[datetime]:
+        return self._current().last_modified
+    
+    def products(self) -> List[ProductResponse]:
+        return list(self._current().rows)
+    
+    def categories(self) -> List[str]:
+        return list(self._current().categories)
+
+catalog_snapshot = CatalogSnapshot()
+catalog_events.subscribe(catalog_snapshot.refresh)
+catalog_events.subscribe_availability(catalog_snapshot.refresh_availability)
@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from models.product import Product
+from services import catalog_events
+from services.response_cache import CATALOG_TAG, STOCK_TAG, category_tag, product_tag
+
+logger = logging.getLogger(__name__)
+
+EDGE_CACHE_S_MAXAGE = int(os.getenv("EDGE_CACHE_S_MAXAGE", "60"))
+EDGE_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("EDGE_CACHE_STALE_WHILE_REVALIDATE", "300"))
+EDGE_CACHE_NOT_FOUND_S_MAXAGE = int(os.getenv("EDGE_CACHE_NOT_FOUND_S_MAXAGE", "10"))
+EDGE_PURGE_URL = os.getenv("EDGE_PURGE_URL")
+EDGE_PURGE_TOKEN = os.getenv("EDGE_PURGE_TOKEN")
+
+def public_cache_headers(surrogate_keys: Iterable[str], s_maxage: int = EDGE_CACHE_S_MAXAGE) -> dict:
+    """Headers that let a shared cache serve a public response.
+    
+    Browsers always revalidate (max-age=0, using the ETag); shared caches keep the
+    response for s-maxage seconds and may serve it stale while refetching.
+    """
+    return {
+        "Cache-Control": f"public, max-age=0, s-maxage={s_maxage}, stale-while-revalidate={EDGE_CACHE_STALE_WHILE_REVALIDATE}",
+        "Surrogate-Key": " ".join(dict.fromkeys(surrogate_keys)),
+    }
+
+class NullPurger:
+    """Default purge backend: shared caches simply expire after s-maxage."""
+    
+    def purge(self, keys: List[str]):
+        logger.debug("Edge purge skipped (no backend configured): %s", keys)
+
+class HttpPurger:
+    """POST the surrogate keys to a purge endpoint, e.g. a CDN or purge relay.
+    
+    purge() only queues the keys; a background thread sends them, folding
+    whatever queued up meanwhile into one request, so a write never waits on
+    the purge endpoint.
+    """
+    
+    def __init__(self, url: str, token: Optional[str] = None, timeout: float = 2.0):
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+        self._queue: "queue.Queue[List[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+    
+    def purge(self, keys: List[str]):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="edge-purger", daemon=True)
+                self._thread.start()
+        self._queue.put(list(keys))
+    
+    def _run(self):
+        while True:
+            keys = self._queue.get()
+            while True:
+                try:
+                    keys += self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._send(list(dict.fromkeys(keys)))
+    
+    def _send(self, keys: List[str]):
+        headers = {"Content-Type": "application/json", "Surrogate-Key": " ".join(keys)}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"surrogate_keys": keys}).encode(),
+            headers=headers,
+            method="POST"
+        )
+        try:
+            urllib.request.urlopen(request, timeout=self.timeout).close()
+        except OSError as exc:
+            # A failed purge only delays freshness until s-maxage runs out
+            logger.warning("Edge purge failed for %s: %s", keys, exc)
+
+class LocalEdgeCache:
+    """In-process stand-in for the edge cache, used in development and tests.
+    
+    Stores anonymous GET responses that carry s-maxage, replays them until they
+    expire or one of their Surrogate-Key tags is purged, and doubles as the purge
+    backend. LocalEdgeProxy puts it in front of the ASGI app.
+    """
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, int, list, bytes, Set[str]]] = {}
+    
+    def lookup(self, key: str) -> Optional[Tuple[int, list, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1], entry[2], entry[3]
+    
+    def store(self, key: str, status_code: int, headers: list, body: bytes):
+        values = dict((name.lower(), value) for name, value in headers)
+        s_maxage = None
+        for directive in values.get(b"cache-control", b"").decode().split(","):
+            name, _, value = directive.strip().partition("=")
+            if name == "s-maxage" and value.isdigit():
+                s_maxage = int(value)
+        if status_code not in (200, 404) or not s_maxage:
+            return
+        
+        keys = set(values.get(b"surrogate-key", b"").decode().split())
+        with self._lock:
+            self._entries[key] = (time.monotonic() + s_maxage, status_code, list(headers), body, keys)
+    
+    def purge(self, keys: List[str]):
+        keys = set(keys)
+        with self._lock:
+            for url in [url for url, entry in self._entries.items() if entry[4] & keys]:
+                del self._entries[url]
+
+class LocalEdgeProxy:
+    """ASGI middleware that serves public GETs through a LocalEdgeCache."""
+    
+    def __init__(self, app, cache: LocalEdgeCache):
+        self.app = app
+        self.cache = cache
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or self._has_credentials(scope):
+            await self.app(scope, receive, send)
+            return
+        
+        key = scope["path"] + "?" + scope.get("query_string", b"").decode()
+        cached = self.cache.lookup(key)
+        if cached is not None:
+            status_code, headers, body = cached
+            await send({"type": "http.response.start", "status": status_code, "headers": headers + [(b"x-cache", b"HIT")]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        
+        started = {}
+        chunks = []
+        
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                started.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body"):
+                    self.cache.store(key, started.get("status"), started.get("headers", []), b"".join(chunks))
+            await send(message)
+        
+        await self.app(scope, receive, capture)
+    
+    @staticmethod
+    def _has_credentials(scope) -> bool:
+        return any(name == b"authorization" for name, _ in scope.get("headers", []))
+
+_purger = HttpPurger(EDGE_PURGE_URL, EDGE_PURGE_TOKEN) if EDGE_PURGE_URL else NullPurger()
+
+def set_purger(purger):
+    """Plug in the purge backend (anything with a purge(keys) method)."""
+    global _purger
+    _purger = purger
+
+def get_purger():
+    return _purger
+
+def _purge_products(db: Session, product_ids: List[str]):
+    categories = db.query(Product.category).filter(Product.id.in_(product_ids)).distinct().all()
+    keys = [CATALOG_TAG] + [product_tag(product_id) for product_id in product_ids]
+    keys += [category_tag(category) for (category,) in categories if category]
+    _purger.purge(keys)
+
+def _purge_availability(db: Session, product_ids: List[str]):
+    _purger.purge([STOCK_TAG] + [product_tag(product_id) for product_id in product_ids])
+
+# Runs after the in-process cache was cleared, so the edge refetches fresh data
+catalog_events.subscribe(_purge_products, priority=200)
+catalog_events.subscribe_availability(_purge_availability, priority=200)
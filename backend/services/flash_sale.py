@@ -0,0 +1,234 @@
+import itertools
+import math
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from models.product import Product
+from services import catalog_events
+
+FLASH_SALE_SKUS = os.getenv("FLASH_SALE_SKUS", "")
+# Buyers let through per second and product, i.e. the write rate the database sustains
+FLASH_SALE_ADMIT_RATE = float(os.getenv("FLASH_SALE_ADMIT_RATE", "5"))
+FLASH_SALE_BURST = int(os.getenv("FLASH_SALE_BURST", "5"))
+# How long an admitted buyer has to add the product to their cart
+FLASH_SALE_ADMIT_WINDOW = float(os.getenv("FLASH_SALE_ADMIT_WINDOW", "120"))
+# Waiting tickets that are not polled for this long give up their place
+FLASH_SALE_WAIT_TIMEOUT = float(os.getenv("FLASH_SALE_WAIT_TIMEOUT", "60"))
+FLASH_SALE_MAX_QUANTITY = int(os.getenv("FLASH_SALE_MAX_QUANTITY", "2"))
+
+WAITING = "waiting"
+ADMITTED = "admitted"
+SOLD_OUT = "sold_out"
+USED = "used"
+EXPIRED = "expired"
+
+class Ticket:
+    __slots__ = ("id", "seq", "user_id", "product_id", "quantity", "status", "last_seen", "admitted_until")
+    
+    def __init__(self, seq: int, user_id: int, product_id: str, quantity: int, now: float):
+        self.id = secrets.token_urlsafe(16)
+        self.seq = seq
+        self.user_id = user_id
+        self.product_id = product_id
+        self.quantity = quantity
+        self.status = WAITING
+        self.last_seen = now
+        self.admitted_until: Optional[float] = None
+
+class _Queue:
+    """Waiting room for one product: a FIFO of tickets drained by a token bucket."""
+    
+    def __init__(self, product_id: str, available: int, now: float):
+        self.product_id = product_id
+        # Unreserved stock as last seen in the database
+        self.available = available
+        # Units promised to waiting and admitted tickets, not yet held in a cart
+        self.allocated = 0
+        self.tokens = float(FLASH_SALE_BURST)
+        self.refilled_at = now
+        self.waiting: Deque[Ticket] = deque()
+        self.admitted: Dict[str, Ticket] = {}
+        self.by_user: Dict[int, Ticket] = {}
+        # Tickets are numbered per product, so positions count buyers of this product only
+        self.seq = itertools.count(1)
+        self.admitted_seq = 0
+        self.issued = self.admitted_total = self.sold_out = self.expired = 0
+
+class FlashSaleController:
+    """Admission control for hot products during a promotion.
+
+    Buyers of a configured product take a ticket before adding it to their cart.
+    Tickets are admitted in arrival order at FLASH_SALE_ADMIT_RATE per second,
+    and only while the units promised to tickets fit in the unreserved stock, so
+    once the stock is allocated every new buyer is told it is sold out at once
+    instead of queueing for the database. State is per process, like the other
+    in-memory services.
+    """
+
+    def __init__(self, product_ids: Optional[List[str]] = None):
+        self._lock = threading.Lock()
+        self._products: Set[str] = set(product_ids or [])
+        self._queues: Dict[str, _Queue] = {}
+        self._tickets: Dict[str, Ticket] = {}
+    
+    def is_hot(self, product_id: str) -> bool:
+        return product_id in self._products
+    
+    def enable(self, product_id: str):
+        with self._lock:
+            self._products.add(product_id)
+    
+    def disable(self, product_id: str):
+        with self._lock:
+            self._products.discard(product_id)
+            queue = self._queues.pop(product_id, None)
+            if queue is not None:
+                for ticket in list(queue.waiting) + list(queue.admitted.values()):
+                    self._tickets.pop(ticket.id, None)
+    
+    def join(self, db: Session, user_id: int, product_id: str, quantity: int) -> Ticket:
+        """Take a ticket (or get the one the user already holds)."""
+        now = time.monotonic()
+        with self._lock:
+            queue = self._queue(db, product_id, now)
+            self._advance(queue, now)
+            
+            ticket = queue.by_user.get(user_id)
+            if ticket is not None and ticket.status in (WAITING, ADMITTED):
+                ticket.last_seen = now
+                return ticket
+            
+            ticket = Ticket(next(queue.seq), user_id, product_id, min(quantity, FLASH_SALE_MAX_QUANTITY), now)
+            queue.issued += 1
+            if queue.allocated + ticket.quantity > queue.available:
+                # Everything left is already promised to buyers ahead in line
+                ticket.status = SOLD_OUT
+                queue.sold_out += 1
+            else:
+                queue.allocated += ticket.quantity
+                queue.waiting.append(ticket)
+                queue.by_user[user_id] = ticket
+                self._tickets[ticket.id] = ticket
+                self._advance(queue, now)
+            return ticket
+    
+    def poll(self, ticket_id: str, user_id: int) -> Optional[Ticket]:
+        now = time.monotonic()
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            if ticket is None or ticket.user_id != user_id:
+                return None
+            queue = self._queues.get(ticket.product_id)
+            if queue is not None:
+                ticket.last_seen = now
+                self._advance(queue, now)
+            return ticket
+    
+    def check_admitted(self, ticket_id: Optional[str], user_id: int, product_id: str, quantity: int) -> Optional[Ticket]:
+        """The user's ticket if it lets them add `quantity` of the product to their cart now."""
+        ticket = self.poll(ticket_id, user_id) if ticket_id else None
+        if ticket is None or ticket.product_id != product_id or ticket.status != ADMITTED or quantity > ticket.quantity:
+            return None
+        return ticket
+    
+    def complete(self, ticket: Ticket):
+        """The admitted buyer now holds the units in their cart; their place is done."""
+        with self._lock:
+            queue = self._queues.get(ticket.product_id)
+            if queue is not None and ticket.status == ADMITTED:
+                ticket.status = USED
+                self._release(queue, ticket)
+    
+    def position(self, ticket: Ticket) -> int:
+        """Approximate number of buyers ahead of a waiting ticket."""
+        queue = self._queues.get(ticket.product_id)
+        if queue is None or ticket.status != WAITING:
+            return 0
+        return max(ticket.seq - queue.admitted_seq - 1, 0)
+    
+    def retry_after(self, ticket: Ticket) -> int:
+        return max(1, math.ceil((self.position(ticket) + 1) / FLASH_SALE_ADMIT_RATE))
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                product_id: {
+                    "available": queue.available,
+                    "allocated": queue.allocated,
+                    "waiting": len(queue.waiting),
+                    "admitted": len(queue.admitted),
+                    "issued": queue.issued,
+                    "admitted_total": queue.admitted_total,
+                    "sold_out": queue.sold_out,
+                    "expired": queue.expired
+                }
+                for product_id, queue in self._queues.items()
+            }
+    
+    def refresh(self, db: Session, product_ids: List[str]):
+        """catalog_events listener: track the unreserved stock of hot products."""
+        product_ids = [product_id for product_id in product_ids if product_id in self._queues]
+        if not product_ids:
+            return
+        rows = db.query(Product.id, Product.stock_quantity - Product.reserved_quantity).filter(
+            Product.id.in_(product_ids)
+        ).all()
+        with self._lock:
+            for product_id, available in rows:
+                queue = self._queues.get(product_id)
+                if queue is not None:
+                    queue.available = max(available, 0)
+    
+    def _queue(self, db: Session, product_id: str, now: float) -> _Queue:
+        queue = self._queues.get(product_id)
+        if queue is None:
+            available = db.query(Product.stock_quantity - Product.reserved_quantity).filter(
+                Product.id == product_id,
+                Product.is_active == True
+            ).scalar()
+            queue = self._queues[product_id] = _Queue(product_id, max(available or 0, 0), now)
+        return queue
+    
+    def _advance(self, queue: _Queue, now: float):
+        """Expire stale tickets and admit waiting ones as the bucket refills."""
+        for ticket in [t for t in queue.admitted.values() if t.admitted_until <= now]:
+            ticket.status = EXPIRED
+            queue.expired += 1
+            self._release(queue, ticket)
+        
+        queue.tokens = min(queue.tokens + (now - queue.refilled_at) * FLASH_SALE_ADMIT_RATE, float(FLASH_SALE_BURST))
+        queue.refilled_at = now
+        while queue.waiting:
+            ticket = queue.waiting[0]
+            if now - ticket.last_seen > FLASH_SALE_WAIT_TIMEOUT:
+                queue.waiting.popleft()
+                ticket.status = EXPIRED
+                queue.expired += 1
+                self._release(queue, ticket)
+                continue
+            if queue.tokens < 1:
+                break
+            queue.waiting.popleft()
+            queue.tokens -= 1
+            ticket.status = ADMITTED
+            ticket.admitted_until = now + FLASH_SALE_ADMIT_WINDOW
+            queue.admitted[ticket.id] = ticket
+            queue.admitted_seq = ticket.seq
+            queue.admitted_total += 1
+    
+    def _release(self, queue: _Queue, ticket: Ticket):
+        queue.allocated -= ticket.quantity
+        queue.admitted.pop(ticket.id, None)
+        self._tickets.pop(ticket.id, None)
+        if queue.by_user.get(ticket.user_id) is ticket:
+            del queue.by_user[ticket.user_id]
+
+flash_sale = FlashSaleController([sku.strip() for sku in FLASH_SALE_SKUS.split(",") if sku.strip()])
+catalog_events.subscribe(flash_sale.refresh)
+catalog_events.subscribe_availability(flash_sale.refresh)
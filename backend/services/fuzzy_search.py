@@ -0,0 +1,104 @@
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from models.product import Product
+from services import catalog_events
+
+def fold(value: str) -> str:
+    """Lowercase, strip accents and collapse punctuation: "Ultrassônico HC-SR04" -> "ultrassonico hc sr04"."""
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(re.findall(r"[a-z0-9]+", stripped.lower()))
+
+def trigrams(value: str) -> FrozenSet[str]:
+    """Word trigrams padded like pg_trgm, so word starts and ends weigh in."""
+    grams = set()
+    for word in fold(value).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+class TrigramIndex:
+    """In-memory trigram index over active product names and categories.
+
+    Loaded lazily from the products table and patched through catalog_events when
+    products change. Matching is accent-insensitive and tolerant to typos such as
+    "ultrasonico" for "Ultrassônico".
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._grams: Dict[str, FrozenSet[str]] = {}
+        self._loaded = False
+    
+    def _add(self, product: Product):
+        grams = trigrams(f"{product.name} {product.category or ''}")
+        self._grams[product.id] = grams
+        for gram in grams:
+            self._postings[gram].add(product.id)
+    
+    def _remove(self, product_id: str):
+        for gram in self._grams.pop(product_id, ()):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(product_id)
+                if not posting:
+                    del self._postings[gram]
+    
+    def load(self, db: Session):
+        with self._lock:
+            self._postings.clear()
+            self._grams.clear()
+            for product in db.query(Product).filter(Product.is_active == True).all():
+                self._add(product)
+            self._loaded = True
+    
+    def refresh(self, db: Session, product_ids: List[str]):
+        with self._lock:
+            if not self._loaded:
+                return
+            products = db.query(Product).filter(Product.id.in_(product_ids)).all()
+            for product_id in product_ids:
+                self._remove(product_id)
+            for product in products:
+                if product.is_active:
+                    self._add(product)
+    
+    def search(self, db: Session, q: str, limit: int = 10, threshold: float = 0.5) -> List[Tuple[str, float]]:
+        """Return (product_id, score) pairs, best first.
+
+        The score is the share of the query's trigrams found in the product, with
+        ties broken by Jaccard similarity so tighter matches come first.
+        """
+        query_grams = trigrams(q)
+        if not query_grams:
+            return []
+        
+        with self._lock:
+            if not self._loaded:
+                self.load(db)
+            
+            shared: Dict[str, int] = defaultdict(int)
+            for gram in query_grams:
+                for product_id in self._postings.get(gram, ()):
+                    shared[product_id] += 1
+            
+            scored = []
+            for product_id, count in shared.items():
+                coverage = count / len(query_grams)
+                if coverage < threshold:
+                    continue
+                jaccard = count / (len(query_grams) + len(self._grams[product_id]) - count)
+                scored.append((product_id, coverage, jaccard))
+        
+        scored.sort(key=lambda item: (-item[1], -item[2], item[0]))
+        return [(product_id, round(coverage, 4)) for product_id, coverage, _ in scored[:limit]]
+
+trigram_index = TrigramIndex()
+catalog_events.subscribe(trigram_index.refresh)
@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, case, select, update
+from sqlalchemy.orm import Session
+
+from models.product import Product
+
+_products = Product.__table__
+
+# Stock only ever changes through these statements, computed inside the UPDATE
+# itself. Nothing is read into Python and written back, so concurrent writers
+# cannot lose each other's changes.
+_take = (
+    update(_products)
+    .where(
+        _products.c.id == bindparam("b_product_id"),
+        # Stock held in other carts is not for sale; the buyer's own hold is
+        _products.c.stock_quantity - _products.c.reserved_quantity + bindparam("b_held") >= bindparam("b_quantity")
+    )
+    .values(
+        stock_quantity=_products.c.stock_quantity - bindparam("b_quantity"),
+        reserved_quantity=_products.c.reserved_quantity - bindparam("b_held"),
+        updated_at=bindparam("b_now")
+    )
+)
+
+_give = (
+    update(_products)
+    .where(_products.c.id == bindparam("b_product_id"))
+    .values(stock_quantity=_products.c.stock_quantity + bindparam("b_quantity"), updated_at=bindparam("b_now"))
+)
+
+def take_stock(
+    db: Session,
+    quantities: Dict[str, int],
+    now: Optional[datetime] = None,
+    held: Optional[Dict[str, int]] = None
+) -> int:
+    """Remove quantities from stock, only where enough unreserved stock is left.
+
+    Runs `UPDATE ... SET stock_quantity = stock_quantity - :q WHERE id = :id AND
+    stock_quantity - reserved_quantity + :held >= :q` for every product in one
+    executemany and returns the number of rows it changed. `held` is what the
+    buyer already reserved per product; it is released in the same statement.
+    Anything short of len(quantities) means some product ran out (or does not
+    exist); the caller should roll back.
+    """
+    if not quantities:
+        return 0
+    now = now or datetime.utcnow()
+    held = held or {}
+    result = db.execute(_take, [
+        {"b_product_id": product_id, "b_quantity": quantity, "b_held": held.get(product_id, 0), "b_now": now}
+        for product_id, quantity in quantities.items()
+    ])
+    return result.rowcount
+
+def give_stock(db: Session, quantities: Dict[str, int], now: Optional[datetime] = None) -> int:
+    """Put quantities back into stock (cancellations, restocks); returns rows changed."""
+    if not quantities:
+        return 0
+    now = now or datetime.utcnow()
+    result = db.execute(_give, [
+        {"b_product_id": product_id, "b_quantity": quantity, "b_now": now}
+        for product_id, quantity in quantities.items()
+    ])
+    return result.rowcount
+
+def adjust_stock(db: Session, product_id: str, change: int, now: Optional[datetime] = None) -> Optional[int]:
+    """Apply a signed admin adjustment, clamped at zero; returns the new stock.
+
+    Returns None when the product does not exist.
+    """
+    adjusted = _products.c.stock_quantity + change
+    result = db.execute(
+        update(_products)
+        .where(_products.c.id == product_id)
+        .values(stock_quantity=case((adjusted < 0, 0), else_=adjusted), updated_at=now or datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        return None
+    # The row stays locked by the UPDATE until commit, so this reads our own result
+    return db.execute(select(_products.c.stock_quantity).where(_products.c.id == product_id)).scalar()
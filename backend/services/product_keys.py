@@ -0,0 +1,43 @@
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from models.product import Product
+
+class ProductKeys:
+    """Translates between product slugs (what the API speaks) and integer keys.
+
+    Rows that reference a product store its key. A product's slug and key never
+    change once it is committed, so both directions are cached for the life of
+    the process; only misses go to the database.
+    """
+    
+    def __init__(self):
+        self._keys: Dict[str, int] = {}
+        self._slugs: Dict[int, str] = {}
+    
+    def keys(self, db: Session, slugs: Iterable[str]) -> Dict[str, int]:
+        """Key per slug; slugs that are not in the catalog are left out."""
+        slugs = list(dict.fromkeys(slugs))
+        missing = [slug for slug in slugs if slug not in self._keys]
+        if missing:
+            self._remember(db.query(Product.key, Product.id).filter(Product.id.in_(missing)).all())
+        return {slug: self._keys[slug] for slug in slugs if slug in self._keys}
+    
+    def key(self, db: Session, slug: str) -> Optional[int]:
+        return self.keys(db, [slug]).get(slug)
+    
+    def slugs(self, db: Session, keys: Iterable[int]) -> Dict[int, str]:
+        """Slug per key; keys without a product are left out."""
+        keys = list(dict.fromkeys(keys))
+        missing = [key for key in keys if key not in self._slugs]
+        if missing:
+            self._remember(db.query(Product.key, Product.id).filter(Product.key.in_(missing)).all())
+        return {key: self._slugs[key] for key in keys if key in self._slugs}
+    
+    def _remember(self, rows):
+        for key, slug in rows:
+            self._keys[slug] = key
+            self._slugs[key] = slug
+
+product_keys = ProductKeys()
\ No newline at end of file
@@ -0,0 +1,114 @@
+import re
+from typing import List, Set, Tuple
+
+from sqlalchemy import column, false, or_, select, table, text
+from sqlalchemy.orm import Session
+
+from models.product import Product
+
+# FTS5 table mirroring the searchable text of active products. Its rowid is the
+# rowid of the products row, so syncing and joining back are O(log n) lookups.
+FTS_TABLE = "products_fts"
+
+# bm25 column weights in declaration order: name, description, category
+BM25_WEIGHTS = (10.0, 1.0, 3.0)
+
+def _is_sqlite(bind) -> bool:
+    return bind.dialect.name == "sqlite"
+
+def ensure_search_index(engine):
+    """Create the FTS5 table if needed and fill it from the products table when empty."""
+    if not _is_sqlite(engine):
+        return
+    
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "name, description, category, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+        indexed = conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+        if not indexed:
+            _rebuild(conn)
+
+def _rebuild(conn):
+    conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    conn.execute(text(
+        f"INSERT INTO {FTS_TABLE}(rowid, name, description, category) "
+        "SELECT rowid, name, coalesce(description, ''), coalesce(category, '') "
+        "FROM products WHERE is_active = 1"
+    ))
+
+def index_product(db: Session, product_id: str):
+    """Sync one product into the search index inside the caller's transaction.
+
+    Must be called after the product row has been flushed. Inactive products are
+    removed from the index.
+    """
+    if not _is_sqlite(db.get_bind()):
+        return
+    
+    db.flush()
+    params = {"product_id": product_id}
+    db.execute(text(
+        f"DELETE FROM {FTS_TABLE} WHERE rowid = (SELECT rowid FROM products WHERE id = :product_id)"
+    ), params)
+    db.execute(text(
+        f"INSERT INTO {FTS_TABLE}(rowid, name, description, category) "
+        "SELECT rowid, name, coalesce(description, ''), coalesce(category, '') "
+        "FROM products WHERE id = :product_id AND is_active = 1"
+    ), params)
+
+def build_match_query(q: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    terms = re.findall(r"\w+", q.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+def match_condition(bind, q: str):
+    """WHERE condition on Product for free text, answered by the FTS index.
+
+    Same matching as search_product_ids: every word of `q`, as a prefix, in the
+    name, description or category of an active product.
+    """
+    if not _is_sqlite(bind):
+        pattern = f"%{q.strip()}%"
+        return or_(Product.name.ilike(pattern), Product.description.ilike(pattern), Product.category.ilike(pattern))
+    
+    match = build_match_query(q)
+    if not match:
+        return false()
+    return Product.key.in_(
+        select(column("rowid")).select_from(table(FTS_TABLE)).where(
+            text(f"{FTS_TABLE} MATCH :match").bindparams(match=match)
+        )
+    )
+
+def matching_product_ids(db: Session, q: str) -> Set[str]:
+    """Ids of the active products matching `q`, for filtering the catalog snapshot."""
+    return set(db.execute(select(Product.id).where(match_condition(db.get_bind(), q))).scalars())
+
+def search_product_ids(db: Session, q: str, limit: int, offset: int = 0) -> List[Tuple[str, float]]:
+    """Return (product_id, score) pairs, best match first. Lower scores rank higher."""
+    match = build_match_query(q)
+    if not match:
+        return []
+    
+    if not _is_sqlite(db.get_bind()):
+        pattern = f"%{q.strip()}%"
+        rows = db.query(Product.id).filter(
+            Product.is_active == True,
+            or_(
+                Product.name.ilike(pattern),
+                Product.description.ilike(pattern),
+                Product.category.ilike(pattern)
+            )
+        ).order_by(Product.name.asc()).offset(offset).limit(limit).all()
+        return [(row[0], 0.0) for row in rows]
+    
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    rows = db.execute(text(
+        f"SELECT products.id, bm25({FTS_TABLE}, {weights}) AS score "
+        f"FROM {FTS_TABLE} JOIN products ON products.rowid = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH :match "
+        "ORDER BY score LIMIT :limit OFFSET :offset"
+    ), {"match": match, "limit": limit, "offset": offset}).all()
+    return [(row[0], row[1]) for row in rows]
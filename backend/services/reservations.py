@@ -0,0 +1,197 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.product import Product, StockReservation
+from services import catalog_events
+from services.inventory import take_stock
+from services.product_keys import product_keys
+from services.write_queue import run_write
+
+logger = logging.getLogger(__name__)
+
+CART_RESERVATION_MINUTES = float(os.getenv("CART_RESERVATION_MINUTES", "15"))
+CART_RESERVATION_SWEEP_SECONDS = float(os.getenv("CART_RESERVATION_SWEEP_SECONDS", "30"))
+CART_RESERVATION_SWEEP_BATCH = int(os.getenv("CART_RESERVATION_SWEEP_BATCH", "500"))
+
+_products = Product.__table__
+
+# products.reserved_quantity always equals the sum of the product's
+# stock_reservations rows. Every statement that adds or removes a hold adjusts
+# it in the same transaction, so available stock is read from one column
+# instead of being summed per request.
+_hold = (
+    update(_products)
+    .where(
+        _products.c.id == bindparam("b_product_id"),
+        _products.c.is_active == True,
+        _products.c.stock_quantity - _products.c.reserved_quantity >= bindparam("b_quantity")
+    )
+    .values(reserved_quantity=_products.c.reserved_quantity + bindparam("b_quantity"), updated_at=bindparam("b_now"))
+)
+
+_unhold = (
+    update(_products)
+    .where(_products.c.id == bindparam("b_product_id"))
+    .values(reserved_quantity=_products.c.reserved_quantity - bindparam("b_quantity"), updated_at=bindparam("b_now"))
+)
+
+def reserve(db: Session, user_id: int, product_id: str, quantity: int, now: Optional[datetime] = None) -> bool:
+    """Hold `quantity` more units for the user's cart line and restart its timer.
+
+    Returns False when not enough unreserved stock is left, or when the product
+    is not in the catalog. The caller commits.
+    """
+    now = now or datetime.utcnow()
+    held = db.execute(_hold, {"b_product_id": product_id, "b_quantity": quantity, "b_now": now}).rowcount
+    if not held:
+        return False
+    
+    product_key = product_keys.key(db, product_id)
+    expires_at = now + timedelta(minutes=CART_RESERVATION_MINUTES)
+    extended = db.execute(
+        update(StockReservation)
+        .where(StockReservation.user_id == user_id, StockReservation.product_key == product_key)
+        .values(quantity=StockReservation.quantity + quantity, expires_at=expires_at)
+    ).rowcount
+    if not extended:
+        db.add(StockReservation(user_id=user_id, product_key=product_key, quantity=quantity, expires_at=expires_at))
+        db.flush()
+    return True
+
+def release(db: Session, user_id: int, product_id: Optional[str] = None, quantity: Optional[int] = None) -> List[str]:
+    """Give back the user's holds (one product, or the whole cart).
+
+    With `quantity` only that many units of the product are released. Returns
+    the ids of the products whose availability changed. The caller commits.
+    """
+    if product_id is not None and quantity is not None:
+        shrunk = db.execute(
+            update(StockReservation)
+            .where(
+                StockReservation.user_id == user_id,
+                StockReservation.product_key == product_keys.key(db, product_id),
+                StockReservation.quantity > quantity
+            )
+            .values(quantity=StockReservation.quantity - quantity)
+        ).rowcount
+        if shrunk:
+            _unhold_many(db, {product_id: quantity})
+            return [product_id]
+    
+    released = _take_holds(db, user_id, product_id)
+    _unhold_many(db, released)
+    return list(released)
+
+def convert(db: Session, user_id: int, quantities: Dict[str, int], now: Optional[datetime] = None) -> Optional[List[str]]:
+    """Turn the user's holds into a sale of `quantities` (checkout).
+
+    Held units are already set aside, so for them this is a bookkeeping update
+    that cannot fail; only units beyond the hold (e.g. after it expired) compete
+    for free stock. Holds on products that are not being bought are released.
+    Returns the ids of every product whose stock changed, or None if some
+    product could not be covered; the caller should roll back then.
+    """
+    holds = _take_holds(db, user_id)
+    held = {product_id: min(quantity, quantities.get(product_id, 0)) for product_id, quantity in holds.items()}
+    leftover = {product_id: holds[product_id] - held[product_id] for product_id in holds if holds[product_id] > held[product_id]}
+    
+    if take_stock(db, quantities, now, held) != len(quantities):
+        return None
+    
+    _unhold_many(db, leftover, now)
+    return list(dict.fromkeys(list(quantities) + list(leftover)))
+
+def sweep_expired(db: Session, now: Optional[datetime] = None, batch_size: int = CART_RESERVATION_SWEEP_BATCH) -> int:
+    """Release every hold that expired before `now`, one write-queue unit per batch.
+
+    Returns the number of reservations released.
+    """
+    now = now or datetime.utcnow()
+    
+    def release_batch(db: Session):
+        batch = select(StockReservation.id).where(StockReservation.expires_at < now).limit(batch_size)
+        # Only the rows this DELETE actually removed are released, so a hold that
+        # a checkout converted meanwhile is not given back twice
+        expired = db.execute(
+            delete(StockReservation)
+            .where(StockReservation.id.in_(batch.scalar_subquery()), StockReservation.expires_at < now)
+            .returning(StockReservation.product_key, StockReservation.quantity)
+        ).all()
+        quantities = _by_slug(db, expired)
+        _unhold_many(db, quantities, now)
+        return len(expired), quantities
+    
+    released = 0
+    while True:
+        count, quantities = run_write(db, release_batch)
+        if quantities:
+            catalog_events.availability_changed(db, list(quantities))
+        released += count
+        if count < batch_size:
+            return released
+
+def _take_holds(db: Session, user_id: int, product_id: Optional[str] = None) -> Dict[str, int]:
+    """Delete the user's reservations and return what they held, per product."""
+    statement = delete(StockReservation).where(StockReservation.user_id == user_id)
+    if product_id is not None:
+        statement = statement.where(StockReservation.product_key == product_keys.key(db, product_id))
+    rows = db.execute(statement.returning(StockReservation.product_key, StockReservation.quantity)).all()
+    return _by_slug(db, rows)
+
+def _by_slug(db: Session, rows) -> Dict[str, int]:
+    """Sum (product_key, quantity) rows per product slug."""
+    slugs = product_keys.slugs(db, [product_key for product_key, _ in rows])
+    quantities: Dict[str, int] = {}
+    for product_key, quantity in rows:
+        quantities[slugs[product_key]] = quantities.get(slugs[product_key], 0) + quantity
+    return quantities
+
+def _unhold_many(db: Session, quantities: Dict[str, int], now: Optional[datetime] = None):
+    if quantities:
+        now = now or datetime.utcnow()
+        db.execute(_unhold, [
+            {"b_product_id": product_id, "b_quantity": quantity, "b_now": now}
+            for product_id, quantity in quantities.items()
+        ])
+
+class ReservationSweeper:
+    """Background thread that releases expired cart holds every few seconds."""
+    
+    def __init__(self, interval: float = CART_RESERVATION_SWEEP_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="reservation-sweeper", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                released = sweep_expired(db)
+                if released:
+                    logger.info("Released %d expired stock reservations", released)
+            except Exception:
+                db.rollback()
+                logger.exception("Failed to release expired stock reservations")
+            finally:
+                db.close()
+
+reservation_sweeper = ReservationSweeper()
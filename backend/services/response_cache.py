@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set
+from urllib.parse import quote
+
+from sqlalchemy.orm import Session
+
+from services import catalog_events
+
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "512"))
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+CATALOG_CACHE_NOT_FOUND_TTL = float(os.getenv("CATALOG_CACHE_NOT_FOUND_TTL", "30"))
+
+# Tag carried by every response that depends on the catalog as a whole
+# (listings, categories), as opposed to a single product
+CATALOG_TAG = "catalog"
+
+# Tag for responses that depend on which products are in stock (in_stock filters,
+# facet counts), beyond the stock figures of the products they list
+STOCK_TAG = "stock"
+
+# Tags double as Surrogate-Key values, which are space separated ASCII tokens
+def product_tag(product_id: str) -> str:
+    return f"product:{quote(product_id, safe='')}"
+
+def category_tag(category: str) -> str:
+    return f"category:{quote(category, safe='')}"
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "tags")
+    
+    def __init__(self, value: Any, expires_at: float, tags: Set[str]):
+        self.value = value
+        self.expires_at = expires_at
+        self.tags = tags
+
+class ResponseCache:
+    """Process-local LRU cache for serialized responses, invalidated by tag.
+
+    Writers call invalidate() with the tags they touched; readers capture
+    `generation` before computing a value and pass it to set(), so a value
+    computed from data that was invalidated meanwhile is never stored. Each
+    tag remembers the generation it was last invalidated in, so only writes to
+    a value's own tags keep it out; a stock change of one product does not
+    stop every listing that was being built at the time from being cached.
+    """
+    
+    def __init__(self, max_entries: int = CATALOG_CACHE_SIZE, ttl: float = CATALOG_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self._cleared_generation = 0
+        self._tag_generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+    
+    def set(self, key: Hashable, value: Any, tags: Iterable[str], generation: int, ttl: Optional[float] = None):
+        tags = set(tags)
+        with self._lock:
+            if generation < self._cleared_generation or any(
+                self._tag_generations.get(tag, 0) > generation for tag in tags
+            ):
+                return
+            if key in self._entries:
+                self._drop(key)
+            entry = _Entry(value, time.monotonic() + (self.ttl if ttl is None else ttl), tags)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def invalidate(self, tags: Iterable[str]):
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                self._tag_generations[tag] = self.generation
+                for key in list(self._tags.get(tag, ())):
+                    self._drop(key)
+    
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._cleared_generation = self.generation
+            self._tag_generations.clear()
+            self._entries.clear()
+            self._tags.clear()
+    
+    def _drop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+catalog_cache = ResponseCache()
+
+def _invalidate_products(db: Session, product_ids: List[str]):
+    catalog_cache.invalidate([CATALOG_TAG] + [product_tag(product_id) for product_id in product_ids])
+
+def _invalidate_availability(db: Session, product_ids: List[str]):
+    # Listings carry the tags of the products on them, so CATALOG_TAG can stay
+    catalog_cache.invalidate([STOCK_TAG] + [product_tag(product_id) for product_id in product_ids])
+
+# Runs after the snapshot and search indexes have been patched
+catalog_events.subscribe(_invalidate_products, priority=100)
+catalog_events.subscribe_availability(_invalidate_availability, priority=100)
@@ -0,0 +1,162 @@
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.product import Product
+from services import catalog_events
+from services.fuzzy_search import fold
+
+# A suggestion is identified by (kind, key): ("product", product_id) or ("category", name)
+SuggestionKey = Tuple[str, str]
+
+class _Node:
+    __slots__ = ("children", "entries")
+    
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.entries: Set[SuggestionKey] = set()
+
+class SuggestIndex:
+    """Prefix trie over product names, SKUs and categories for autocomplete.
+
+    Names are indexed from every word, so "ultra" finds "Sensor Ultrassônico".
+    The trie is loaded once from the products table and then patched through
+    catalog_events, so lookups never touch the database.
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._root = _Node()
+        self._terms: Dict[SuggestionKey, List[str]] = {}
+        self._labels: Dict[SuggestionKey, str] = {}
+        self._product_category: Dict[str, Optional[str]] = {}
+        self._category_counts: Counter = Counter()
+        self._loaded = False
+    
+    def _insert(self, term: str, key: SuggestionKey):
+        node = self._root
+        for ch in term:
+            node = node.children.setdefault(ch, _Node())
+        node.entries.add(key)
+    
+    def _delete(self, term: str, key: SuggestionKey):
+        path = [self._root]
+        for ch in term:
+            node = path[-1].children.get(ch)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].entries.discard(key)
+        
+        # Prune branches left without entries
+        for depth in range(len(term), 0, -1):
+            node = path[depth]
+            if node.entries or node.children:
+                break
+            del path[depth - 1].children[term[depth - 1]]
+    
+    def _index(self, key: SuggestionKey, label: str, terms: List[str]):
+        terms = list(dict.fromkeys(term for term in terms if term))
+        self._terms[key] = terms
+        self._labels[key] = label
+        for term in terms:
+            self._insert(term, key)
+    
+    def _unindex(self, key: SuggestionKey):
+        for term in self._terms.pop(key, ()):
+            self._delete(term, key)
+        self._labels.pop(key, None)
+    
+    def _add_product(self, product: Product):
+        words = fold(product.name).split()
+        terms = [" ".join(words[i:]) for i in range(len(words))]
+        terms.append(product.id.lower())
+        self._index(("product", product.id), product.name, terms)
+        
+        self._product_category[product.id] = product.category
+        if product.category:
+            self._category_counts[product.category] += 1
+            if self._category_counts[product.category] == 1:
+                self._index(("category", product.category), product.category, [fold(product.category)])
+    
+    def _remove_product(self, product_id: str):
+        self._unindex(("product", product_id))
+        
+        category = self._product_category.pop(product_id, None)
+        if category:
+            self._category_counts[category] -= 1
+            if self._category_counts[category] <= 0:
+                del self._category_counts[category]
+                self._unindex(("category", category))
+    
+    def load(self, db: Session):
+        with self._lock:
+            self._root = _Node()
+            self._terms.clear()
+            self._labels.clear()
+            self._product_category.clear()
+            self._category_counts.clear()
+            for product in db.query(Product).filter(Product.is_active == True).all():
+                self._add_product(product)
+            self._loaded = True
+    
+    def refresh(self, db: Session, product_ids: List[str]):
+        with self._lock:
+            if not self._loaded:
+                return
+            products = db.query(Product).filter(Product.id.in_(product_ids)).all()
+            for product_id in product_ids:
+                self._remove_product(product_id)
+            for product in products:
+                if product.is_active:
+                    self._add_product(product)
+    
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        db = SessionLocal()
+        try:
+            self.load(db)
+        finally:
+            db.close()
+    
+    def suggest(self, prefix: str, limit: int = 8) -> List[dict]:
+        """Return up to `limit` suggestions, categories first, then products in key order."""
+        term = fold(prefix)
+        # SKUs keep their dashes, so also try the raw lowercase prefix
+        raw = prefix.strip().lower()
+        if not term and not raw:
+            return []
+        
+        self._ensure_loaded()
+        with self._lock:
+            found: Dict[SuggestionKey, None] = {}
+            for candidate in dict.fromkeys(t for t in (term, raw) if t):
+                self._collect(candidate, limit, found)
+            
+            keys = sorted(found, key=lambda key: (key[0] != "category", self._labels[key].lower()))[:limit]
+            return [
+                {"type": kind, "id": value if kind == "product" else None, "label": self._labels[(kind, value)]}
+                for kind, value in keys
+            ]
+    
+    def _collect(self, prefix: str, limit: int, found: Dict[SuggestionKey, None]):
+        node = self._root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return
+        
+        # Depth-first in character order, stopping once enough suggestions were seen
+        stack = [node]
+        while stack and len(found) < limit:
+            node = stack.pop()
+            for key in sorted(node.entries):
+                found.setdefault(key, None)
+            stack.extend(node.children[ch] for ch in sorted(node.children, reverse=True))
+
+suggest_index = SuggestIndex()
+catalog_events.subscribe(suggest_index.refresh)
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from database import SQLALCHEMY_DATABASE_URL, SessionLocal, configure_sqlite, engine_options
+
+logger = logging.getLogger(__name__)
+
+# On by default for file-backed SQLite, the only backend with a single writer
+WRITE_QUEUE_ENABLED = os.getenv(
+    "WRITE_QUEUE",
+    "1" if SQLALCHEMY_DATABASE_URL.startswith("sqlite") and ":memory:" not in SQLALCHEMY_DATABASE_URL else "0"
+) == "1"
+# Longest a batch waits for more units after the first one arrived
+WRITE_QUEUE_MAX_DELAY_MS = float(os.getenv("WRITE_QUEUE_MAX_DELAY_MS", "2"))
+WRITE_QUEUE_MAX_BATCH = int(os.getenv("WRITE_QUEUE_MAX_BATCH", "64"))
+# Longest a caller waits for its unit before giving up with 503
+WRITE_QUEUE_TIMEOUT = float(os.getenv("WRITE_QUEUE_TIMEOUT", "10"))
+
+WriteUnit = Callable[[Session], Any]
+
+class WriteQueue:
+    """Single writer thread that commits many requests' writes together.
+
+    Each write unit is a function that takes a session, does its writes without
+    committing, and returns a result. The writer collects whatever units are
+    pending (waiting at most max_delay_ms after the first), runs each inside its
+    own SAVEPOINT so a unit that raises only undoes itself, and commits the batch
+    in one transaction. Under load every commit carries many units, so the cost
+    of the commit (and of the file lock) is shared instead of paid per request.
+    """
+
+    def __init__(
+        self,
+        url: str = SQLALCHEMY_DATABASE_URL,
+        max_delay_ms: float = WRITE_QUEUE_MAX_DELAY_MS,
+        max_batch: int = WRITE_QUEUE_MAX_BATCH
+    ):
+        self.url = url
+        self.max_delay = max_delay_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        self.units = 0
+        self.failed_units = 0
+        self._pending: "queue.Queue[Tuple[WriteUnit, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._session_factory: Optional[sessionmaker] = None
+    
+    def submit(self, unit: WriteUnit) -> Future:
+        self._ensure_started()
+        future: Future = Future()
+        self._pending.put((unit, future))
+        return future
+    
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "pending": self._pending.qsize(),
+            "batches": self.batches,
+            "units": self.units,
+            "failed_units": self.failed_units,
+            "average_batch": round(self.units / self.batches, 2) if self.batches else 0.0
+        }
+    
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._session_factory = sessionmaker(bind=self._create_engine(), autoflush=False)
+                self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+                self._thread.start()
+    
+    def _create_engine(self):
+        engine = create_engine(self.url, **engine_options(self.url))
+        configure_sqlite(engine)
+        
+        # Let SQLAlchemy drive transactions so SAVEPOINT works, and take the write
+        # lock up front: the writer never has to upgrade a read lock mid-batch
+        @event.listens_for(engine, "connect")
+        def _autocommit_driver(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+        
+        @event.listens_for(engine, "begin")
+        def _begin_immediate(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        
+        return engine
+    
+    def _run(self):
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._pending.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._commit_batch(batch)
+            except Exception as exc:
+                logger.exception("Write batch of %d units failed", len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+    
+    def _commit_batch(self, batch: List[Tuple[WriteUnit, Future]]):
+        db = self._session_factory()
+        outcomes = []
+        try:
+            for unit, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    with db.begin_nested():
+                        outcomes.append((future, unit(db), None))
+                except Exception as exc:
+                    outcomes.append((future, None, exc))
+            db.commit()
+        except Exception as exc:
+            logger.exception("Write batch of %d units failed to commit", len(batch))
+            db.rollback()
+            outcomes = [(future, None, exc) for future, _, _ in outcomes]
+        finally:
+            db.close()
+        
+        self.batches += 1
+        for future, result, exc in outcomes:
+            self.units += 1
+            if exc is None:
+                future.set_result(result)
+            else:
+                self.failed_units += 1
+                future.set_exception(exc)
+
+def run_write(db: Session, unit: WriteUnit) -> Any:
+    """Run a write unit and commit it; returns the unit's result.
+
+    With the write queue enabled the unit runs on the writer thread with the
+    writer's session (so it must only use ids and values from `db`, not its ORM
+    objects) and is committed together with other requests' units. Otherwise it
+    runs on `db` and is committed right away. Exceptions raised by the unit,
+    such as HTTPException, propagate to the caller after its writes are undone.
+    """
+    if not WRITE_QUEUE_ENABLED:
+        try:
+            result = unit(db)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+    
+    future = write_queue.submit(unit)
+    try:
+        return future.result(timeout=WRITE_QUEUE_TIMEOUT)
+    except FutureTimeoutError:
+        # A unit the writer already started will be committed, so wait for it;
+        # only one that never ran can be answered with 503
+        if not future.cancel():
+            return future.result()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many writes in progress, please retry",
+            headers={"Retry-After": "1"}
+        )
+
+async def run_write_async(unit: WriteUnit) -> Any:
+    """run_write() for async routes: awaits the unit without blocking the event loop.
+
+    The unit gets a session of its own, the writer's or (with the queue disabled)
+    a fresh one run in the threadpool, so the same write units serve both kinds
+    of route.
+    """
+    if not WRITE_QUEUE_ENABLED:
+        return await run_in_threadpool(_run_unit, unit)
+    
+    future = write_queue.submit(unit)
+    waiter = asyncio.wrap_future(future)
+    try:
+        return await asyncio.wait_for(asyncio.shield(waiter), WRITE_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        if not future.cancel():
+            return await waiter
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many writes in progress, please retry",
+            headers={"Retry-After": "1"}
+        )
+
+def _run_unit(unit: WriteUnit) -> Any:
+    db = SessionLocal()
+    try:
+        return run_write(db, unit)
+    finally:
+        db.close()
+
+def write_queue_stats() -> dict:
+    return write_queue.stats() if WRITE_QUEUE_ENABLED else {"enabled": False}
+
+write_queue = WriteQueue()
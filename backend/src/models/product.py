@@ -32,11 +32,23 @@ class Product(db.Model):
         }
 
     def update_stock(self, quantity_change):
-        """Update stock quantity (positive for increase, negative for decrease)"""
-        self.stock_quantity += quantity_change
-        if self.stock_quantity < 0:
-            self.stock_quantity = 0
-        self.updated_at = datetime.utcnow()
+        """Update stock quantity (positive for increase, negative for decrease), clamped at 0"""
+        adjusted = Product.stock_quantity + quantity_change
+        self._apply_stock(db.case((adjusted < 0, 0), else_=adjusted))
+
+    def take_stock(self, quantity):
+        """Atomically remove quantity from stock; returns False if not enough is left"""
+        return self._apply_stock(Product.stock_quantity - quantity, Product.stock_quantity >= quantity) == 1
+
+    def _apply_stock(self, value, *conditions):
+        # Computed inside the UPDATE so concurrent requests cannot overwrite each other
+        result = db.session.execute(
+            db.update(Product)
+            .where(Product.id == self.id, *conditions)
+            .values(stock_quantity=value, updated_at=datetime.utcnow())
+        )
+        db.session.expire(self, ['stock_quantity', 'updated_at'])
+        return result.rowcount
 
     def is_in_stock(self, quantity=1):
         """Check if product has enough stock"""
@@ -70,7 +70,9 @@ def create_order():
             
             # Update stock if product exists
             if product:
-                product.update_stock(-cart_item.quantity)
+                if not product.take_stock(cart_item.quantity):
+                    db.session.rollback()
+                    return jsonify({'error': f'Insufficient stock for {cart_item.product_name}'}), 409
                 
                 # Record stock movement
                 stock_movement = StockMovement(
@@ -0,0 +1,268 @@
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Catalog reads are exercised in-process against a scratch database seeded
+# with the demo catalog
+DATABASE_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_DIR}/catalog_test.db"
+# Publish the static catalog right after each change
+os.environ["CATALOG_PUBLISH_DIR"] = os.path.join(DATABASE_DIR, "catalog")
+os.environ["CATALOG_PUBLISH_DELAY"] = "0"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from fastapi.testclient import TestClient
+
+from main import app
+from seed_data import seed_database
+
+class CatalogTests:
+    def __init__(self, client):
+        self.client = client
+        self.tests_run = 0
+        self.tests_passed = 0
+        token = self.client.post("/api/auth/login", json={"email": "admin@gbsite.com", "password": "admin123"}).json()["access_token"]
+        self.admin = {"Authorization": f"Bearer {token}"}
+    
+    def log_test(self, name, success, details=""):
+        """Log test results"""
+        self.tests_run += 1
+        if success:
+            self.tests_passed += 1
+            print(f"✅ {name} - PASSED")
+        else:
+            print(f"❌ {name} - FAILED")
+        if details:
+            print(f"   {details}")
+        print()
+    
+    def create_product(self, product_id, price=10.0, stock_quantity=5, category="Testes"):
+        response = self.client.post("/api/products/", json={
+            "id": product_id, "name": product_id.replace("-", " ").title(),
+            "price": price, "stock_quantity": stock_quantity, "category": category
+        }, headers=self.admin)
+        assert response.status_code == 201, response.text
+    
+    def test_facets(self):
+        """Facets count the current filter per price bucket and stock, and every category"""
+        print("🔍 Testing listing facets...")
+        
+        self.create_product("facet-cheap", price=10.0, stock_quantity=0, category="Facetas")
+        self.create_product("facet-dear", price=60.0, stock_quantity=3, category="Facetas")
+        facets = self.client.get("/api/products/", params={"category": "Facetas", "facets": "true"}).json()["facets"]
+        buckets = [(bucket["min"], bucket["max"], bucket["count"]) for bucket in facets["price_buckets"]]
+        
+        success = (
+            buckets == [(0, 50, 1), (50, 100, 1)] and facets["in_stock"] == 1 and facets["out_of_stock"] == 1
+            and facets["price_min"] == 10.0 and facets["price_max"] == 60.0
+            and facets["categories"]["Facetas"] == 2 and facets["categories"]["Kits"] == 1
+        )
+        self.log_test("Facets", success, f"Facets: {facets}")
+    
+    def test_conditional_get(self):
+        """Reads answer 304 without a body while their validators match, and 200 again after a change"""
+        print("🔍 Testing conditional GETs...")
+        
+        self.create_product("etag-kit")
+        first = self.client.get("/api/products/etag-kit")
+        etag, last_modified = first.headers.get("etag"), first.headers.get("last-modified")
+        by_etag = self.client.get("/api/products/etag-kit", headers={"If-None-Match": etag})
+        by_date = self.client.get("/api/products/etag-kit", headers={"If-Modified-Since": last_modified})
+        listing = self.client.get("/api/products/", params={"category": "Testes"})
+        listing_again = self.client.get("/api/products/", params={"category": "Testes"}, headers={"If-None-Match": listing.headers.get("etag")})
+        
+        self.client.put("/api/products/etag-kit", json={"price": 12.5}, headers=self.admin)
+        changed = self.client.get("/api/products/etag-kit", headers={"If-None-Match": etag})
+        
+        success = (
+            first.status_code == 200 and etag and last_modified
+            and by_etag.status_code == 304 and by_etag.content == b""
+            and by_date.status_code == 304 and listing_again.status_code == 304
+            and changed.status_code == 200 and changed.headers.get("etag") != etag and changed.json()["price"] == 12.5
+        )
+        details = f"ETag: {etag}, 304s: {by_etag.status_code}/{by_date.status_code}/{listing_again.status_code}, After update: {changed.status_code}"
+        self.log_test("Conditional GET", success, details)
+    
+    def test_order_conditional_get(self):
+        """Order detail revalidates with its ETag until the order changes"""
+        print("🔍 Testing conditional GETs on orders...")
+        
+        response = self.client.post("/api/auth/register", json={
+            "username": "etag-buyer", "email": "etag-buyer@test.com", "password": "secret123"
+        })
+        buyer = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        self.client.post("/api/cart/add", json={
+            "product_id": "led-rgb", "product_name": "LED RGB 5mm", "product_price": 3.5, "quantity": 1
+        }, headers=buyer)
+        order_id = self.client.post("/api/orders/", headers=buyer).json()["id"]
+        
+        etag = self.client.get(f"/api/orders/{order_id}", headers=buyer).headers.get("etag")
+        unchanged = self.client.get(f"/api/orders/{order_id}", headers={**buyer, "If-None-Match": etag}).status_code
+        self.client.put(f"/api/orders/{order_id}/status", json={"status": "shipped"}, headers=self.admin)
+        changed = self.client.get(f"/api/orders/{order_id}", headers={**buyer, "If-None-Match": etag}).status_code
+        
+        success = etag is not None and unchanged == 304 and changed == 200
+        self.log_test("Order Conditional GET", success, f"ETag: {etag}, Unchanged: {unchanged}, After status change: {changed}")
+    
+    @staticmethod
+    def published_catalog(wait_for, timeout=5):
+        """The catalog the manifest points at, once `wait_for(catalog)` holds (or the timeout passes)"""
+        directory = os.environ["CATALOG_PUBLISH_DIR"]
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with open(os.path.join(directory, "catalog.json")) as handle:
+                    manifest = json.load(handle)
+                with open(os.path.join(directory, manifest["url"]), "rb") as handle:
+                    body = handle.read()
+                with open(os.path.join(directory, manifest["gzip_url"]), "rb") as handle:
+                    compressed = handle.read()
+                catalog = json.loads(body)
+                if wait_for(catalog) or time.monotonic() > deadline:
+                    return manifest, catalog, gzip.decompress(compressed) == body
+            except FileNotFoundError:
+                if time.monotonic() > deadline:
+                    return None, None, False
+            time.sleep(0.05)
+    
+    def test_static_publisher(self):
+        """Product writes republish a new catalog version with a matching gzip copy"""
+        print("🔍 Testing the static catalog publisher...")
+        
+        def ids(catalog):
+            return {product["id"] for product in catalog["products"]}
+        
+        self.create_product("static-kit")
+        created, catalog, gzip_matches = self.published_catalog(lambda catalog: "static-kit" in ids(catalog))
+        listed = created is not None and "static-kit" in ids(catalog) and catalog["total"] == len(catalog["products"])
+        
+        self.client.put("/api/products/static-kit", json={"is_active": False}, headers=self.admin)
+        removed, catalog, _ = self.published_catalog(lambda catalog: "static-kit" not in ids(catalog))
+        
+        success = (
+            listed and gzip_matches and removed is not None
+            and removed["version"] != created["version"] and "static-kit" not in ids(catalog)
+        )
+        details = f"Versions: {created and created['version']} -> {removed and removed['version']}, Gzip matches: {gzip_matches}"
+        self.log_test("Static Publisher", success, details)
+    
+    def follow_changes(self, since=None, limit=100):
+        """Every change after `since`, following next_cursor; returns (changes, last cursor)"""
+        changes = []
+        while True:
+            params = {"limit": limit, **({"since": since} if since else {})}
+            data = self.client.get("/api/products/changes", params=params).json()
+            changes += data["changes"]
+            since = data["next_cursor"]
+            if not data["has_more"]:
+                return changes, since
+    
+    def test_change_feed(self):
+        """The feed returns only what changed after the cursor, with tombstones for deactivations"""
+        print("🔍 Testing the product change feed...")
+        
+        everything, cursor = self.follow_changes()
+        self.create_product("feed-new")
+        self.client.put("/api/products/motor-servo", json={"price": 19.9}, headers=self.admin)
+        self.client.put("/api/products/led-rgb/stock", json={"quantity": 5, "reason": "restock"}, headers=self.admin)
+        self.client.put("/api/products/feed-new", json={"is_active": False}, headers=self.admin)
+        changes, _ = self.follow_changes(cursor, limit=1)
+        
+        seen = [(change["type"], change["id"]) for change in changes]
+        success = (
+            {"arduino-uno", "led-rgb"} <= {change["id"] for change in everything}
+            and seen == [("upsert", "motor-servo"), ("upsert", "led-rgb"), ("tombstone", "feed-new")]
+            and changes[0]["product"]["price"] == 19.9
+        )
+        self.log_test("Change Feed", success, f"Changes since cursor: {seen}")
+    
+    def test_batch_lookup(self):
+        """GET and POST batch lookups keep the caller's order and mark unknown ids"""
+        print("🔍 Testing batch product lookup...")
+        
+        by_get = self.client.get("/api/products/batch", params={"ids": "led-rgb,missing-part,arduino-uno,led-rgb"}).json()
+        by_post = self.client.post("/api/products/batch", json={"ids": ["arduino-uno", "missing-part"]}).json()
+        too_many = self.client.get("/api/products/batch", params={"ids": ",".join(f"part-{i}" for i in range(101))}).status_code
+        
+        results = [(result["id"], result["found"]) for result in by_get["results"]]
+        success = (
+            results == [("led-rgb", True), ("missing-part", False), ("arduino-uno", True)]
+            and by_get["results"][0]["product"]["price"] == 3.5
+            and by_get["found"] == 2 and by_get["not_found"] == ["missing-part"]
+            and by_post["found"] == 1 and by_post["not_found"] == ["missing-part"]
+            and too_many == 400
+        )
+        self.log_test("Batch Lookup", success, f"GET: {results}, POST not found: {by_post['not_found']}, 101 ids: {too_many}")
+    
+    def test_availability(self):
+        """Lines share their product's unreserved stock; a buyer's own cart holds count for them"""
+        print("🔍 Testing bulk availability...")
+        
+        self.create_product("avail-kit", stock_quantity=4)
+        self.create_product("avail-retired")
+        self.client.put("/api/products/avail-retired", json={"is_active": False}, headers=self.admin)
+        lines = [
+            {"product_id": "avail-kit", "quantity": 3}, {"product_id": "avail-kit", "quantity": 2},
+            {"product_id": "avail-retired", "quantity": 1}, {"product_id": "missing-part", "quantity": 1}
+        ]
+        checked = self.client.post("/api/products/availability", json=lines).json()
+        
+        response = self.client.post("/api/auth/register", json={
+            "username": "avail-buyer", "email": "avail-buyer@test.com", "password": "secret123"
+        })
+        buyer = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        self.client.post("/api/cart/add", json={
+            "product_id": "avail-kit", "product_name": "Avail Kit", "product_price": 10.0, "quantity": 2
+        }, headers=buyer)
+        line = [{"product_id": "avail-kit", "quantity": 3}]
+        anonymous = self.client.post("/api/products/availability", json=line).json()["lines"][0]
+        own = self.client.post("/api/products/availability", json=line, headers=buyer).json()["lines"][0]
+        
+        results = [(result["sellable"], result["max_quantity"], result["reason"]) for result in checked["lines"]]
+        success = (
+            results == [(True, 4, None), (False, 1, "insufficient_stock"), (False, 0, "inactive"), (False, 0, "not_found")]
+            and checked["all_available"] is False
+            and (anonymous["sellable"], anonymous["max_quantity"]) == (False, 2)
+            and (own["sellable"], own["max_quantity"]) == (True, 4)
+        )
+        self.log_test("Availability", success, f"Lines: {results}, Anonymous: {anonymous['max_quantity']}, Holder: {own['max_quantity']}")
+
+def main():
+    print("🚀 Starting Catalog Tests...")
+    print("=" * 60)
+    
+    seed_database()
+    try:
+        with TestClient(app) as client:
+            tester = CatalogTests(client)
+            tester.test_facets()
+            tester.test_conditional_get()
+            tester.test_order_conditional_get()
+            tester.test_static_publisher()
+            tester.test_change_feed()
+            tester.test_batch_lookup()
+            tester.test_availability()
+    finally:
+        shutil.rmtree(DATABASE_DIR, ignore_errors=True)
+    
+    # Print results
+    print("=" * 60)
+    print(f"📊 CATALOG TEST RESULTS:")
+    print(f"   Tests Run: {tester.tests_run}")
+    print(f"   Tests Passed: {tester.tests_passed}")
+    print(f"   Tests Failed: {tester.tests_run - tester.tests_passed}")
+    print(f"   Success Rate: {(tester.tests_passed/tester.tests_run)*100:.1f}%")
+    
+    if tester.tests_passed == tester.tests_run:
+        print("🎉 Catalog reads work!")
+        return 0
+    else:
+        print("⚠️  Some catalog tests failed!")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+# Checkout is exercised in-process against a scratch database seeded with the
+# demo catalog
+DATABASE_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_DIR}/checkout_test.db"
+os.environ["ARCHIVE_INTERVAL_SECONDS"] = "0"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from database import ReadSessionLocal, async_read_engine
+from main import app
+from seed_data import seed_database
+
+PRODUCTS = ["arduino-uno", "led-rgb", "motor-servo", "sensor-ultrasonic"]
+
+class CheckoutTests:
+    def __init__(self, client):
+        self.client = client
+        self.tests_run = 0
+        self.tests_passed = 0
+        self.admin = self.login("admin@gbsite.com", "admin123")
+    
+    def log_test(self, name, success, details=""):
+        """Log test results"""
+        self.tests_run += 1
+        if success:
+            self.tests_passed += 1
+            print(f"✅ {name} - PASSED")
+        else:
+            print(f"❌ {name} - FAILED")
+        if details:
+            print(f"   {details}")
+        print()
+    
+    def login(self, email, password):
+        token = self.client.post("/api/auth/login", json={"email": email, "password": password}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+    
+    def register(self, name):
+        response = self.client.post("/api/auth/register", json={
+            "username": name, "email": f"{name}@test.com", "password": "secret123"
+        })
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    def add_to_cart(self, headers, product_id, quantity=1):
+        return self.client.post("/api/cart/add", json={
+            "product_id": product_id, "product_name": product_id, "product_price": 1.0, "quantity": quantity
+        }, headers=headers)
+    
+    def stock(self, product_id):
+        return self.client.get(f"/api/products/{product_id}").json()["stock_quantity"]
+    
+    def movements(self, product_id):
+        return self.client.get(f"/api/products/{product_id}/stock/movements", headers=self.admin).json()["movements"]
+    
+    def counted_checkout(self, headers):
+        """Place an order and count the SQL statements the request ran"""
+        statements = []
+        
+        def count(conn, cursor, statement, parameters, context, executemany):
+            # Background sweeps are not part of the request
+            if threading.current_thread().name not in ("reservation-sweeper", "archiver"):
+                statements.append(statement)
+        
+        event.listen(Engine, "before_cursor_execute", count)
+        try:
+            response = self.client.post("/api/orders/", headers=headers)
+        finally:
+            event.remove(Engine, "before_cursor_execute", count)
+        return response, len(statements)
+    
+    def test_bulk_checkout(self):
+        """Checkout runs the same number of statements for one line or many, and writes every line"""
+        print("🔍 Testing bulk checkout...")
+        
+        buyer = self.register("bulk-buyer")
+        self.add_to_cart(buyer, PRODUCTS[0])
+        single, single_count = self.counted_checkout(buyer)
+        
+        before = {product_id: self.stock(product_id) for product_id in PRODUCTS}
+        for quantity, product_id in enumerate(PRODUCTS, start=1):
+            self.add_to_cart(buyer, product_id, quantity)
+        several, several_count = self.counted_checkout(buyer)
+        taken = {product_id: before[product_id] - self.stock(product_id) for product_id in PRODUCTS}
+        order_id = str(several.json()["id"])
+        sold = {
+            product_id: sum(
+                movement["quantity"] for movement in self.movements(product_id)
+                if movement["reference_id"] == order_id and movement["reason"] == "sale"
+            )
+            for product_id in PRODUCTS
+        }
+        cart = self.client.get("/api/cart/", headers=buyer).json()
+        
+        success = (
+            single.status_code == several.status_code == 201 and single_count == several_count
+            and taken == sold == {product_id: quantity for quantity, product_id in enumerate(PRODUCTS, start=1)}
+            and cart["cart_items"] == []
+        )
+        details = f"Statements: {single_count} for 1 line, {several_count} for {len(PRODUCTS)}, Stock taken: {taken}, Sold: {sold}"
+        self.log_test("Bulk Checkout", success, details)
+    
+    def test_flash_sale_gate(self):
+        """Hot products need an admitted ticket, and buyers beyond the stock are told it is sold out"""
+        print("🔍 Testing the flash-sale waiting room...")
+        
+        self.client.post("/api/products/", json={
+            "id": "flash-kit", "name": "Flash Kit", "price": 50.0, "stock_quantity": 3, "category": "Kits"
+        }, headers=self.admin)
+        self.client.put("/api/admin/flash-sale/flash-kit", headers=self.admin)
+        first, second, third = self.register("flash-first"), self.register("flash-second"), self.register("flash-third")
+        
+        try:
+            without_ticket = self.add_to_cart(first, "flash-kit", 2).status_code
+            ticket = self.client.post("/api/flash-sale/flash-kit/tickets", json={"quantity": 2}, headers=first).json()
+            with_ticket = self.client.post("/api/cart/add", json={
+                "product_id": "flash-kit", "product_name": "Flash Kit", "product_price": 50.0, "quantity": 2
+            }, headers={**first, "X-Queue-Ticket": ticket["ticket"]}).status_code
+            too_many = self.client.post("/api/flash-sale/flash-kit/tickets", json={"quantity": 2}, headers=second).json()
+            last_one = self.client.post("/api/flash-sale/flash-kit/tickets", json={"quantity": 1}, headers=third).json()
+        finally:
+            self.client.delete("/api/admin/flash-sale/flash-kit", headers=self.admin)
+        
+        success = (
+            without_ticket == 429 and ticket["status"] == "admitted" and with_ticket == 200
+            and too_many["status"] == "sold_out" and too_many["ticket"] is None and last_one["status"] == "admitted"
+        )
+        details = f"No ticket: {without_ticket}, Ticket: {ticket['status']} -> add {with_ticket}, Then: {too_many['status']}, {last_one['status']}"
+        self.log_test("Flash-Sale Gate", success, details)
+    
+    def reads_from_replica(self, headers):
+        """Whether the caller's order history was read through the read-only pool"""
+        statements = []
+        
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(async_read_engine.sync_engine, "before_cursor_execute", count)
+        try:
+            self.client.get("/api/orders/", headers=headers)
+        finally:
+            event.remove(async_read_engine.sync_engine, "before_cursor_execute", count)
+        return bool(statements)
+    
+    def test_read_your_writes(self):
+        """Reads use the read-only pool, except right after the caller's own successful write"""
+        print("🔍 Testing read/write session routing...")
+        
+        reader, writer, failed = self.register("rw-reader"), self.register("rw-writer"), self.register("rw-failed")
+        self.add_to_cart(writer, "led-rgb")
+        empty_checkout = self.client.post("/api/orders/", headers=failed).status_code
+        routed = {name: self.reads_from_replica(headers) for name, headers in (("reader", reader), ("writer", writer), ("failed", failed))}
+        
+        db = ReadSessionLocal()
+        try:
+            db.execute(text("CREATE TABLE read_pool_probe (id INTEGER)"))
+            read_only = False
+        except OperationalError:
+            read_only = True
+        finally:
+            db.close()
+        
+        success = empty_checkout == 400 and routed == {"reader": True, "writer": False, "failed": True} and read_only
+        self.log_test("Read-Your-Writes Routing", success, f"Read pool used: {routed}, Read pool is read-only: {read_only}")
+
+def main():
+    print("🚀 Starting Checkout Tests...")
+    print("=" * 60)
+    
+    seed_database()
+    try:
+        with TestClient(app) as client:
+            tester = CheckoutTests(client)
+            tester.test_bulk_checkout()
+            tester.test_flash_sale_gate()
+            tester.test_read_your_writes()
+    finally:
+        shutil.rmtree(DATABASE_DIR, ignore_errors=True)
+    
+    # Print results
+    print("=" * 60)
+    print(f"📊 CHECKOUT TEST RESULTS:")
+    print(f"   Tests Run: {tester.tests_run}")
+    print(f"   Tests Passed: {tester.tests_passed}")
+    print(f"   Tests Failed: {tester.tests_run - tester.tests_passed}")
+    print(f"   Success Rate: {(tester.tests_passed/tester.tests_run)*100:.1f}%")
+    
+    if tester.tests_passed == tester.tests_run:
+        print("🎉 Checkout works!")
+        return 0
+    else:
+        print("⚠️  Some checkout tests failed!")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import os
+import shutil
+import sys
+import tempfile
+
+# Search is exercised in-process against a scratch database seeded with the
+# demo catalog
+DATABASE_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_DIR}/search_test.db"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from fastapi.testclient import TestClient
+
+from main import app
+from seed_data import seed_database
+
+class SearchTests:
+    def __init__(self, client):
+        self.client = client
+        self.tests_run = 0
+        self.tests_passed = 0
+        token = self.client.post("/api/auth/login", json={"email": "admin@gbsite.com", "password": "admin123"}).json()["access_token"]
+        self.admin = {"Authorization": f"Bearer {token}"}
+    
+    def log_test(self, name, success, details=""):
+        """Log test results"""
+        self.tests_run += 1
+        if success:
+            self.tests_passed += 1
+            print(f"✅ {name} - PASSED")
+        else:
+            print(f"❌ {name} - FAILED")
+        if details:
+            print(f"   {details}")
+        print()
+    
+    def create_product(self, product_id, name, description="", category="Testes"):
+        response = self.client.post("/api/products/", json={
+            "id": product_id, "name": name, "description": description,
+            "price": 10.0, "stock_quantity": 5, "category": category
+        }, headers=self.admin)
+        assert response.status_code == 201, response.text
+    
+    def search(self, q):
+        data = self.client.get("/api/products/search", params={"q": q}).json()
+        return data["matched_by"], [product["id"] for product in data["products"]]
+    
+    def test_fulltext_ranking(self):
+        """Accent-insensitive full-text matches come back with name matches ranked first"""
+        print("🔍 Testing full-text search ranking...")
+        
+        self.create_product("charge-controller", "Controlador de Carga", "Para placa solar de 5V")
+        self.create_product("solar-panel", "Placa Solar 5V", "Painel fotovoltaico")
+        matched_by, ids = self.search("placa solar")
+        accents_by, accent_ids = self.search("robotica")
+        
+        success = (
+            matched_by == "fulltext" and ids == ["solar-panel", "charge-controller"]
+            and accents_by == "fulltext" and "robot-kit-basic" in accent_ids
+        )
+        self.log_test("Full-Text Ranking", success, f"placa solar: {matched_by} {ids}, robotica: {accents_by} {accent_ids}")
+    
+    def test_index_follows_writes(self):
+        """Renaming and deactivating a product updates the index in the same write"""
+        print("🔍 Testing search index sync...")
+        
+        self.create_product("piezo-buzzer", "Buzzer Piezo")
+        _, created = self.search("buzzer")
+        self.client.put("/api/products/piezo-buzzer", json={"name": "Campainha Piezo"}, headers=self.admin)
+        renamed_by, renamed = self.search("campainha")
+        self.client.put("/api/products/piezo-buzzer", json={"is_active": False}, headers=self.admin)
+        _, deactivated = self.search("campainha")
+        
+        success = (
+            created == ["piezo-buzzer"] and renamed_by == "fulltext" and renamed == ["piezo-buzzer"]
+            and "piezo-buzzer" not in deactivated
+        )
+        self.log_test("Index Follows Writes", success, f"Created: {created}, Renamed: {renamed_by} {renamed}, Deactivated: {deactivated}")
+    
+    def test_fuzzy_fallback(self):
+        """Typos that match no word fall back to the accent-folding trigram index, which sees new products"""
+        print("🔍 Testing typo-tolerant matching...")
+        
+        typo_by, typo = self.search("ultrasonico")
+        self.create_product("bluetooth-module", "Módulo Bluetooth HC-05")
+        fresh_by, fresh = self.search("bluetoth")
+        
+        success = typo_by == "fuzzy" and typo[:1] == ["sensor-ultrasonic"] and fresh_by == "fuzzy" and fresh[:1] == ["bluetooth-module"]
+        self.log_test("Fuzzy Fallback", success, f"ultrasonico: {typo_by} {typo}, bluetoth: {fresh_by} {fresh}")
+    
+    def test_suggest(self):
+        """Prefixes complete categories before product names, match SKUs, and follow product writes"""
+        print("🔍 Testing autocomplete suggestions...")
+        
+        def suggest(prefix):
+            suggestions = self.client.get("/api/products/suggest", params={"prefix": prefix}).json()["suggestions"]
+            return [(item["type"], item["id"] or item["label"]) for item in suggestions]
+        
+        mixed = suggest("sen")
+        sku = suggest("arduino-")
+        self.create_product("jumper-wires", "Jumpers Macho-Fêmea")
+        created = suggest("jump")
+        self.client.put("/api/products/jumper-wires", json={"is_active": False}, headers=self.admin)
+        deactivated = suggest("jump")
+        
+        success = (
+            mixed == [("category", "Sensores"), ("product", "sensor-ultrasonic")] and sku == [("product", "arduino-uno")]
+            and created == [("product", "jumper-wires")] and deactivated == []
+        )
+        self.log_test("Suggest", success, f"sen: {mixed}, arduino-: {sku}, jump: {created} then {deactivated}")
+
+def main():
+    print("🚀 Starting Search Tests...")
+    print("=" * 60)
+    
+    seed_database()
+    try:
+        with TestClient(app) as client:
+            tester = SearchTests(client)
+            tester.test_fulltext_ranking()
+            tester.test_index_follows_writes()
+            tester.test_fuzzy_fallback()
+            tester.test_suggest()
+    finally:
+        shutil.rmtree(DATABASE_DIR, ignore_errors=True)
+    
+    # Print results
+    print("=" * 60)
+    print(f"📊 SEARCH TEST RESULTS:")
+    print(f"   Tests Run: {tester.tests_run}")
+    print(f"   Tests Passed: {tester.tests_passed}")
+    print(f"   Tests Failed: {tester.tests_run - tester.tests_passed}")
+    print(f"   Success Rate: {(tester.tests_passed/tester.tests_run)*100:.1f}%")
+    
+    if tester.tests_passed == tester.tests_run:
+        print("🎉 Product search works!")
+        return 0
+    else:
+        print("⚠️  Some search tests failed!")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
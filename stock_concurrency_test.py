@@ -0,0 +1,201 @@
+import requests
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class StockConcurrencyTests:
+    def __init__(self, base_url="http://127.0.0.1:8001", parallelism=50):
+        self.base_url = base_url
+        self.parallelism = parallelism
+        self.admin_token = None
+        self.run_id = str(int(time.time() * 1000))
+        self.tests_run = 0
+        self.tests_passed = 0
+
+    def log_test(self, name, success, details=""):
+        """Log test results"""
+        self.tests_run += 1
+        if success:
+            self.tests_passed += 1
+            print(f"✅ {name} - PASSED")
+        else:
+            print(f"❌ {name} - FAILED")
+        if details:
+            print(f"   {details}")
+        print()
+
+    def make_request(self, method, endpoint, data=None, token=None):
+        """Make HTTP request"""
+        url = f"{self.base_url}/api/{endpoint}"
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        
+        try:
+            if method == 'GET':
+                response = requests.get(url, headers=headers)
+            elif method == 'POST':
+                response = requests.post(url, json=data, headers=headers)
+            elif method == 'PUT':
+                response = requests.put(url, json=data, headers=headers)
+            
+            return response
+        except Exception as e:
+            print(f"Request error: {str(e)}")
+            return None
+
+    def login_admin(self):
+        response = self.make_request('POST', 'auth/login', {
+            "email": "admin@gbsite.com",
+            "password": "admin123"
+        })
+        if response and response.status_code == 200:
+            self.admin_token = response.json()['access_token']
+        return self.admin_token is not None
+
+    def create_product(self, name, stock):
+        product_id = f"stress-{name}-{self.run_id}"
+        response = self.make_request('POST', 'products/', {
+            "id": product_id,
+            "name": f"Stress test {name}",
+            "price": 10.0,
+            "category": "Stress",
+            "stock_quantity": stock
+        }, self.admin_token)
+        return product_id if response and response.status_code == 201 else None
+
+    def get_stock(self, product_id):
+        response = self.make_request('GET', f'products/{product_id}')
+        return response.json()['stock_quantity'] if response and response.status_code == 200 else None
+
+    def create_buyer(self, index):
+        """Register a user and return their token"""
+        username = f"stress_{self.run_id}_{index}"
+        response = self.make_request('POST', 'auth/register', {
+            "username": username,
+            "email": f"{username}@test.com",
+            "password": "stress123"
+        })
+        return response.json()['access_token'] if response and response.status_code == 201 else None
+
+    def run_all(self, requests_to_send):
+        """Fire every request at once and collect the status codes"""
+        with ThreadPoolExecutor(max_workers=self.parallelism) as pool:
+            responses = list(pool.map(lambda args: self.make_request(*args), requests_to_send))
+        return [response.status_code if response is not None else None for response in responses]
+
+    def add_all(self, tokens, product_id, quantities):
+        """Every buyer tries to put their quantity in the cart at the same time"""
+        return self.run_all([
+            ('POST', 'cart/add', {
+                "product_id": product_id,
+                "product_name": "Stress test product",
+                "product_price": 10.0,
+                "quantity": quantity
+            }, token)
+            for token, quantity in zip(tokens, quantities)
+        ])
+
+    def checkout_all(self, tokens):
+        return self.run_all([('POST', 'orders/', None, token) for token in tokens])
+
+    def test_single_unit_checkouts(self):
+        """More buyers than units, one unit each: exactly `stock` carts and orders may succeed"""
+        print("🔍 Testing concurrent single-unit checkouts...")
+        
+        stock = 20
+        buyers = self.parallelism
+        product_id = self.create_product("single", stock)
+        tokens = [self.create_buyer(f"s{i}") for i in range(buyers)]
+        if not product_id or None in tokens:
+            self.log_test("Concurrent Single-Unit Checkouts", False, "Setup failed")
+            return
+        
+        # Cart adds reserve stock, so the race is decided here
+        added = self.add_all(tokens, product_id, [1] * buyers)
+        holders = [token for token, code in zip(tokens, added) if code == 200]
+        codes = self.checkout_all(holders)
+        created = codes.count(201)
+        final_stock = self.get_stock(product_id)
+        
+        success = len(holders) == stock and added.count(400) == buyers - stock and created == stock and final_stock == 0
+        details = f"Buyers: {buyers}, Stock: {stock}, Carts reserved: {len(holders)}, Orders created: {created}, Final stock: {final_stock}"
+        self.log_test("Concurrent Single-Unit Checkouts", success, details)
+
+    def test_multi_unit_checkouts(self):
+        """Mixed quantities: units sold must match the stock taken and never exceed it"""
+        print("🔍 Testing concurrent multi-unit checkouts...")
+        
+        stock = 37
+        quantities = [1 + i % 4 for i in range(self.parallelism)]
+        product_id = self.create_product("multi", stock)
+        tokens = [self.create_buyer(f"m{i}") for i in range(len(quantities))]
+        if not product_id or None in tokens:
+            self.log_test("Concurrent Multi-Unit Checkouts", False, "Setup failed")
+            return
+        
+        added = self.add_all(tokens, product_id, quantities)
+        reserved = sum(quantity for quantity, code in zip(quantities, added) if code == 200)
+        # Every buyer checks out, including those whose cart add was rejected
+        codes = self.checkout_all(tokens)
+        sold = sum(quantity for quantity, code in zip(quantities, codes) if code == 201)
+        errors = [code for code in added + codes if code not in (200, 201, 400, 409)]
+        final_stock = self.get_stock(product_id)
+        
+        success = not errors and sold == reserved and sold <= stock and final_stock == stock - sold
+        details = f"Stock: {stock}, Units reserved: {reserved}, Units sold: {sold}, Final stock: {final_stock}, Unexpected responses: {errors}"
+        self.log_test("Concurrent Multi-Unit Checkouts", success, details)
+
+    def test_concurrent_stock_adjustments(self):
+        """Admin restocks racing each other must all be applied (no lost updates)"""
+        print("🔍 Testing concurrent stock adjustments...")
+        
+        stock = 5
+        adjustments = self.parallelism
+        product_id = self.create_product("adjust", stock)
+        if not product_id:
+            self.log_test("Concurrent Stock Adjustments", False, "Setup failed")
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.parallelism) as pool:
+            responses = list(pool.map(
+                lambda _: self.make_request('PUT', f'products/{product_id}/stock', {"quantity": 1, "reason": "restock"}, self.admin_token),
+                range(adjustments)
+            ))
+        applied = sum(1 for response in responses if response is not None and response.status_code == 200)
+        final_stock = self.get_stock(product_id)
+        
+        success = applied == adjustments and final_stock == stock + adjustments
+        details = f"Adjustments: {adjustments}, Applied: {applied}, Final stock: {final_stock} (expected {stock + adjustments})"
+        self.log_test("Concurrent Stock Adjustments", success, details)
+
+def main():
+    print("🚀 Starting Stock Concurrency Tests...")
+    print("=" * 60)
+    
+    tester = StockConcurrencyTests()
+    if not tester.login_admin():
+        print("❌ Admin login failed, cannot run stock concurrency tests")
+        return 1
+    
+    tester.test_single_unit_checkouts()
+    tester.test_multi_unit_checkouts()
+    tester.test_concurrent_stock_adjustments()
+    
+    # Print results
+    print("=" * 60)
+    print(f"📊 STOCK CONCURRENCY TEST RESULTS:")
+    print(f"   Tests Run: {tester.tests_run}")
+    print(f"   Tests Passed: {tester.tests_passed}")
+    print(f"   Tests Failed: {tester.tests_run - tester.tests_passed}")
+    print(f"   Success Rate: {(tester.tests_passed/tester.tests_run)*100:.1f}%")
+    
+    if tester.tests_passed == tester.tests_run:
+        print("🎉 No oversell under concurrent checkout!")
+        return 0
+    else:
+        print("⚠️  Some stock concurrency tests failed!")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# The write queue is exercised in-process against a scratch database, with a
+# short timeout so the 503 path can be reached
+DATABASE_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_DIR}/write_queue_test.db"
+os.environ["WRITE_QUEUE"] = "1"
+os.environ["WRITE_QUEUE_TIMEOUT"] = "0.3"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from database import SQLALCHEMY_DATABASE_URL, engine
+from services.write_queue import WriteQueue, run_write, run_write_async
+
+class WriteQueueTests:
+    def __init__(self):
+        self.tests_run = 0
+        self.tests_passed = 0
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE notes (name VARCHAR(50) NOT NULL)"))
+    
+    def log_test(self, name, success, details=""):
+        """Log test results"""
+        self.tests_run += 1
+        if success:
+            self.tests_passed += 1
+            print(f"✅ {name} - PASSED")
+        else:
+            print(f"❌ {name} - FAILED")
+        if details:
+            print(f"   {details}")
+        print()
+    
+    def notes(self):
+        with engine.connect() as conn:
+            return sorted(conn.execute(text("SELECT name FROM notes")).scalars())
+    
+    @staticmethod
+    def add_note(name, error=None, delay=0):
+        """A write unit that inserts a note, then optionally waits and/or raises"""
+        def unit(db):
+            db.execute(text("INSERT INTO notes (name) VALUES (:name)"), {"name": name})
+            time.sleep(delay)
+            if error is not None:
+                raise error
+            return name
+        return unit
+    
+    def test_failing_unit_rolls_back_alone(self):
+        """A unit raising HTTPException undoes only its own writes; its batch-mates commit"""
+        print("🔍 Testing savepoint isolation within a batch...")
+        
+        # A long batching window, so the three units are committed together
+        queue = WriteQueue(SQLALCHEMY_DATABASE_URL, max_delay_ms=200)
+        futures = [
+            queue.submit(self.add_note("batch-a")),
+            queue.submit(self.add_note("batch-b", error=HTTPException(status_code=400, detail="Rejected"))),
+            queue.submit(self.add_note("batch-c")),
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=5))
+            except HTTPException as exc:
+                results.append(exc.status_code)
+        
+        stored = [name for name in self.notes() if name.startswith("batch-")]
+        stats = queue.stats()
+        success = (
+            stats["batches"] == 1 and stats["units"] == 3 and stats["failed_units"] == 1
+            and results == ["batch-a", 400, "batch-c"] and stored == ["batch-a", "batch-c"]
+        )
+        details = f"Results: {results}, Stored: {stored}, Batches: {stats['batches']}, Failed units: {stats['failed_units']}"
+        self.log_test("Failing Unit Rolls Back Alone", success, details)
+    
+    def test_queued_unit_times_out(self):
+        """A unit still queued when the timeout runs out gets 503 and is never applied"""
+        print("🔍 Testing 503 for a unit that never started...")
+        
+        blocker = threading.Thread(target=run_write, args=(None, self.add_note("blocker", delay=1.0)))
+        blocker.start()
+        time.sleep(0.1)
+        
+        started = time.monotonic()
+        try:
+            run_write(None, self.add_note("timed-out"))
+            outcome = "committed"
+        except HTTPException as exc:
+            outcome = (exc.status_code, exc.headers.get("Retry-After"))
+        waited = time.monotonic() - started
+        blocker.join()
+        time.sleep(0.1)
+        
+        stored = self.notes()
+        success = outcome == (503, "1") and waited < 0.9 and "timed-out" not in stored and "blocker" in stored
+        details = f"Outcome: {outcome}, Waited: {waited:.2f}s, Stored: {stored}"
+        self.log_test("Queued Unit Times Out With 503", success, details)
+    
+    def test_started_unit_is_awaited(self):
+        """A unit the writer already started is committed, so the caller waits for it instead of getting 503"""
+        print("🔍 Testing that a started unit outlives the timeout...")
+        
+        try:
+            outcome = run_write(None, self.add_note("slow", delay=0.6))
+        except HTTPException as exc:
+            outcome = exc.status_code
+        
+        success = outcome == "slow" and "slow" in self.notes()
+        self.log_test("Started Unit Is Awaited", success, f"Outcome: {outcome}")
+    
+    def test_async_queued_unit_times_out(self):
+        """run_write_async answers a unit stuck in the queue with 503 as well"""
+        print("🔍 Testing 503 from run_write_async...")
+        
+        async def scenario():
+            blocker = asyncio.ensure_future(run_write_async(self.add_note("async-blocker", delay=1.0)))
+            await asyncio.sleep(0.1)
+            try:
+                await run_write_async(self.add_note("async-timed-out"))
+                outcome = "committed"
+            except HTTPException as exc:
+                outcome = exc.status_code
+            await blocker
+            return outcome
+        
+        outcome = asyncio.run(scenario())
+        time.sleep(0.1)
+        stored = self.notes()
+        success = outcome == 503 and "async-timed-out" not in stored and "async-blocker" in stored
+        self.log_test("Async Queued Unit Times Out With 503", success, f"Outcome: {outcome}, Stored: {stored}")
+
+def main():
+    print("🚀 Starting Write Queue Tests...")
+    print("=" * 60)
+    
+    tester = WriteQueueTests()
+    tester.test_failing_unit_rolls_back_alone()
+    tester.test_queued_unit_times_out()
+    tester.test_started_unit_is_awaited()
+    tester.test_async_queued_unit_times_out()
+    
+    # Print results
+    print("=" * 60)
+    print(f"📊 WRITE QUEUE TEST RESULTS:")
+    print(f"   Tests Run: {tester.tests_run}")
+    print(f"   Tests Passed: {tester.tests_passed}")
+    print(f"   Tests Failed: {tester.tests_run - tester.tests_passed}")
+    print(f"   Success Rate: {(tester.tests_passed/tester.tests_run)*100:.1f}%")
+    
+    if tester.tests_passed == tester.tests_run:
+        print("🎉 Write queue isolates failures and times out cleanly!")
+        return 0
+    else:
+        print("⚠️  Some write queue tests failed!")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())